@@ -0,0 +1,193 @@
+# automatically generated by the FlatBuffers compiler, do not modify
+
+# namespace: CS598
+
+import flatbuffers
+from flatbuffers.compat import import_numpy
+np = import_numpy()
+
+class ColumnIndex(object):
+    __slots__ = ['_tab']
+
+    @classmethod
+    def GetRootAs(cls, buf, offset=0):
+        n = flatbuffers.encode.Get(flatbuffers.packer.uoffset, buf, offset)
+        x = ColumnIndex()
+        x.Init(buf, n + offset)
+        return x
+
+    @classmethod
+    def GetRootAsColumnIndex(cls, buf, offset=0):
+        """This method is deprecated. Please switch to GetRootAs."""
+        return cls.GetRootAs(buf, offset)
+    # ColumnIndex
+    def Init(self, buf, pos):
+        self._tab = flatbuffers.table.Table(buf, pos)
+
+    # ColumnIndex
+    def Column(self):
+        o = flatbuffers.number_types.UOffsetTFlags.py_type(self._tab.Offset(4))
+        if o != 0:
+            return self._tab.String(o + self._tab.Pos)
+        return None
+
+    # ColumnIndex
+    def FrameVersion(self):
+        o = flatbuffers.number_types.UOffsetTFlags.py_type(self._tab.Offset(6))
+        if o != 0:
+            return self._tab.Get(flatbuffers.number_types.Uint64Flags, o + self._tab.Pos)
+        return 0
+
+    # ColumnIndex
+    def NumRows(self):
+        o = flatbuffers.number_types.UOffsetTFlags.py_type(self._tab.Offset(8))
+        if o != 0:
+            return self._tab.Get(flatbuffers.number_types.Uint64Flags, o + self._tab.Pos)
+        return 0
+
+    # ColumnIndex
+    def Order(self, j):
+        o = flatbuffers.number_types.UOffsetTFlags.py_type(self._tab.Offset(10))
+        if o != 0:
+            a = self._tab.Vector(o)
+            return self._tab.Get(flatbuffers.number_types.Int64Flags, a + flatbuffers.number_types.UOffsetTFlags.py_type(j * 8))
+        return 0
+
+    # ColumnIndex
+    def OrderAsNumpy(self):
+        o = flatbuffers.number_types.UOffsetTFlags.py_type(self._tab.Offset(10))
+        if o != 0:
+            return self._tab.GetVectorAsNumpy(flatbuffers.number_types.Int64Flags, o)
+        return 0
+
+    # ColumnIndex
+    def OrderLength(self):
+        o = flatbuffers.number_types.UOffsetTFlags.py_type(self._tab.Offset(10))
+        if o != 0:
+            return self._tab.VectorLen(o)
+        return 0
+
+    # ColumnIndex
+    def OrderIsNone(self):
+        o = flatbuffers.number_types.UOffsetTFlags.py_type(self._tab.Offset(10))
+        return o == 0
+
+    # ColumnIndex
+    def BucketOffsets(self, j):
+        o = flatbuffers.number_types.UOffsetTFlags.py_type(self._tab.Offset(12))
+        if o != 0:
+            a = self._tab.Vector(o)
+            return self._tab.Get(flatbuffers.number_types.Int64Flags, a + flatbuffers.number_types.UOffsetTFlags.py_type(j * 8))
+        return 0
+
+    # ColumnIndex
+    def BucketOffsetsAsNumpy(self):
+        o = flatbuffers.number_types.UOffsetTFlags.py_type(self._tab.Offset(12))
+        if o != 0:
+            return self._tab.GetVectorAsNumpy(flatbuffers.number_types.Int64Flags, o)
+        return 0
+
+    # ColumnIndex
+    def BucketOffsetsLength(self):
+        o = flatbuffers.number_types.UOffsetTFlags.py_type(self._tab.Offset(12))
+        if o != 0:
+            return self._tab.VectorLen(o)
+        return 0
+
+    # ColumnIndex
+    def BucketOffsetsIsNone(self):
+        o = flatbuffers.number_types.UOffsetTFlags.py_type(self._tab.Offset(12))
+        return o == 0
+
+    # ColumnIndex
+    def BucketRows(self, j):
+        o = flatbuffers.number_types.UOffsetTFlags.py_type(self._tab.Offset(14))
+        if o != 0:
+            a = self._tab.Vector(o)
+            return self._tab.Get(flatbuffers.number_types.Int64Flags, a + flatbuffers.number_types.UOffsetTFlags.py_type(j * 8))
+        return 0
+
+    # ColumnIndex
+    def BucketRowsAsNumpy(self):
+        o = flatbuffers.number_types.UOffsetTFlags.py_type(self._tab.Offset(14))
+        if o != 0:
+            return self._tab.GetVectorAsNumpy(flatbuffers.number_types.Int64Flags, o)
+        return 0
+
+    # ColumnIndex
+    def BucketRowsLength(self):
+        o = flatbuffers.number_types.UOffsetTFlags.py_type(self._tab.Offset(14))
+        if o != 0:
+            return self._tab.VectorLen(o)
+        return 0
+
+    # ColumnIndex
+    def BucketRowsIsNone(self):
+        o = flatbuffers.number_types.UOffsetTFlags.py_type(self._tab.Offset(14))
+        return o == 0
+
+def ColumnIndexStart(builder):
+    builder.StartObject(6)
+
+def Start(builder):
+    ColumnIndexStart(builder)
+
+def ColumnIndexAddColumn(builder, column):
+    builder.PrependUOffsetTRelativeSlot(0, flatbuffers.number_types.UOffsetTFlags.py_type(column), 0)
+
+def AddColumn(builder, column):
+    ColumnIndexAddColumn(builder, column)
+
+def ColumnIndexAddFrameVersion(builder, frameVersion):
+    builder.PrependUint64Slot(1, frameVersion, 0)
+
+def AddFrameVersion(builder, frameVersion):
+    ColumnIndexAddFrameVersion(builder, frameVersion)
+
+def ColumnIndexAddNumRows(builder, numRows):
+    builder.PrependUint64Slot(2, numRows, 0)
+
+def AddNumRows(builder, numRows):
+    ColumnIndexAddNumRows(builder, numRows)
+
+def ColumnIndexAddOrder(builder, order):
+    builder.PrependUOffsetTRelativeSlot(3, flatbuffers.number_types.UOffsetTFlags.py_type(order), 0)
+
+def AddOrder(builder, order):
+    ColumnIndexAddOrder(builder, order)
+
+def ColumnIndexStartOrderVector(builder, numElems):
+    return builder.StartVector(8, numElems, 8)
+
+def StartOrderVector(builder, numElems):
+    return ColumnIndexStartOrderVector(builder, numElems)
+
+def ColumnIndexAddBucketOffsets(builder, bucketOffsets):
+    builder.PrependUOffsetTRelativeSlot(4, flatbuffers.number_types.UOffsetTFlags.py_type(bucketOffsets), 0)
+
+def AddBucketOffsets(builder, bucketOffsets):
+    ColumnIndexAddBucketOffsets(builder, bucketOffsets)
+
+def ColumnIndexStartBucketOffsetsVector(builder, numElems):
+    return builder.StartVector(8, numElems, 8)
+
+def StartBucketOffsetsVector(builder, numElems):
+    return ColumnIndexStartBucketOffsetsVector(builder, numElems)
+
+def ColumnIndexAddBucketRows(builder, bucketRows):
+    builder.PrependUOffsetTRelativeSlot(5, flatbuffers.number_types.UOffsetTFlags.py_type(bucketRows), 0)
+
+def AddBucketRows(builder, bucketRows):
+    ColumnIndexAddBucketRows(builder, bucketRows)
+
+def ColumnIndexStartBucketRowsVector(builder, numElems):
+    return builder.StartVector(8, numElems, 8)
+
+def StartBucketRowsVector(builder, numElems):
+    return ColumnIndexStartBucketRowsVector(builder, numElems)
+
+def ColumnIndexEnd(builder):
+    return builder.EndObject()
+
+def End(builder):
+    return ColumnIndexEnd(builder)
@@ -0,0 +1,232 @@
+# automatically generated by the FlatBuffers compiler, do not modify
+
+# namespace: CS598
+
+import flatbuffers
+from flatbuffers.compat import import_numpy
+np = import_numpy()
+
+class ColumnStats(object):
+    __slots__ = ['_tab']
+
+    @classmethod
+    def GetRootAs(cls, buf, offset=0):
+        n = flatbuffers.encode.Get(flatbuffers.packer.uoffset, buf, offset)
+        x = ColumnStats()
+        x.Init(buf, n + offset)
+        return x
+
+    @classmethod
+    def GetRootAsColumnStats(cls, buf, offset=0):
+        """This method is deprecated. Please switch to GetRootAs."""
+        return cls.GetRootAs(buf, offset)
+    # ColumnStats
+    def Init(self, buf, pos):
+        self._tab = flatbuffers.table.Table(buf, pos)
+
+    # ColumnStats
+    def NumRows(self):
+        o = flatbuffers.number_types.UOffsetTFlags.py_type(self._tab.Offset(4))
+        if o != 0:
+            return self._tab.Get(flatbuffers.number_types.Uint64Flags, o + self._tab.Pos)
+        return 0
+
+    # ColumnStats
+    def NullCount(self):
+        o = flatbuffers.number_types.UOffsetTFlags.py_type(self._tab.Offset(6))
+        if o != 0:
+            return self._tab.Get(flatbuffers.number_types.Uint64Flags, o + self._tab.Pos)
+        return 0
+
+    # ColumnStats
+    def HasMinMax(self):
+        o = flatbuffers.number_types.UOffsetTFlags.py_type(self._tab.Offset(8))
+        if o != 0:
+            return bool(self._tab.Get(flatbuffers.number_types.BoolFlags, o + self._tab.Pos))
+        return False
+
+    # ColumnStats
+    def MinInt(self):
+        o = flatbuffers.number_types.UOffsetTFlags.py_type(self._tab.Offset(10))
+        if o != 0:
+            return self._tab.Get(flatbuffers.number_types.Int64Flags, o + self._tab.Pos)
+        return 0
+
+    # ColumnStats
+    def MaxInt(self):
+        o = flatbuffers.number_types.UOffsetTFlags.py_type(self._tab.Offset(12))
+        if o != 0:
+            return self._tab.Get(flatbuffers.number_types.Int64Flags, o + self._tab.Pos)
+        return 0
+
+    # ColumnStats
+    def MinFloat(self):
+        o = flatbuffers.number_types.UOffsetTFlags.py_type(self._tab.Offset(14))
+        if o != 0:
+            return self._tab.Get(flatbuffers.number_types.Float64Flags, o + self._tab.Pos)
+        return 0.0
+
+    # ColumnStats
+    def MaxFloat(self):
+        o = flatbuffers.number_types.UOffsetTFlags.py_type(self._tab.Offset(16))
+        if o != 0:
+            return self._tab.Get(flatbuffers.number_types.Float64Flags, o + self._tab.Pos)
+        return 0.0
+
+    # ColumnStats
+    def MinString(self):
+        o = flatbuffers.number_types.UOffsetTFlags.py_type(self._tab.Offset(18))
+        if o != 0:
+            return self._tab.String(o + self._tab.Pos)
+        return None
+
+    # ColumnStats
+    def MaxString(self):
+        o = flatbuffers.number_types.UOffsetTFlags.py_type(self._tab.Offset(20))
+        if o != 0:
+            return self._tab.String(o + self._tab.Pos)
+        return None
+
+    # ColumnStats
+    def SumInt(self):
+        o = flatbuffers.number_types.UOffsetTFlags.py_type(self._tab.Offset(22))
+        if o != 0:
+            return self._tab.Get(flatbuffers.number_types.Int64Flags, o + self._tab.Pos)
+        return 0
+
+    # ColumnStats
+    def SumFloat(self):
+        o = flatbuffers.number_types.UOffsetTFlags.py_type(self._tab.Offset(24))
+        if o != 0:
+            return self._tab.Get(flatbuffers.number_types.Float64Flags, o + self._tab.Pos)
+        return 0.0
+
+    # ColumnStats
+    def DistinctCount(self):
+        o = flatbuffers.number_types.UOffsetTFlags.py_type(self._tab.Offset(26))
+        if o != 0:
+            return self._tab.Get(flatbuffers.number_types.Uint64Flags, o + self._tab.Pos)
+        return 0
+
+    # ColumnStats
+    def DistinctSketch(self, j):
+        o = flatbuffers.number_types.UOffsetTFlags.py_type(self._tab.Offset(28))
+        if o != 0:
+            a = self._tab.Vector(o)
+            return self._tab.Get(flatbuffers.number_types.Uint64Flags, a + flatbuffers.number_types.UOffsetTFlags.py_type(j * 8))
+        return 0
+
+    # ColumnStats
+    def DistinctSketchAsNumpy(self):
+        o = flatbuffers.number_types.UOffsetTFlags.py_type(self._tab.Offset(28))
+        if o != 0:
+            return self._tab.GetVectorAsNumpy(flatbuffers.number_types.Uint64Flags, o)
+        return 0
+
+    # ColumnStats
+    def DistinctSketchLength(self):
+        o = flatbuffers.number_types.UOffsetTFlags.py_type(self._tab.Offset(28))
+        if o != 0:
+            return self._tab.VectorLen(o)
+        return 0
+
+    # ColumnStats
+    def DistinctSketchIsNone(self):
+        o = flatbuffers.number_types.UOffsetTFlags.py_type(self._tab.Offset(28))
+        return o == 0
+
+def ColumnStatsStart(builder):
+    builder.StartObject(13)
+
+def Start(builder):
+    ColumnStatsStart(builder)
+
+def ColumnStatsAddNumRows(builder, numRows):
+    builder.PrependUint64Slot(0, numRows, 0)
+
+def AddNumRows(builder, numRows):
+    ColumnStatsAddNumRows(builder, numRows)
+
+def ColumnStatsAddNullCount(builder, nullCount):
+    builder.PrependUint64Slot(1, nullCount, 0)
+
+def AddNullCount(builder, nullCount):
+    ColumnStatsAddNullCount(builder, nullCount)
+
+def ColumnStatsAddHasMinMax(builder, hasMinMax):
+    builder.PrependBoolSlot(2, hasMinMax, 0)
+
+def AddHasMinMax(builder, hasMinMax):
+    ColumnStatsAddHasMinMax(builder, hasMinMax)
+
+def ColumnStatsAddMinInt(builder, minInt):
+    builder.PrependInt64Slot(3, minInt, 0)
+
+def AddMinInt(builder, minInt):
+    ColumnStatsAddMinInt(builder, minInt)
+
+def ColumnStatsAddMaxInt(builder, maxInt):
+    builder.PrependInt64Slot(4, maxInt, 0)
+
+def AddMaxInt(builder, maxInt):
+    ColumnStatsAddMaxInt(builder, maxInt)
+
+def ColumnStatsAddMinFloat(builder, minFloat):
+    builder.PrependFloat64Slot(5, minFloat, 0.0)
+
+def AddMinFloat(builder, minFloat):
+    ColumnStatsAddMinFloat(builder, minFloat)
+
+def ColumnStatsAddMaxFloat(builder, maxFloat):
+    builder.PrependFloat64Slot(6, maxFloat, 0.0)
+
+def AddMaxFloat(builder, maxFloat):
+    ColumnStatsAddMaxFloat(builder, maxFloat)
+
+def ColumnStatsAddMinString(builder, minString):
+    builder.PrependUOffsetTRelativeSlot(7, flatbuffers.number_types.UOffsetTFlags.py_type(minString), 0)
+
+def AddMinString(builder, minString):
+    ColumnStatsAddMinString(builder, minString)
+
+def ColumnStatsAddMaxString(builder, maxString):
+    builder.PrependUOffsetTRelativeSlot(8, flatbuffers.number_types.UOffsetTFlags.py_type(maxString), 0)
+
+def AddMaxString(builder, maxString):
+    ColumnStatsAddMaxString(builder, maxString)
+
+def ColumnStatsAddSumInt(builder, sumInt):
+    builder.PrependInt64Slot(9, sumInt, 0)
+
+def AddSumInt(builder, sumInt):
+    ColumnStatsAddSumInt(builder, sumInt)
+
+def ColumnStatsAddSumFloat(builder, sumFloat):
+    builder.PrependFloat64Slot(10, sumFloat, 0.0)
+
+def AddSumFloat(builder, sumFloat):
+    ColumnStatsAddSumFloat(builder, sumFloat)
+
+def ColumnStatsAddDistinctCount(builder, distinctCount):
+    builder.PrependUint64Slot(11, distinctCount, 0)
+
+def AddDistinctCount(builder, distinctCount):
+    ColumnStatsAddDistinctCount(builder, distinctCount)
+
+def ColumnStatsAddDistinctSketch(builder, distinctSketch):
+    builder.PrependUOffsetTRelativeSlot(12, flatbuffers.number_types.UOffsetTFlags.py_type(distinctSketch), 0)
+
+def AddDistinctSketch(builder, distinctSketch):
+    ColumnStatsAddDistinctSketch(builder, distinctSketch)
+
+def ColumnStatsStartDistinctSketchVector(builder, numElems):
+    return builder.StartVector(8, numElems, 8)
+
+def StartDistinctSketchVector(builder, numElems):
+    return ColumnStatsStartDistinctSketchVector(builder, numElems)
+
+def ColumnStatsEnd(builder):
+    return builder.EndObject()
+
+def End(builder):
+    return ColumnStatsEnd(builder)
@@ -56,8 +56,65 @@ class DataFrame(object):
         o = flatbuffers.number_types.UOffsetTFlags.py_type(self._tab.Offset(6))
         return o == 0
 
+    # DataFrame
+    def ColumnDirectory(self, j):
+        o = flatbuffers.number_types.UOffsetTFlags.py_type(self._tab.Offset(8))
+        if o != 0:
+            x = self._tab.Vector(o)
+            x += flatbuffers.number_types.UOffsetTFlags.py_type(j) * 4
+            x = self._tab.Indirect(x)
+            from CS598.Metadata import Metadata
+            obj = Metadata()
+            obj.Init(self._tab.Bytes, x)
+            return obj
+        return None
+
+    # DataFrame
+    def ColumnDirectoryLength(self):
+        o = flatbuffers.number_types.UOffsetTFlags.py_type(self._tab.Offset(8))
+        if o != 0:
+            return self._tab.VectorLen(o)
+        return 0
+
+    # DataFrame
+    def ColumnDirectoryIsNone(self):
+        o = flatbuffers.number_types.UOffsetTFlags.py_type(self._tab.Offset(8))
+        return o == 0
+
+    # DataFrame
+    def RowGroups(self, j):
+        o = flatbuffers.number_types.UOffsetTFlags.py_type(self._tab.Offset(10))
+        if o != 0:
+            x = self._tab.Vector(o)
+            x += flatbuffers.number_types.UOffsetTFlags.py_type(j) * 4
+            x = self._tab.Indirect(x)
+            from CS598.RowGroup import RowGroup
+            obj = RowGroup()
+            obj.Init(self._tab.Bytes, x)
+            return obj
+        return None
+
+    # DataFrame
+    def RowGroupsLength(self):
+        o = flatbuffers.number_types.UOffsetTFlags.py_type(self._tab.Offset(10))
+        if o != 0:
+            return self._tab.VectorLen(o)
+        return 0
+
+    # DataFrame
+    def RowGroupsIsNone(self):
+        o = flatbuffers.number_types.UOffsetTFlags.py_type(self._tab.Offset(10))
+        return o == 0
+
+    # DataFrame
+    def NumRows(self):
+        o = flatbuffers.number_types.UOffsetTFlags.py_type(self._tab.Offset(12))
+        if o != 0:
+            return self._tab.Get(flatbuffers.number_types.Uint64Flags, o + self._tab.Pos)
+        return 0
+
 def DataFrameStart(builder):
-    builder.StartObject(2)
+    builder.StartObject(5)
 
 def Start(builder):
     DataFrameStart(builder)
@@ -80,6 +137,36 @@ def DataFrameStartColumnsVector(builder, numElems):
 def StartColumnsVector(builder, numElems):
     return DataFrameStartColumnsVector(builder, numElems)
 
+def DataFrameAddColumnDirectory(builder, columnDirectory):
+    builder.PrependUOffsetTRelativeSlot(2, flatbuffers.number_types.UOffsetTFlags.py_type(columnDirectory), 0)
+
+def AddColumnDirectory(builder, columnDirectory):
+    DataFrameAddColumnDirectory(builder, columnDirectory)
+
+def DataFrameStartColumnDirectoryVector(builder, numElems):
+    return builder.StartVector(4, numElems, 4)
+
+def StartColumnDirectoryVector(builder, numElems):
+    return DataFrameStartColumnDirectoryVector(builder, numElems)
+
+def DataFrameAddRowGroups(builder, rowGroups):
+    builder.PrependUOffsetTRelativeSlot(3, flatbuffers.number_types.UOffsetTFlags.py_type(rowGroups), 0)
+
+def AddRowGroups(builder, rowGroups):
+    DataFrameAddRowGroups(builder, rowGroups)
+
+def DataFrameStartRowGroupsVector(builder, numElems):
+    return builder.StartVector(4, numElems, 4)
+
+def StartRowGroupsVector(builder, numElems):
+    return DataFrameStartRowGroupsVector(builder, numElems)
+
+def DataFrameAddNumRows(builder, numRows):
+    builder.PrependUint64Slot(4, numRows, 0)
+
+def AddNumRows(builder, numRows):
+    DataFrameAddNumRows(builder, numRows)
+
 def DataFrameEnd(builder):
     return builder.EndObject()
 
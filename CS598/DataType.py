@@ -6,3 +6,15 @@ class DataType(object):
     Int = 0
     Float = 1
     String = 2
+    DictString = 3
+    Int8 = 4
+    Int16 = 5
+    Int32 = 6
+    UInt8 = 7
+    UInt16 = 8
+    UInt32 = 9
+    UInt64 = 10
+    Float32 = 11
+    Bool = 12
+    DateTime = 13
+    Categorical = 14
@@ -0,0 +1,10 @@
+# automatically generated by the FlatBuffers compiler, do not modify
+
+# namespace: CS598
+
+class Encoding(object):
+    Plain = 0
+    BitPacked = 1
+    FrameOfReference = 2
+    RunLength = 3
+    Delta = 4
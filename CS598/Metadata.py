@@ -38,8 +38,72 @@ class Metadata(object):
             return self._tab.Get(flatbuffers.number_types.Int8Flags, o + self._tab.Pos)
         return 0
 
+    # Metadata
+    def Index(self):
+        o = flatbuffers.number_types.UOffsetTFlags.py_type(self._tab.Offset(8))
+        if o != 0:
+            return self._tab.Get(flatbuffers.number_types.Uint32Flags, o + self._tab.Pos)
+        return 0
+
+    # Metadata
+    def PandasDtype(self):
+        o = flatbuffers.number_types.UOffsetTFlags.py_type(self._tab.Offset(10))
+        if o != 0:
+            return self._tab.String(o + self._tab.Pos)
+        return None
+
+    # Metadata
+    def Ordered(self):
+        o = flatbuffers.number_types.UOffsetTFlags.py_type(self._tab.Offset(12))
+        if o != 0:
+            return bool(self._tab.Get(flatbuffers.number_types.BoolFlags, o + self._tab.Pos))
+        return False
+
+    # Metadata
+    def Stats(self):
+        o = flatbuffers.number_types.UOffsetTFlags.py_type(self._tab.Offset(14))
+        if o != 0:
+            x = self._tab.Indirect(o + self._tab.Pos)
+            from CS598.ColumnStats import ColumnStats
+            obj = ColumnStats()
+            obj.Init(self._tab.Bytes, x)
+            return obj
+        return None
+
+    # Metadata
+    def ZoneSize(self):
+        o = flatbuffers.number_types.UOffsetTFlags.py_type(self._tab.Offset(16))
+        if o != 0:
+            return self._tab.Get(flatbuffers.number_types.Uint32Flags, o + self._tab.Pos)
+        return 0
+
+    # Metadata
+    def ZoneMaps(self, j):
+        o = flatbuffers.number_types.UOffsetTFlags.py_type(self._tab.Offset(18))
+        if o != 0:
+            x = self._tab.Vector(o)
+            x += flatbuffers.number_types.UOffsetTFlags.py_type(j) * 4
+            x = self._tab.Indirect(x)
+            from CS598.ColumnStats import ColumnStats
+            obj = ColumnStats()
+            obj.Init(self._tab.Bytes, x)
+            return obj
+        return None
+
+    # Metadata
+    def ZoneMapsLength(self):
+        o = flatbuffers.number_types.UOffsetTFlags.py_type(self._tab.Offset(18))
+        if o != 0:
+            return self._tab.VectorLen(o)
+        return 0
+
+    # Metadata
+    def ZoneMapsIsNone(self):
+        o = flatbuffers.number_types.UOffsetTFlags.py_type(self._tab.Offset(18))
+        return o == 0
+
 def MetadataStart(builder):
-    builder.StartObject(2)
+    builder.StartObject(8)
 
 def Start(builder):
     MetadataStart(builder)
@@ -56,6 +120,48 @@ def MetadataAddDtype(builder, dtype):
 def AddDtype(builder, dtype):
     MetadataAddDtype(builder, dtype)
 
+def MetadataAddIndex(builder, index):
+    builder.PrependUint32Slot(2, index, 0)
+
+def AddIndex(builder, index):
+    MetadataAddIndex(builder, index)
+
+def MetadataAddPandasDtype(builder, pandasDtype):
+    builder.PrependUOffsetTRelativeSlot(3, flatbuffers.number_types.UOffsetTFlags.py_type(pandasDtype), 0)
+
+def AddPandasDtype(builder, pandasDtype):
+    MetadataAddPandasDtype(builder, pandasDtype)
+
+def MetadataAddOrdered(builder, ordered):
+    builder.PrependBoolSlot(4, ordered, 0)
+
+def AddOrdered(builder, ordered):
+    MetadataAddOrdered(builder, ordered)
+
+def MetadataAddStats(builder, stats):
+    builder.PrependUOffsetTRelativeSlot(5, flatbuffers.number_types.UOffsetTFlags.py_type(stats), 0)
+
+def AddStats(builder, stats):
+    MetadataAddStats(builder, stats)
+
+def MetadataAddZoneSize(builder, zoneSize):
+    builder.PrependUint32Slot(6, zoneSize, 0)
+
+def AddZoneSize(builder, zoneSize):
+    MetadataAddZoneSize(builder, zoneSize)
+
+def MetadataAddZoneMaps(builder, zoneMaps):
+    builder.PrependUOffsetTRelativeSlot(7, flatbuffers.number_types.UOffsetTFlags.py_type(zoneMaps), 0)
+
+def AddZoneMaps(builder, zoneMaps):
+    MetadataAddZoneMaps(builder, zoneMaps)
+
+def MetadataStartZoneMapsVector(builder, numElems):
+    return builder.StartVector(4, numElems, 4)
+
+def StartZoneMapsVector(builder, numElems):
+    return MetadataStartZoneMapsVector(builder, numElems)
+
 def MetadataEnd(builder):
     return builder.EndObject()
 
@@ -0,0 +1,156 @@
+"""
+    asyncio client of the shared-memory dataframes.
+
+    Consumers no longer need to poll the catalog to learn that a dataframe was added, replaced,
+    mapped or removed: AsyncFbSharedMemory watches the catalog generation, which every change
+    bumps, and sleeps on a CatalogWatcher socket (see fb_notify) registered with the event loop
+    until a writer wakes it up. The generation is still re-read every RECHECK_INTERVAL seconds, in
+    case a notification was lost.
+"""
+import asyncio
+import time
+
+from collections import namedtuple
+from typing import AsyncIterator, Dict, Optional
+
+from fb_catalog import CatalogEntry
+from fb_notify import CatalogWatcher
+from fb_shared_memory import CHUNK_SEPARATOR, INDEX_SEPARATOR, FbSharedMemory
+
+
+# Seconds between checks of the generation while no notification arrives.
+RECHECK_INTERVAL = 1.0
+
+# Kinds of catalog change events.
+ADDED, UPDATED, REMOVED = 'added', 'updated', 'removed'
+
+# A change to a dataframe: its kind, name, new entry (None once removed) and the catalog
+# generation it was seen at.
+CatalogEvent = namedtuple('CatalogEvent', ['kind', 'name', 'entry', 'generation'])
+
+
+class AsyncFbSharedMemory:
+    """
+        Waits for changes to the dataframes of an FbSharedMemory without blocking the event loop.
+        Queries go through the wrapped FbSharedMemory, available as shm.
+    """
+    def __init__(self, name: str = "CS598", shm: Optional[FbSharedMemory] = None):
+        """
+            @param name: name of the shared memory, see FbSharedMemory.
+            @param shm: the FbSharedMemory to wrap; attached to name if None.
+        """
+        self.shm = FbSharedMemory(name) if shm is None else shm
+        self.catalog = self.shm.catalog
+        # Registered before the generation is first read, so no change goes unnoticed.
+        self.watcher = CatalogWatcher(self.catalog.name)
+        self._waiters = []
+        self._loop = None
+
+    @property
+    def generation(self) -> int:
+        return self.catalog.generation
+
+    def _on_notify(self) -> None:
+        self.watcher.drain()
+        waiters, self._waiters = self._waiters, []
+        for waiter in waiters:
+            if not waiter.done():
+                waiter.set_result(None)
+
+    async def wait_for_change(self, generation: Optional[int] = None, timeout: Optional[float] = None) -> int:
+        """
+            Waits until the catalog generation differs from generation and returns the new one.
+            Raises asyncio.TimeoutError if it doesn't change within timeout seconds.
+
+            @param generation: the generation last seen; the current one if None.
+            @param timeout: seconds to wait at most; forever if None.
+        """
+        generation = self.generation if generation is None else generation
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            if self._loop is not None and not self._loop.is_closed():
+                self._loop.remove_reader(self.watcher.fileno())
+            loop.add_reader(self.watcher.fileno(), self._on_notify)
+            self._loop = loop
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            waiter = loop.create_future()
+            self._waiters.append(waiter)
+            current = self.generation
+            if current != generation:
+                return current
+            wait = RECHECK_INTERVAL if deadline is None else min(RECHECK_INTERVAL, deadline - time.monotonic())
+            if wait <= 0:
+                raise asyncio.TimeoutError(f"Catalog {self.catalog.name} did not change")
+            try:
+                await asyncio.wait_for(waiter, wait)
+            except asyncio.TimeoutError:
+                if waiter in self._waiters:
+                    self._waiters.remove(waiter)
+
+    async def wait_for(self, name: str, newer_than: Optional[int] = None, timeout: Optional[float] = None) -> CatalogEntry:
+        """
+            Waits until a dataframe exists and returns its catalog entry. Raises
+            asyncio.TimeoutError if it doesn't appear within timeout seconds.
+
+            @param name: name of the dataframe.
+            @param newer_than: if given, wait for a version greater than this one, e.g. the version
+                of the entry returned by a previous call, to wait for the next change.
+            @param timeout: seconds to wait at most; forever if None.
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            generation = self.generation
+            entry = self.catalog.lookup(name)
+            if entry is not None and (newer_than is None or entry.version > newer_than):
+                return entry
+            try:
+                await self.wait_for_change(generation, None if deadline is None else deadline - time.monotonic())
+            except asyncio.TimeoutError:
+                raise asyncio.TimeoutError(f"Dataframe {name} did not appear") from None
+
+    def _dataframes(self) -> Dict[str, CatalogEntry]:
+        return {name: entry for name, entry in self.catalog.entries().items()
+                if INDEX_SEPARATOR not in name and CHUNK_SEPARATOR not in name}
+
+    async def changes(self, include_existing: bool = False) -> AsyncIterator[CatalogEvent]:
+        """
+            Yields a CatalogEvent for every dataframe added, updated (replaced, appended to, mapped
+            or moved by compact()) or removed from now on. Changes made in quick succession may be
+            seen together: a dataframe replaced twice yields one update.
+
+            @param include_existing: first yield an ADDED event for every dataframe already there.
+        """
+        generation = self.generation
+        known = self._dataframes()
+        if include_existing:
+            for name, entry in sorted(known.items()):
+                yield CatalogEvent(ADDED, name, entry, generation)
+        while True:
+            generation = await self.wait_for_change(generation)
+            current = self._dataframes()
+            for name in sorted(known.keys() | current.keys()):
+                entry = current.get(name)
+                if name not in current:
+                    yield CatalogEvent(REMOVED, name, None, generation)
+                elif name not in known:
+                    yield CatalogEvent(ADDED, name, entry, generation)
+                elif entry.version != known[name].version:
+                    yield CatalogEvent(UPDATED, name, entry, generation)
+            known = current
+
+    def close(self) -> None:
+        """
+            Stops watching the catalog and closes the wrapped FbSharedMemory.
+        """
+        if self._loop is not None and not self._loop.is_closed():
+            self._loop.remove_reader(self.watcher.fileno())
+        self._loop = None
+        self.watcher.close()
+        self.shm.close()
+
+    async def __aenter__(self) -> 'AsyncFbSharedMemory':
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        self.close()
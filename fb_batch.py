@@ -0,0 +1,145 @@
+"""
+    Batched queries over one Flatbuffer Dataframe.
+
+    A dashboard firing several queries at the same dataframe would resolve and read the same
+    columns once per query. fb_dataframe_batch plans them together instead: the columns referenced
+    by any query are resolved once, each distinct set of filters is evaluated once, and every
+    column is read once per row batch and set of rows (see fb_dataframe._scanned). Group-bys over
+    the same grouping column and filters are fused into one pass computing all their aggregates.
+
+    Queries are tuples, named after the fb_dataframe functions they stand for:
+
+        ('head', rows[, filters])                      -> Pandas Dataframe
+        ('filter', filters)                            -> selection vector
+        ('group_by', grouping_col_name, aggs[, filters]) -> Pandas Dataframe
+        ('column_stats', col_name)                     -> dict
+
+    Filters are in the disjunctive normal form of fb_filter; head and group_by only consider the
+    rows matching them.
+"""
+import numpy as np
+
+from typing import Dict, List, Optional
+
+from fb_dataframe import _batch_selection, _find_columns, _partial_group_by, _root, _row_groups
+from fb_dataframe import fb_dataframe_column_stats, fb_dataframe_head, fb_dataframe_merge_group_by
+from fb_filter import normalize_filters
+from fb_groupby import merge_partials, normalize_aggs
+from fb_metrics import instrumented, phase
+
+
+# Query kind -> (required, optional) arguments after the kind.
+QUERY_KINDS = {
+    'head': (1, 1),
+    'filter': (1, 0),
+    'group_by': (2, 1),
+    'column_stats': (1, 0),
+}
+
+
+def _filters_key(filters: Optional[list]) -> Optional[str]:
+    return None if filters is None else repr(filters)
+
+
+def _plan(queries: List[tuple]) -> List[dict]:
+    """
+        Validates queries and returns them as dicts with their kind, normalized filters and
+        arguments.
+    """
+    plans = []
+    for query in queries:
+        if not isinstance(query, tuple) or not query or query[0] not in QUERY_KINDS:
+            raise ValueError(f"Queries are tuples starting with one of {', '.join(QUERY_KINDS)}, got {query!r}")
+        kind, args = query[0], query[1:]
+        required, optional = QUERY_KINDS[kind]
+        if not required <= len(args) <= required + optional:
+            raise ValueError(f"Wrong number of arguments for {kind}: {query!r}")
+
+        plan = {'kind': kind, 'filters': None}
+        if kind == 'head':
+            plan['rows'] = args[0]
+        elif kind == 'group_by':
+            plan['grouping_col_name'] = args[0]
+            plan['aggs'] = args[1]
+            normalize_aggs(args[1])
+        elif kind == 'column_stats':
+            plan['col_name'] = args[0]
+        if kind == 'filter' or len(args) > required:
+            plan['filters'] = normalize_filters(args[-1])
+        plan['filters_key'] = _filters_key(plan['filters'])
+        plans.append(plan)
+    return plans
+
+
+@instrumented('batch')
+def fb_dataframe_batch(fb_buf: memoryview, queries: List[tuple]) -> list:
+    """
+        Runs several queries over a Flatbuffer Dataframe in one shared scan, and returns their
+        results in order. Each column is resolved and read once, each distinct set of filters is
+        evaluated once, and group-bys sharing their grouping column and filters compute all their
+        aggregates in a single pass.
+
+        @param fb_buf: buffer holding the Flatbuffer Dataframe, or list of buffers holding its chunks.
+        @param queries: the queries, e.g. [('filter', [('a', '>', 1)]), ('head', 10, [('a', '>', 1)]),
+            ('group_by', 'b', {'c': 'sum'}), ('group_by', 'b', {'d': ['min', 'max']})]; see fb_batch.
+    """
+    plans = _plan(queries)
+    df = _root(fb_buf)
+
+    filters = {plan['filters_key']: plan['filters'] for plan in plans if plan['filters'] is not None}
+    # Group-bys by (grouping column, filters), with the union of their aggregates.
+    groups: Dict[tuple, Dict[str, List[str]]] = {}
+    for plan in plans:
+        if plan['kind'] == 'group_by':
+            aggs = groups.setdefault((plan['grouping_col_name'], plan['filters_key']), {})
+            for col_name, funcs in normalize_aggs(plan['aggs']).items():
+                aggs[col_name] = list(dict.fromkeys(aggs.get(col_name, []) + funcs))
+
+    col_names = [col_name for conjunctions in filters.values() for conjunction in conjunctions
+                 for col_name, _, _ in conjunction]
+    for (grouping_col_name, _), aggs in groups.items():
+        col_names.append(grouping_col_name)
+        col_names.extend(aggs)
+    col_names = list(dict.fromkeys(col_names))
+
+    selections = {key: [] for key in filters}
+    partials = {group: [] for group in groups}
+    offset = 0
+    if col_names:
+        for batch, columns in zip(_row_groups(df), _find_columns(df, col_names)):
+            rows = batch.NumRows()
+            scan = {}
+            local = {None: slice(0, rows)}
+            with phase('filter'):
+                for key, conjunctions in filters.items():
+                    local[key] = _batch_selection(columns, conjunctions, rows, scan)
+                    selections[key].append(local[key] + offset)
+            with phase('group_by'):
+                for (grouping_col_name, key), aggs in groups.items():
+                    if isinstance(local[key], slice) or len(local[key]):
+                        partials[(grouping_col_name, key)].append(
+                            _partial_group_by(columns, grouping_col_name, aggs, local[key], scan))
+            offset += rows
+
+    selections = {key: np.concatenate(parts).astype(np.int64) for key, parts in selections.items()}
+    merged = {}
+    for (grouping_col_name, key), aggs in groups.items():
+        group_partials = partials[(grouping_col_name, key)]
+        if not group_partials:
+            columns = _find_columns(df, [grouping_col_name] + list(aggs))[0]
+            group_partials.append(_partial_group_by(columns, grouping_col_name, aggs, slice(0, 0)))
+        merged[(grouping_col_name, key)] = merge_partials(group_partials, aggs)
+
+    results = []
+    for plan in plans:
+        kind, key = plan['kind'], plan['filters_key']
+        if kind == 'filter':
+            results.append(selections[key].copy())
+        elif kind == 'head':
+            results.append(fb_dataframe_head(fb_buf, plan['rows'], None if key is None else selections[key]))
+        elif kind == 'group_by':
+            partial = merged[(plan['grouping_col_name'], key)]
+            results.append(fb_dataframe_merge_group_by(fb_buf, [partial], plan['grouping_col_name'], plan['aggs']))
+        else:
+            results.append(fb_dataframe_column_stats(fb_buf, plan['col_name']))
+    return results
@@ -0,0 +1,343 @@
+"""
+    Benchmarks for the flatbuffer dataframe.
+
+    `python fb_benchmark.py run [--rows ...] [--columns ...] [--dtypes ...] [--output FILE]` times
+    to_flatbuffer, head, group-by, map and shared memory add/attach over a grid of dataframes built
+    by generate_random_df, next to the same operations on Pandas Dataframes serialized with dill
+    and pickle. Every benchmark reports the median and 95th percentile of its timed runs, its
+    throughput in rows per second and its peak traced memory, as JSON.
+
+    `python fb_benchmark.py compare BASELINE CURRENT [--threshold 0.1]` matches the benchmarks of
+    two runs and flags those whose median time or peak memory grew by more than the threshold;
+    it exits with status 1 if any did.
+
+    `python fb_benchmark.py encoding [--rows N]` compares the bulk numeric column encoder used by
+    to_flatbuffer with the original per-element Prepend loop.
+"""
+import argparse
+import gc
+import json
+import pickle
+import platform
+import random
+import sys
+import time
+import tracemalloc
+
+import dill
+import flatbuffers
+import numpy as np
+import pandas as pd
+
+from typing import Callable, Iterable, List, Optional
+
+from CS598 import Column
+from fb_dataframe import (_create_numeric_vector, to_flatbuffer, fb_dataframe_group_by, fb_dataframe_head,
+                          fb_dataframe_map_numeric_column)
+from fb_shared_memory import FbSharedMemory
+from test_fb_dataframe import generate_random_df
+
+
+# Default grid of the suite: rows, additional columns and dtype of the additional columns.
+DEFAULT_ROWS = (1000, 10000, 100000)
+DEFAULT_COLUMNS = (10, 100)
+DTYPES = ('int64', 'int32', 'float64')
+
+# Implementations the flatbuffer dataframe is compared with.
+BASELINES = {'dill': dill, 'pickle': pickle}
+
+# Peak memory growth below this many bytes is noise rather than a regression.
+MEMORY_NOISE_BYTES = 1 << 16
+
+# Fields identifying a benchmark across runs.
+KEY_FIELDS = ('benchmark', 'impl', 'rows', 'columns', 'dtype')
+
+
+def _prepend_numeric_vector(builder: flatbuffers.Builder, values: np.ndarray, dtype: str) -> int:
+    """
+        Reference encoder: prepends the values one by one, as to_flatbuffer used to.
+
+        @param builder: the flatbuffer builder.
+        @param values: the column values.
+        @param dtype: little-endian NumPy dtype of the vector elements, e.g. '<i8'.
+    """
+    value_list = values.tolist()
+    if dtype == '<i8':
+        Column.StartIntValuesVector(builder, len(value_list))
+        for value in reversed(value_list):
+            builder.PrependInt64(value)
+    else:
+        Column.StartFloatValuesVector(builder, len(value_list))
+        for value in reversed(value_list):
+            builder.PrependFloat64(value)
+    return builder.EndVector()
+
+
+def _encode_vector(encoder, values: np.ndarray, dtype: str) -> bytes:
+    builder = flatbuffers.Builder(1024)
+    vector = encoder(builder, values, dtype)
+    builder.Finish(vector)
+    return bytes(builder.Output())
+
+
+def bench_numeric_encoding(num_rows: int = 1000000, repeat: int = 3) -> dict:
+    """
+        Times encoding an int64 and a float64 column with the per-element and the bulk encoder.
+        Returns the best time in seconds of each encoder per dtype, and the resulting speedups.
+
+        @param num_rows: number of values in each column.
+        @param repeat: number of timed runs per encoder; the best run is reported.
+    """
+    rng = np.random.default_rng(0)
+    columns = {
+        'int64': (rng.integers(0, 1000, num_rows, dtype=np.int64), '<i8'),
+        'float64': (rng.uniform(0, 10000, num_rows), '<f8'),
+    }
+
+    results = {}
+    for name, (values, dtype) in columns.items():
+        # Both encoders must produce the same bytes for the speedup to mean anything.
+        assert _encode_vector(_prepend_numeric_vector, values, dtype) == _encode_vector(_create_numeric_vector, values, dtype)
+
+        timings = {}
+        for label, encoder in (('per_element', _prepend_numeric_vector), ('bulk', _create_numeric_vector)):
+            best = float('inf')
+            for _ in range(repeat):
+                start = time.perf_counter()
+                _encode_vector(encoder, values, dtype)
+                best = min(best, time.perf_counter() - start)
+            timings[label] = best
+        timings['speedup'] = timings['per_element'] / timings['bulk']
+        results[name] = timings
+    return results
+
+
+def generate_benchmark_df(num_rows: int, additional_cols: int, dtype: str = 'int64', seed: int = 0) -> pd.DataFrame:
+    """
+        Generates a dataframe with generate_random_df, reproducibly, and converts its additional
+        columns to dtype.
+
+        @param num_rows: number of rows.
+        @param additional_cols: number of additional columns.
+        @param dtype: one of DTYPES.
+        @param seed: seed of the random values.
+    """
+    if dtype not in DTYPES:
+        raise ValueError(f"Unsupported dtype: {dtype}")
+    random.seed(seed)
+    df = generate_random_df(num_rows, additional_cols)
+    additional = [f"additional_col_{i}" for i in range(additional_cols)]
+    return df.astype({col_name: dtype for col_name in additional})
+
+
+def _measure(run: Callable, setup: Optional[Callable] = None, teardown: Optional[Callable] = None,
+             repeat: int = 5, warmup: int = 1) -> dict:
+    """
+        Times run(state) over repeat runs after warmup untimed ones, with state = setup() built
+        before every run and teardown(state) called after it, neither of them timed. The peak
+        memory traced while running is measured in one more run, as tracing slows it down.
+    """
+    timings = []
+    for i in range(warmup + repeat + 1):
+        state = setup() if setup is not None else None
+        gc.collect()
+        if i < warmup + repeat:
+            start = time.perf_counter()
+            run(state)
+            elapsed = time.perf_counter() - start
+            if i >= warmup:
+                timings.append(elapsed)
+        else:
+            tracemalloc.start()
+            try:
+                run(state)
+                peak = tracemalloc.get_traced_memory()[1]
+            finally:
+                tracemalloc.stop()
+        if teardown is not None:
+            teardown(state)
+    return {
+        'median_s': float(np.median(timings)),
+        'p95_s': float(np.percentile(timings, 95)),
+        'peak_bytes': int(peak),
+    }
+
+
+def _cases(df: pd.DataFrame, shm: FbSharedMemory, shm_name: str) -> Iterable[tuple]:
+    """
+        Yields the (benchmark, impl, run, setup, teardown) cases of one dataframe; see _measure.
+    """
+    map_col_name = 'additional_col_0' if 'additional_col_0' in df else 'int_col'
+    aggs = {'float_col': 'sum'}
+    fb_df = to_flatbuffer(df)
+
+    yield 'to_flatbuffer', 'flatbuffer', lambda _: to_flatbuffer(df), None, None
+    yield 'head', 'flatbuffer', lambda _: fb_dataframe_head(fb_df), None, None
+    yield 'group_by', 'flatbuffer', lambda _: fb_dataframe_group_by(fb_df, 'int_col', aggs), None, None
+    yield ('map', 'flatbuffer', lambda buf: fb_dataframe_map_numeric_column(buf, map_col_name, lambda x: x + 1),
+           lambda: bytearray(fb_df), None)
+
+    for impl, module in BASELINES.items():
+        serialized = module.dumps(df)
+
+        def remap(serialized=serialized, module=module):
+            loaded = module.loads(serialized)
+            loaded[map_col_name] = loaded[map_col_name] + 1
+            return module.dumps(loaded)
+
+        yield 'to_flatbuffer', impl, lambda _, module=module: module.dumps(df), None, None
+        yield 'head', impl, lambda _, serialized=serialized, module=module: module.loads(serialized).head(), None, None
+        yield ('group_by', impl, lambda _, serialized=serialized, module=module:
+               module.loads(serialized).groupby('int_col').agg(aggs), None, None)
+        yield 'map', impl, lambda _, remap=remap: remap(), None, None
+
+    def remove(_):
+        shm.remove_dataframe(shm_name)
+        shm.reclaim()
+
+    def attach(_):
+        attached = FbSharedMemory(shm.name)
+        attached.dataframe_head(shm_name)
+        attached.close()
+
+    yield 'shm_add', 'flatbuffer', lambda _: shm.add_dataframe(shm_name, df), None, remove
+    yield 'shm_attach', 'flatbuffer', attach, lambda: shm.add_dataframe(shm_name, df), remove
+
+
+def run_suite(rows: Iterable[int] = DEFAULT_ROWS, columns: Iterable[int] = DEFAULT_COLUMNS,
+              dtypes: Iterable[str] = ('int64', 'float64'), repeat: int = 5, warmup: int = 1,
+              shm_name: str = 'CS598_bench', seed: int = 0, log: Optional[Callable[[str], None]] = None) -> dict:
+    """
+        Runs every benchmark over the grid of dataframes and returns the report: 'meta' describes
+        the run and 'results' holds one entry per benchmark, implementation and dataframe, with
+        the KEY_FIELDS, median_s, p95_s, rows_per_s and peak_bytes.
+
+        @param rows: row counts of the dataframes.
+        @param columns: numbers of additional columns of the dataframes.
+        @param dtypes: dtypes of the additional columns; see DTYPES.
+        @param repeat: number of timed runs per benchmark.
+        @param warmup: number of untimed runs before them.
+        @param shm_name: name of the shared memory the shared memory benchmarks create and destroy.
+        @param seed: seed of the random dataframes.
+        @param log: called with a line of progress after every benchmark, if given.
+    """
+    if repeat <= 0:
+        raise ValueError("repeat must be positive")
+    results = []
+    shm = FbSharedMemory(shm_name)
+    try:
+        for dtype in dtypes:
+            for num_cols in columns:
+                for num_rows in rows:
+                    df = generate_benchmark_df(num_rows, num_cols, dtype, seed)
+                    for benchmark, impl, run, setup, teardown in _cases(df, shm, f"bench_{num_rows}_{num_cols}_{dtype}"):
+                        result = {'benchmark': benchmark, 'impl': impl, 'rows': num_rows, 'columns': num_cols, 'dtype': dtype}
+                        result.update(_measure(run, setup, teardown, repeat, warmup))
+                        result['rows_per_s'] = num_rows / result['median_s'] if result['median_s'] > 0 else float('inf')
+                        results.append(result)
+                        if log is not None:
+                            log(format_result(result))
+    finally:
+        shm.unlink()
+        shm.close()
+
+    meta = {
+        'time': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'numpy': np.__version__,
+        'pandas': pd.__version__,
+        'flatbuffers': getattr(flatbuffers, '__version__', None),
+        'repeat': repeat,
+        'warmup': warmup,
+        'seed': seed,
+    }
+    return {'meta': meta, 'results': results}
+
+
+def format_result(result: dict) -> str:
+    return (f"{result['benchmark']:<14}{result['impl']:<11}rows={result['rows']:<8}columns={result['columns']:<5}"
+            f"{result['dtype']:<8}median {result['median_s'] * 1000:9.3f}ms  p95 {result['p95_s'] * 1000:9.3f}ms  "
+            f"{result['rows_per_s']:12.0f} rows/s  peak {result['peak_bytes'] / 2 ** 20:8.2f}MiB")
+
+
+def compare_reports(baseline: dict, current: dict, threshold: float = 0.1) -> List[dict]:
+    """
+        Matches the results of two reports of run_suite by KEY_FIELDS and returns one entry per
+        benchmark present in both: its KEY_FIELDS, the relative change of its median time and of
+        its peak memory, and 'regression', True if either grew by more than threshold (and, for
+        memory, by more than MEMORY_NOISE_BYTES).
+
+        @param baseline: the earlier report.
+        @param current: the later report.
+        @param threshold: tolerated relative growth, e.g. 0.1 for 10%.
+    """
+    def key(result):
+        return tuple(result[field] for field in KEY_FIELDS)
+
+    def change(before, after):
+        return after / before - 1 if before > 0 else (0.0 if after == before else float('inf'))
+
+    baseline_results = {key(result): result for result in baseline['results']}
+    comparison = []
+    for result in current['results']:
+        before = baseline_results.get(key(result))
+        if before is None:
+            continue
+        entry = {field: result[field] for field in KEY_FIELDS}
+        entry['time_change'] = change(before['median_s'], result['median_s'])
+        entry['memory_change'] = change(before['peak_bytes'], result['peak_bytes'])
+        memory_growth = result['peak_bytes'] - before['peak_bytes']
+        entry['regression'] = (entry['time_change'] > threshold
+                               or (entry['memory_change'] > threshold and memory_growth > MEMORY_NOISE_BYTES))
+        comparison.append(entry)
+    return comparison
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    run_parser = commands.add_parser('run', help='run the benchmark suite')
+    run_parser.add_argument('--rows', type=int, nargs='+', default=list(DEFAULT_ROWS), help='row counts')
+    run_parser.add_argument('--columns', type=int, nargs='+', default=list(DEFAULT_COLUMNS), help='additional column counts')
+    run_parser.add_argument('--dtypes', nargs='+', choices=DTYPES, default=['int64', 'float64'], help='additional column dtypes')
+    run_parser.add_argument('--repeat', type=int, default=5, help='timed runs per benchmark')
+    run_parser.add_argument('--warmup', type=int, default=1, help='untimed runs per benchmark')
+    run_parser.add_argument('--seed', type=int, default=0, help='seed of the random dataframes')
+    run_parser.add_argument('--output', help='file to write the JSON report to; stdout if omitted')
+
+    compare_parser = commands.add_parser('compare', help='flag regressions between two reports')
+    compare_parser.add_argument('baseline', help='JSON report of the earlier run')
+    compare_parser.add_argument('current', help='JSON report of the later run')
+    compare_parser.add_argument('--threshold', type=float, default=0.1, help='tolerated relative growth')
+
+    encoding_parser = commands.add_parser('encoding', help='compare the bulk and per-element numeric encoders')
+    encoding_parser.add_argument('--rows', type=int, default=1000000, help='number of values per column')
+    encoding_parser.add_argument('--repeat', type=int, default=3, help='timed runs per encoder')
+    args = parser.parse_args()
+
+    if args.command == 'run':
+        report = run_suite(args.rows, args.columns, args.dtypes, args.repeat, args.warmup, seed=args.seed,
+                           log=lambda line: print(line, file=sys.stderr))
+        if args.output is None:
+            json.dump(report, sys.stdout, indent=2)
+        else:
+            with open(args.output, 'w') as output:
+                json.dump(report, output, indent=2)
+    elif args.command == 'compare':
+        with open(args.baseline) as baseline, open(args.current) as current:
+            comparison = compare_reports(json.load(baseline), json.load(current), args.threshold)
+        for entry in comparison:
+            print(f"{'REGRESSION' if entry['regression'] else 'ok':<12}{entry['benchmark']:<14}{entry['impl']:<11}"
+                  f"rows={entry['rows']:<8}columns={entry['columns']:<5}{entry['dtype']:<8}"
+                  f"time {entry['time_change']:+8.1%}  memory {entry['memory_change']:+8.1%}")
+        sys.exit(1 if any(entry['regression'] for entry in comparison) else 0)
+    else:
+        for name, timings in bench_numeric_encoding(args.rows, args.repeat).items():
+            print(f"{name}: per-element {timings['per_element']:.4f}s, bulk {timings['bulk']:.4f}s, "
+                  f"speedup {timings['speedup']:.1f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,454 @@
+"""
+    Binary catalog of the dataframes held by FbSharedMemory.
+
+    The catalog is split over two segments. The root segment (<name>_offsets, 4 KB) holds a header
+    with the catalog generation, the id of the current table segment and the sizes of the data
+    segments. The table segment (<name>_catalog_<id>) holds an open-addressing hash table of
+    fixed-size entries keyed by dataframe name, followed by the free and retired extent arrays of
+    the allocator. Lookups hash the name and probe a few slots in place, so attaching processes
+    never parse the whole catalog. When the table fills up it is rehashed into a new table segment
+    twice its size and the root is switched over to it.
+
+    Concurrency: writers serialize only their catalog updates, with a byte-range fcntl lock on the
+    root segment (plus a threading.Lock, as fcntl locks are per process). The allocator and the
+    hash table have separate locks, always taken in that order, and both are held for a few
+    struct writes only; encoding and copying dataframes happens outside of them. CPython has no
+    compare-and-swap on shared memory, so the short locks stand in for the atomic reservation.
+    Readers never lock: every entry carries a sequence number that writers make odd while they
+    update it (a seqlock), and readers retry until they read the same even number before and
+    after the entry, and the same table id before and after the lookup.
+
+    Every change bumps the generation and then wakes the processes watching the catalog (see
+    fb_notify), so they learn about it without polling.
+"""
+import fcntl
+import hashlib
+import struct
+import threading
+import time
+
+from collections import defaultdict, namedtuple
+from contextlib import contextmanager
+from typing import Callable, Dict, List, Optional, Tuple
+
+from fb_notify import notify
+
+
+MAGIC = b'FBCATLG1'
+ROOT_SIZE = 4096
+
+# Longest dataframe name, in UTF-8 bytes, an entry can hold.
+MAX_NAME_LENGTH = 64
+
+# The table is rehashed into one twice as large when more than this fraction of its slots is used.
+MAX_LOAD = 0.7
+
+INITIAL_CAPACITY = 64
+
+# Root header: magic, generation, table id, number of data segments; followed by the segment sizes.
+_ROOT = struct.Struct('<8sQII')
+_GENERATION = struct.Struct('<Q')
+_GENERATION_OFFSET = 8
+_COUNT = struct.Struct('<I')
+_TABLE_ID_OFFSET = 16
+_NUM_SEGMENTS_OFFSET = 20
+_SEGMENT_SIZE = struct.Struct('<Q')
+MAX_SEGMENTS = (ROOT_SIZE - _ROOT.size) // _SEGMENT_SIZE.size
+
+# Table header: slot capacity, live entries, used slots (live + removed), extent capacity, number
+# of free extents, number of retired extents.
+_TABLE = struct.Struct('<IIIIII')
+_TABLE_HEADER_SIZE = 64
+
+# Entry: state, name length, segment, name hash, offset, length, version, rows, columns, bitmask of
+# the column DataTypes, name; followed by the sequence number of the entry.
+_SLOT = struct.Struct('<BBxxIQQQQQII64s')
+_SEQ = struct.Struct('<Q')
+_SLOT_SIZE = _SLOT.size + _SEQ.size
+
+# Extent: segment, start, end.
+_EXTENT = struct.Struct('<I4xQQ')
+
+_EMPTY, _LIVE, _REMOVED = 0, 1, 2
+
+# Locks, as byte offsets locked past the end of the root segment.
+ALLOCATOR_LOCK, CATALOG_LOCK = 0, 1
+
+# In-process halves of the locks, by catalog name and lock.
+_MUTEXES = defaultdict(threading.Lock)
+
+# Seconds to wait for another process to finish creating a catalog.
+_CREATE_TIMEOUT = 5.0
+
+class VersionConflict(ValueError):
+    """
+        Raised by FbCatalog.put when the entry changed since the version the caller expected.
+    """
+
+
+CatalogEntry = namedtuple('CatalogEntry', ['segment', 'offset', 'length', 'version', 'num_rows', 'num_columns', 'dtypes'])
+
+
+def _hash_name(name: bytes) -> int:
+    # Python's hash() is salted per process, so use a stable one.
+    return int.from_bytes(hashlib.blake2b(name, digest_size=8).digest(), 'little')
+
+
+class FbCatalog:
+    """
+        Fixed-layout catalog mapping dataframe names to their location in the data segments, with
+        O(1) lookup, insert and removal.
+    """
+    def __init__(self, name: str, open_segment: Callable):
+        """
+            @param name: base name of the catalog segments.
+            @param open_segment: open_segment(name, size=None) attaches to the segment called name,
+                raising FileNotFoundError if there is none, or creates it with size bytes.
+        """
+        self.name = name
+        self.open_segment = open_segment
+        self.table = None
+        self.table_id = None
+        self.root = None
+        deadline = time.monotonic() + _CREATE_TIMEOUT
+        while self.root is None:
+            try:
+                self.root = open_segment(f"{name}_offsets")
+            except FileNotFoundError:
+                try:
+                    self.root = open_segment(f"{name}_offsets", ROOT_SIZE)
+                except FileExistsError:
+                    continue
+                self.table, self.table_id = self._create_table(0, INITIAL_CAPACITY, INITIAL_CAPACITY), 0
+                _ROOT.pack_into(self.root.buf, 0, MAGIC, 0, 0, 0)
+            except ValueError:
+                # Another process created the segment but has not sized it yet.
+                if time.monotonic() > deadline:
+                    raise
+                time.sleep(0.001)
+
+        # The magic number is written last by the creating process.
+        while _ROOT.unpack_from(self.root.buf, 0)[0] != MAGIC:
+            if time.monotonic() > deadline:
+                raise ValueError(f"{name}_offsets is not a dataframe catalog")
+            time.sleep(0.001)
+
+    @contextmanager
+    def locked(self, lock: int):
+        """
+            Holds one of the catalog locks (ALLOCATOR_LOCK or CATALOG_LOCK) across processes and
+            threads. ALLOCATOR_LOCK guards the free and retired extents and the segment list,
+            CATALOG_LOCK guards the entries; take them in that order when both are needed.
+
+            @param lock: the lock to hold.
+        """
+        with _MUTEXES[(self.name, lock)]:
+            # SharedMemory keeps the descriptor of the segment in _fd.
+            fcntl.lockf(self.root._fd, fcntl.LOCK_EX, 1, ROOT_SIZE + lock)
+            try:
+                yield
+            finally:
+                fcntl.lockf(self.root._fd, fcntl.LOCK_UN, 1, ROOT_SIZE + lock)
+
+    def _create_table(self, table_id: int, capacity: int, extent_capacity: int):
+        size = _TABLE_HEADER_SIZE + capacity * _SLOT_SIZE + 2 * extent_capacity * _EXTENT.size
+        table = self.open_segment(f"{self.name}_catalog_{table_id}", size)
+        _TABLE.pack_into(table.buf, 0, capacity, 0, 0, extent_capacity, 0, 0)
+        return table
+
+    def _table(self):
+        """
+            Returns the current table segment, attaching to it if another process switched the
+            catalog to a new table.
+        """
+        table_id = _COUNT.unpack_from(self.root.buf, _TABLE_ID_OFFSET)[0]
+        while table_id != self.table_id:
+            try:
+                table = self.open_segment(f"{self.name}_catalog_{table_id}")
+            except FileNotFoundError:
+                # The table was replaced again while we were switching to it.
+                table_id = _COUNT.unpack_from(self.root.buf, _TABLE_ID_OFFSET)[0]
+                continue
+            if self.table is not None:
+                self.table.close()
+            self.table, self.table_id = table, table_id
+        return self.table
+
+    @property
+    def generation(self) -> int:
+        """
+            Counter bumped every time an entry is published, touched or removed.
+        """
+        return _GENERATION.unpack_from(self.root.buf, _GENERATION_OFFSET)[0]
+
+    def _bump_generation(self) -> int:
+        generation = self.generation + 1
+        _GENERATION.pack_into(self.root.buf, _GENERATION_OFFSET, generation)
+        return generation
+
+    def _read_slot(self, buf, slot: int) -> tuple:
+        """
+            Reads the fields of an entry, retrying while a writer updates it.
+        """
+        offset = _TABLE_HEADER_SIZE + slot * _SLOT_SIZE
+        while True:
+            seq = _SEQ.unpack_from(buf, offset + _SLOT.size)[0]
+            if seq % 2 == 0:
+                fields = _SLOT.unpack_from(buf, offset)
+                if _SEQ.unpack_from(buf, offset + _SLOT.size)[0] == seq:
+                    return fields
+            time.sleep(0)
+
+    def _write_slot(self, buf, slot: int, *fields) -> None:
+        """
+            Writes the fields of an entry, making its sequence number odd meanwhile. Callers hold
+            CATALOG_LOCK.
+        """
+        offset = _TABLE_HEADER_SIZE + slot * _SLOT_SIZE
+        seq = _SEQ.unpack_from(buf, offset + _SLOT.size)[0]
+        _SEQ.pack_into(buf, offset + _SLOT.size, seq + 1)
+        _SLOT.pack_into(buf, offset, *fields)
+        _SEQ.pack_into(buf, offset + _SLOT.size, seq + 2)
+
+    def _probe(self, buf, name: bytes, name_hash: int) -> Tuple[int, bool]:
+        """
+            Returns the slot holding name and True, or the slot to insert it into and False.
+        """
+        capacity = _TABLE.unpack_from(buf, 0)[0]
+        slot = name_hash & (capacity - 1)
+        insert_at = None
+        while True:
+            state, name_length, _, slot_hash, *_, slot_name = self._read_slot(buf, slot)
+            if state == _EMPTY:
+                return (slot if insert_at is None else insert_at), False
+            elif state == _REMOVED:
+                insert_at = slot if insert_at is None else insert_at
+            elif slot_hash == name_hash and slot_name[:name_length] == name:
+                return slot, True
+            slot = (slot + 1) & (capacity - 1)
+
+    def _read_entry(self, buf, slot: int) -> Tuple[bool, CatalogEntry]:
+        """
+            Returns whether a slot holds an entry, and the entry.
+        """
+        fields = self._read_slot(buf, slot)
+        return fields[0] == _LIVE, CatalogEntry(*fields[2:3], *fields[4:10])
+
+    def lookup(self, name: str) -> Optional[CatalogEntry]:
+        """
+            Returns the entry of a dataframe, or None if there is none.
+
+            @param name: name of the dataframe.
+        """
+        name = name.encode('utf-8')
+        name_hash = _hash_name(name)
+        while True:
+            table = self._table()
+            slot, found = self._probe(table.buf, name, name_hash)
+            if found:
+                # The entry may have been removed or replaced since the probe matched it.
+                found, entry = self._read_entry(table.buf, slot)
+            if _COUNT.unpack_from(self.root.buf, _TABLE_ID_OFFSET)[0] == self.table_id:
+                return entry if found else None
+
+    def entries(self) -> Dict[str, CatalogEntry]:
+        """
+            Returns the entries of every dataframe, by name.
+        """
+        while True:
+            buf = self._table().buf
+            entries = {}
+            for slot in range(_TABLE.unpack_from(buf, 0)[0]):
+                state, name_length, segment, _, *fields, name = self._read_slot(buf, slot)
+                if state == _LIVE:
+                    entries[name[:name_length].decode('utf-8')] = CatalogEntry(segment, *fields)
+            if _COUNT.unpack_from(self.root.buf, _TABLE_ID_OFFSET)[0] == self.table_id:
+                return entries
+
+    def put(self, name: str, segment: int, offset: int, length: int, num_rows: int = 0,
+            num_columns: int = 0, dtypes: int = 0, expected_version: Optional[int] = None) -> Optional[CatalogEntry]:
+        """
+            Publishes the location of a dataframe under a new version. Returns the entry it
+            replaces, or None. The dataframe must be fully written before it is published.
+
+            @param name: name of the dataframe.
+            @param segment: index of the data segment holding it.
+            @param offset: start of the flatbuffer in the segment.
+            @param length: size of the flatbuffer in bytes.
+            @param num_rows: number of rows of the dataframe.
+            @param num_columns: number of columns of the dataframe.
+            @param dtypes: bitmask with bit t set if a column has DataType t.
+            @param expected_version: if given, only publish if the current entry has this version
+                (0 if there must be no entry); raises VersionConflict otherwise.
+        """
+        encoded = name.encode('utf-8')
+        if len(encoded) > MAX_NAME_LENGTH:
+            raise ValueError(f"Dataframe names are limited to {MAX_NAME_LENGTH} UTF-8 bytes")
+        name_hash = _hash_name(encoded)
+
+        with self.locked(CATALOG_LOCK):
+            buf = self._table().buf
+            capacity, count, used, extent_capacity, num_free, num_retired = _TABLE.unpack_from(buf, 0)
+            slot, found = self._probe(buf, encoded, name_hash)
+            previous = self._read_entry(buf, slot)[1] if found else None
+            if expected_version is not None and expected_version != (previous.version if found else 0):
+                raise VersionConflict(f"Dataframe {name} changed since version {expected_version}")
+
+            full = not found and used + 1 > MAX_LOAD * capacity
+            if not full:
+                if not found:
+                    reused = self._read_slot(buf, slot)[0] == _REMOVED
+                    _TABLE.pack_into(buf, 0, capacity, count + 1, used if reused else used + 1,
+                                     extent_capacity, num_free, num_retired)
+                version = self._bump_generation()
+                self._write_slot(buf, slot, _LIVE, len(encoded), segment, name_hash, offset, length, version,
+                                 num_rows, num_columns, dtypes, encoded)
+        if not full:
+            notify(self.name)
+            return previous
+
+        with self.locked(ALLOCATOR_LOCK), self.locked(CATALOG_LOCK):
+            capacity, _, used, extent_capacity, _, _ = _TABLE.unpack_from(self._table().buf, 0)
+            if used + 1 > MAX_LOAD * capacity:
+                self._grow(capacity * 2, extent_capacity)
+        return self.put(name, segment, offset, length, num_rows, num_columns, dtypes, expected_version)
+
+    def remove(self, name: str) -> Optional[CatalogEntry]:
+        """
+            Removes a dataframe from the catalog. Returns its entry, or None if there was none.
+
+            @param name: name of the dataframe.
+        """
+        encoded = name.encode('utf-8')
+        with self.locked(CATALOG_LOCK):
+            buf = self._table().buf
+            slot, found = self._probe(buf, encoded, _hash_name(encoded))
+            if not found:
+                return None
+            fields = self._read_slot(buf, slot)
+            self._write_slot(buf, slot, _REMOVED, *fields[1:])
+            capacity, count, *rest = _TABLE.unpack_from(buf, 0)
+            _TABLE.pack_into(buf, 0, capacity, count - 1, *rest)
+            self._bump_generation()
+        notify(self.name)
+        return CatalogEntry(*fields[2:3], *fields[4:10])
+
+    def touch(self, name: str) -> Optional[CatalogEntry]:
+        """
+            Gives a dataframe modified in place or appended to a new version, without moving it. Returns its new
+            entry, or None if there is none.
+
+            @param name: name of the dataframe.
+        """
+        encoded = name.encode('utf-8')
+        with self.locked(CATALOG_LOCK):
+            buf = self._table().buf
+            slot, found = self._probe(buf, encoded, _hash_name(encoded))
+            if not found:
+                return None
+            fields = list(self._read_slot(buf, slot))
+            fields[6] = self._bump_generation()
+            self._write_slot(buf, slot, *fields)
+        notify(self.name)
+        return CatalogEntry(*fields[2:3], *fields[4:10])
+
+    def segment_sizes(self) -> List[int]:
+        """
+            Returns the sizes of the data segments, by index.
+        """
+        num_segments = _COUNT.unpack_from(self.root.buf, _NUM_SEGMENTS_OFFSET)[0]
+        return [_SEGMENT_SIZE.unpack_from(self.root.buf, _ROOT.size + i * _SEGMENT_SIZE.size)[0] for i in range(num_segments)]
+
+    def add_segment(self, size: int) -> int:
+        """
+            Records a new data segment and returns its index. Callers hold ALLOCATOR_LOCK.
+
+            @param size: size of the segment in bytes.
+        """
+        num_segments = _COUNT.unpack_from(self.root.buf, _NUM_SEGMENTS_OFFSET)[0]
+        if num_segments == MAX_SEGMENTS:
+            raise MemoryError("Too many shared memory segments")
+        _SEGMENT_SIZE.pack_into(self.root.buf, _ROOT.size + num_segments * _SEGMENT_SIZE.size, size)
+        _COUNT.pack_into(self.root.buf, _NUM_SEGMENTS_OFFSET, num_segments + 1)
+        return num_segments
+
+    def _extents_offset(self, buf, retired: bool) -> int:
+        capacity, _, _, extent_capacity, _, _ = _TABLE.unpack_from(buf, 0)
+        return _TABLE_HEADER_SIZE + capacity * _SLOT_SIZE + (extent_capacity * _EXTENT.size if retired else 0)
+
+    def extents(self, retired: bool = False) -> List[list]:
+        """
+            Returns the [segment, start, end] free extents of the data segments, or the retired
+            ones (released but possibly still read). Callers hold ALLOCATOR_LOCK.
+
+            @param retired: whether to return the retired extents instead of the free ones.
+        """
+        buf = self._table().buf
+        count = _TABLE.unpack_from(buf, 0)[5 if retired else 4]
+        offset = self._extents_offset(buf, retired)
+        return [list(_EXTENT.unpack_from(buf, offset + i * _EXTENT.size)) for i in range(count)]
+
+    def set_extents(self, extents: List[list], retired: bool = False) -> None:
+        """
+            Replaces the free or the retired extents. Callers hold ALLOCATOR_LOCK.
+
+            @param extents: the [segment, start, end] extents.
+            @param retired: whether to set the retired extents instead of the free ones.
+        """
+        buf = self._table().buf
+        capacity, count, used, extent_capacity, num_free, num_retired = _TABLE.unpack_from(buf, 0)
+        if len(extents) > extent_capacity:
+            with self.locked(CATALOG_LOCK):
+                self._grow(capacity, max(2 * extent_capacity, len(extents)))
+            return self.set_extents(extents, retired)
+
+        self._write_extents(buf, extents, retired)
+
+    def _write_extents(self, buf, extents: List[list], retired: bool) -> None:
+        capacity, count, used, extent_capacity, num_free, num_retired = _TABLE.unpack_from(buf, 0)
+        offset = self._extents_offset(buf, retired)
+        for i, extent in enumerate(extents):
+            _EXTENT.pack_into(buf, offset + i * _EXTENT.size, *extent)
+        num_free, num_retired = (num_free, len(extents)) if retired else (len(extents), num_retired)
+        _TABLE.pack_into(buf, 0, capacity, count, used, extent_capacity, num_free, num_retired)
+
+    def _grow(self, capacity: int, extent_capacity: int) -> None:
+        """
+            Rehashes the catalog into a new, larger table segment and switches the root over to it.
+            Callers hold both locks.
+        """
+        entries = self.entries()
+        free, retired = self.extents(), self.extents(retired=True)
+        old_table = self.table
+
+        table_id = self.table_id + 1
+        table = self._create_table(table_id, capacity, max(extent_capacity, len(free), len(retired)))
+        for name, entry in entries.items():
+            encoded = name.encode('utf-8')
+            name_hash = _hash_name(encoded)
+            slot, _ = self._probe(table.buf, encoded, name_hash)
+            self._write_slot(table.buf, slot, _LIVE, len(encoded), entry.segment, name_hash, entry.offset,
+                             entry.length, entry.version, entry.num_rows, entry.num_columns, entry.dtypes, encoded)
+        _TABLE.pack_into(table.buf, 0, capacity, len(entries), len(entries), max(extent_capacity, len(free), len(retired)), 0, 0)
+        self._write_extents(table.buf, free, False)
+        self._write_extents(table.buf, retired, True)
+
+        _COUNT.pack_into(self.root.buf, _TABLE_ID_OFFSET, table_id)
+        self.table, self.table_id = table, table_id
+        old_table.unlink()
+        old_table.close()
+
+    def close(self) -> None:
+        """
+            Detaches from the catalog segments.
+        """
+        if self.table is not None:
+            self.table.close()
+        self.root.close()
+
+    def unlink(self) -> None:
+        """
+            Destroys the catalog segments.
+        """
+        self._table().unlink()
+        self.root.unlink()
@@ -0,0 +1,319 @@
+"""
+    Conversion between Pandas columns and flatbuffer Columns.
+
+    encode_column() turns a Pandas column into the vectors written by to_flatbuffer; the remaining
+    functions read a flatbuffer Column back, aliasing its vectors with NumPy wherever the layout
+    allows it.
+"""
+import numpy as np
+import pandas as pd
+
+from typing import Optional, Union
+
+from CS598 import Column
+from CS598 import DataType
+from fb_encoding import decode_integers, is_encoded
+from fb_strings import decode_strings, encode_strings, has_blob
+
+
+# Fixed-width column types: DataType -> (little-endian NumPy dtype, Column vector field).
+FIXED_WIDTH_TYPES = {
+    DataType.DataType.Int: ('<i8', 'IntValues'),
+    DataType.DataType.Float: ('<f8', 'FloatValues'),
+    DataType.DataType.Int8: ('<i1', 'Int8Values'),
+    DataType.DataType.Int16: ('<i2', 'Int16Values'),
+    DataType.DataType.Int32: ('<i4', 'Int32Values'),
+    DataType.DataType.UInt8: ('<u1', 'Uint8Values'),
+    DataType.DataType.UInt16: ('<u2', 'Uint16Values'),
+    DataType.DataType.UInt32: ('<u4', 'Uint32Values'),
+    DataType.DataType.UInt64: ('<u8', 'Uint64Values'),
+    DataType.DataType.Float32: ('<f4', 'Float32Values'),
+    DataType.DataType.DateTime: ('<i8', 'IntValues'),
+}
+
+# Column types whose values can be mapped in place.
+NUMERIC_TYPES = frozenset(FIXED_WIDTH_TYPES) - {DataType.DataType.DateTime} | {DataType.DataType.Bool}
+
+# Column types stored as a dictionary plus int32 codes.
+CODED_TYPES = frozenset((DataType.DataType.DictString, DataType.DataType.Categorical))
+
+# NumPy dtype of a numeric column -> its DataType.
+_NUMERIC_DATA_TYPES = {np.dtype(np_dtype): data_type for data_type, (np_dtype, _) in FIXED_WIDTH_TYPES.items()
+                       if data_type != DataType.DataType.DateTime}
+
+
+def _pack_bits(values: np.ndarray) -> np.ndarray:
+    return np.packbits(values.astype(bool, copy=False), bitorder='little')
+
+
+def _unpack_bits(packed: np.ndarray, count: int) -> np.ndarray:
+    return np.unpackbits(packed, count=count, bitorder='little').view(bool)
+
+
+def _is_count(rows) -> bool:
+    return isinstance(rows, (int, np.integer))
+
+
+def _take(values: np.ndarray, rows):
+    """
+        Selects rows of values: all of them for None, the leading ones for a row count, the given
+        ones for an array of row ids or a slice (a view).
+    """
+    if rows is None:
+        return values
+    return values[:rows] if _is_count(rows) else values[rows]
+
+
+def _unpack_rows(packed: np.ndarray, total: int, rows) -> np.ndarray:
+    """
+        Unpacks the bits of the selected rows (see _take) out of a bit-packed vector of total rows.
+    """
+    if _is_count(rows):
+        return _unpack_bits(packed, min(rows, total))
+    elif isinstance(rows, slice):
+        start, stop, step = rows.indices(total)
+        return _unpack_bits(packed, max(stop, start) if step > 0 else total)[rows]
+    return _take(_unpack_bits(packed, total), rows)
+
+
+def encode_column(values: pd.Series, dictionary_threshold: float) -> dict:
+    """
+        Converts a Pandas column into the contents of a flatbuffer Column. Returns a dict with
+        - 'dtype': the DataType of the column,
+        - 'pandas_dtype': the Pandas dtype name to record in Metadata, or None if implied by dtype,
+        - 'ordered': whether the categories of a Categorical column are ordered,
+        - 'vectors': Column field -> (NumPy array, little-endian dtype) of the numeric vectors,
+        - 'strings': Column field -> list of str of the string vectors,
+        - 'values': the values of String columns, which are written in the blob layout (see
+          fb_strings), as a list of str,
+        - 'num_rows': the row count to record for bit-packed values, or None.
+        Missing values are written as zeros / empty strings and cleared in a 'Validity' bitmap,
+        which is only present when something is missing.
+
+        @param values: the column to encode.
+        @param dictionary_threshold: string columns whose number of distinct values is at most
+            this fraction of their rows are dictionary encoded (DictString); 0 disables it.
+    """
+    dtype = values.dtype
+    encoded = {'pandas_dtype': None, 'ordered': False, 'vectors': {}, 'strings': {}, 'num_rows': None}
+    missing = None
+
+    if isinstance(dtype, pd.CategoricalDtype):
+        if not pd.api.types.is_string_dtype(dtype.categories.dtype):
+            raise ValueError(f"Unsupported dtype: categorical of {dtype.categories.dtype}")
+        codes = values.cat.codes.to_numpy()
+        missing = codes < 0
+        encoded['dtype'] = DataType.DataType.Categorical
+        encoded['pandas_dtype'] = 'category'
+        encoded['ordered'] = bool(dtype.ordered)
+        encoded['vectors']['Codes'] = (np.where(missing, 0, codes), '<i4')
+        encoded['strings']['Dictionary'] = [str(category) for category in dtype.categories]
+    elif pd.api.types.is_datetime64_any_dtype(dtype):
+        missing = values.isna().to_numpy()
+        if getattr(dtype, 'tz', None) is not None:
+            values = values.dt.tz_convert(None)
+        ticks = values.to_numpy().view(np.int64)
+        encoded['dtype'] = DataType.DataType.DateTime
+        encoded['pandas_dtype'] = str(dtype)
+        encoded['vectors']['IntValues'] = (np.where(missing, 0, ticks), '<i8')
+    elif pd.api.types.is_string_dtype(dtype):
+        missing = values.isna().to_numpy()
+        strings = [None if is_missing else str(value) for value, is_missing in zip(values, missing)]
+        if dtype != object:
+            encoded['pandas_dtype'] = str(dtype)
+        codes, dictionary = pd.factorize(np.asarray(strings, dtype=object), sort=True)
+        if len(dictionary) <= dictionary_threshold * len(strings):
+            encoded['dtype'] = DataType.DataType.DictString
+            encoded['vectors']['Codes'] = (np.where(missing, 0, codes), '<i4')
+            encoded['strings']['Dictionary'] = dictionary.tolist()
+        else:
+            encoded['dtype'] = DataType.DataType.String
+            encoded['values'] = ['' if value is None else value for value in strings]
+            offsets, blob = encode_strings(encoded['values'])
+            encoded['vectors']['StringOffsets'] = (offsets, '<i4')
+            encoded['vectors']['StringBlob'] = (blob, '<u1')
+    elif pd.api.types.is_extension_array_dtype(dtype) and dtype.kind in 'iufb':
+        # Nullable Pandas dtypes such as Int64, Float32 or boolean.
+        missing = values.isna().to_numpy()
+        encoded['pandas_dtype'] = str(dtype)
+        values = values.to_numpy(dtype=dtype.numpy_dtype, na_value=dtype.numpy_dtype.type(0))
+    elif dtype.kind not in 'iufb':
+        raise ValueError(f"Unsupported dtype: {dtype}")
+
+    if 'dtype' not in encoded:
+        values = np.asarray(values)
+        if values.dtype == bool:
+            encoded['dtype'] = DataType.DataType.Bool
+            encoded['vectors']['BoolValues'] = (_pack_bits(values), '<u1')
+            encoded['num_rows'] = len(values)
+        elif values.dtype in _NUMERIC_DATA_TYPES:
+            encoded['dtype'] = _NUMERIC_DATA_TYPES[values.dtype]
+            encoded['vectors'][FIXED_WIDTH_TYPES[encoded['dtype']][1]] = (values, FIXED_WIDTH_TYPES[encoded['dtype']][0])
+        else:
+            raise ValueError(f"Unsupported dtype: {dtype}")
+
+    if missing is not None and missing.any():
+        encoded['vectors']['Validity'] = (_pack_bits(~missing), '<u1')
+        encoded['num_rows'] = len(missing)
+    return encoded
+
+
+def pandas_dtype(column: Column.Column):
+    """
+        Returns the Pandas dtype recorded for a column, or None if it is implied by its DataType.
+
+        @param column: the flatbuffer column.
+    """
+    name = column.Metadata().PandasDtype()
+    return None if name is None else pd.api.types.pandas_dtype(name.decode())
+
+
+def num_rows(column: Column.Column) -> int:
+    """
+        Returns the number of rows of a column.
+
+        @param column: the flatbuffer column.
+    """
+    dtype = column.Metadata().Dtype()
+    if is_encoded(column):
+        return column.NumRows()
+    elif dtype in FIXED_WIDTH_TYPES:
+        return getattr(column, FIXED_WIDTH_TYPES[dtype][1] + 'Length')()
+    elif dtype in CODED_TYPES:
+        return column.CodesLength()
+    elif dtype == DataType.DataType.Bool:
+        return column.NumRows()
+    elif has_blob(column):
+        return column.StringOffsetsLength() - 1
+    return column.StringValuesLength()
+
+
+def column_validity(column: Column.Column, rows: Union[int, slice, np.ndarray, None] = None) -> Optional[np.ndarray]:
+    """
+        Returns a boolean array telling which of the selected values of a column are present,
+        or None if the column has no missing values.
+
+        @param column: the flatbuffer column.
+        @param rows: number of leading rows to return, an array of the ids of the rows to return
+            or a slice of them; all rows if None.
+    """
+    if column.ValidityIsNone():
+        return None
+    return _unpack_rows(column.ValidityAsNumpy(), num_rows(column), rows)
+
+
+def column_codes(column: Column.Column) -> np.ndarray:
+    """
+        Returns a NumPy array aliasing the int32 code vector of a DictString or Categorical column.
+
+        @param column: the flatbuffer column.
+    """
+    if column.CodesIsNone():
+        return np.empty(0, dtype=np.int32)
+    return column.CodesAsNumpy()
+
+
+def column_dictionary(column: Column.Column) -> np.ndarray:
+    """
+        Decodes the dictionary of a DictString column (its sorted unique values) or the categories
+        of a Categorical column into an object array.
+
+        @param column: the flatbuffer column.
+    """
+    dictionary = np.empty(column.DictionaryLength(), dtype=object)
+    dictionary[:] = [column.Dictionary(j).decode() for j in range(len(dictionary))]
+    return dictionary
+
+
+def column_values(column: Column.Column, rows: Union[int, slice, np.ndarray, None] = None) -> np.ndarray:
+    """
+        Returns the selected values of a column as a NumPy array. Fixed-width columns alias their
+        vector in the flatbuffer (writable whenever the buffer is; selecting row ids copies them,
+        slicing doesn't), DateTime columns as datetime64. Encoded Int columns (see fb_encoding)
+        only decode the selected values. Bool columns are unpacked and string columns decoded
+        into an object array holding None for missing values. Missing numeric values read as 0;
+        see column_validity.
+
+        @param column: the flatbuffer column.
+        @param rows: number of leading rows to return, an array of the ids of the rows to return
+            or a slice of them; all rows if None.
+    """
+    dtype = column.Metadata().Dtype()
+    if is_encoded(column):
+        return decode_integers(column, rows)
+    elif dtype in FIXED_WIDTH_TYPES:
+        np_dtype, field = FIXED_WIDTH_TYPES[dtype]
+        if getattr(column, field + 'IsNone')():
+            values = np.empty(0, dtype=np_dtype)
+        else:
+            values = getattr(column, field + 'AsNumpy')()
+        if dtype == DataType.DataType.DateTime:
+            unit = np.datetime_data(getattr(pandas_dtype(column), 'base', pandas_dtype(column)))[0]
+            values = values.view(f'datetime64[{unit}]')
+        return _take(values, rows)
+    elif dtype == DataType.DataType.Bool:
+        return _unpack_rows(column.BoolValuesAsNumpy(), column.NumRows(), rows)
+
+    if dtype in CODED_TYPES:
+        codes = _take(column_codes(column), rows)
+        if rows is None:
+            values = column_dictionary(column)[codes]
+        else:
+            # Only the dictionary entries the selected rows use get decoded.
+            used, inverse = np.unique(codes, return_inverse=True)
+            labels = np.empty(len(used), dtype=object)
+            labels[:] = [column.Dictionary(code).decode() for code in used.tolist()]
+            values = labels[inverse.reshape(-1)]
+    elif has_blob(column):
+        values = decode_strings(column, rows)
+    else:
+        if rows is None or _is_count(rows):
+            row_ids = range(num_rows(column) if rows is None else min(rows, num_rows(column)))
+        elif isinstance(rows, slice):
+            row_ids = range(*rows.indices(num_rows(column)))
+        else:
+            row_ids = rows.tolist()
+        values = np.empty(len(row_ids), dtype=object)
+        values[:] = [column.StringValues(j).decode() for j in row_ids]
+
+    valid = column_validity(column, rows)
+    if valid is not None:
+        values[~valid] = None
+    return values
+
+
+def column_to_pandas(column: Column.Column, rows: Union[int, slice, np.ndarray, None] = None):
+    """
+        Returns the selected values of a column as an array with the column's original Pandas
+        dtype, suitable for building a Pandas Dataframe.
+
+        @param column: the flatbuffer column.
+        @param rows: number of leading rows to return, an array of the ids of the rows to return
+            or a slice of them; all rows if None.
+    """
+    dtype = column.Metadata().Dtype()
+    recorded_dtype = pandas_dtype(column)
+    valid = column_validity(column, rows)
+
+    if dtype == DataType.DataType.Categorical:
+        codes = _take(column_codes(column), rows)
+        if valid is not None:
+            codes = np.where(valid, codes, -1)
+        return pd.Categorical.from_codes(codes, categories=column_dictionary(column),
+                                         ordered=column.Metadata().Ordered())
+
+    values = column_values(column, rows)
+    if recorded_dtype is None:
+        return values
+    elif dtype == DataType.DataType.DateTime:
+        if valid is not None:
+            values = np.where(valid, values, np.datetime64('NaT'))
+        values = pd.array(values)
+        if getattr(recorded_dtype, 'tz', None) is not None:
+            values = values.tz_localize('UTC').tz_convert(recorded_dtype.tz)
+        return values
+
+    values = pd.array(values, dtype=recorded_dtype)
+    if valid is not None:
+        values[~valid] = pd.NA
+    return values
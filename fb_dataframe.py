@@ -1,198 +1,1141 @@
 import flatbuffers
+import numpy as np
 import pandas as pd
 import struct
 import time
 import types
+import fb_metrics
+from collections import OrderedDict
+from typing import Callable, Dict, Iterable, List, Optional, Tuple, Union
 from CS598 import DataFrame
 from CS598 import Column
 from CS598 import Metadata
 from CS598 import DataType  
+from CS598 import Encoding
+from CS598 import RowGroup
+from fb_encoding import ENCODINGS, encode_integers, is_encoded, run_ids
+from fb_column import CODED_TYPES, FIXED_WIDTH_TYPES, NUMERIC_TYPES, column_codes, column_dictionary, column_to_pandas, column_validity, column_values, encode_column, num_rows, pandas_dtype
+from fb_filter import ORDERING_OPERATORS, compare, may_match, normalize_filters
+from fb_groupby import finalize_group_by, merge_partials, normalize_aggs, partial_group_by
+from fb_metrics import instrumented, phase
+from fb_strings import has_blob, strings_isin
+from fb_stats import DEFAULT_ZONE_SIZE, compute_stats, create_stats, encoded_stats, merge_stats, read_stats, rewrite_stats, zone_maps
 
-def to_flatbuffer(df: pd.DataFrame) -> bytes:
-    builder = flatbuffers.Builder(1024)
-    metadata_string = builder.CreateString("DataFrame Metadata")
+# Column name -> index maps of recently read flatbuffers, see _column_index_cache.
+_COLUMN_INDEX_CACHES = OrderedDict()
+_COLUMN_INDEX_CACHE_SIZE = 64
+
+# Rows per row group written by FbDataFrameWriter by default.
+DEFAULT_ROW_GROUP_SIZE = 1 << 20
+
+# Operators evaluated on the raw bytes of String columns in the blob layout.
+_EQUALITY_OPERATORS = frozenset(('==', '!=', 'in', 'not in'))
+
+def _create_numeric_vector(builder: flatbuffers.Builder, values: np.ndarray, dtype: str) -> int:
+    """
+        Writes a numeric column into the builder by copying its NumPy buffer in bulk.
+        The result is byte-identical to prepending the values one by one with
+        StartVector / PrependInt64 (or PrependFloat64) / EndVector.
+
+        @param builder: the flatbuffer builder.
+        @param values: the column values.
+        @param dtype: little-endian NumPy dtype of the vector elements, e.g. '<i8'.
+    """
+    return builder.CreateNumpyVector(np.ascontiguousarray(values, dtype=dtype))
+
+
+def _create_string_vector(builder: flatbuffers.Builder, strings: List[str]) -> int:
+    """
+        Writes a vector of strings into the builder. The strings themselves have to be created
+        before the vector is started.
+
+        @param builder: the flatbuffer builder.
+        @param strings: the strings to write.
+    """
+    str_offsets = [builder.CreateString(value) for value in strings]
+    builder.StartVector(4, len(str_offsets), 4)
+    for offset in reversed(str_offsets):
+        builder.PrependUOffsetTRelative(offset)
+    return builder.EndVector()
+
+
+def _create_columns(builder: flatbuffers.Builder, df: pd.DataFrame, dictionary_threshold: float,
+                    zone_size: Optional[int] = DEFAULT_ZONE_SIZE, encoding: Optional[str] = None):
+    """
+        Writes every column of a Pandas Dataframe into the builder. Returns the offset of the vector
+        of Columns and, for the column directory, the (UTF-8 name, index, Metadata offset) of every column.
+
+        @param builder: the flatbuffer builder.
+        @param df: the dataframe holding the columns.
+        @param dictionary_threshold: see to_flatbuffer.
+        @param zone_size: see to_flatbuffer.
+        @param encoding: see to_flatbuffer.
+    """
     column_metadata_list = []
     value_vectors = []
-    value_vectors_dtype = []
-    for column_name, dtype in df.dtypes.items():
-        if dtype == 'int64':
-            data_type = DataType.DataType().Int
-        elif dtype == 'float64':
-            data_type = DataType.DataType().Float
-        elif dtype == 'object':
-            data_type = DataType.DataType().String
-        else:
-            raise ValueError(f"Unsupported dtype: {dtype}")
+    fb_metrics.count(rows_scanned=len(df))
+    for column_name in df.columns:
+        # Convert column values to FlatBuffer values; numeric columns keep their
+        # NumPy buffer so they can be copied into the builder in bulk.
+        with phase('encode'):
+            encoded = encode_column(df[column_name], dictionary_threshold)
+        column_metadata_list.append((column_name, encoded['dtype']))
+        value_vectors.append(encoded)
+    columns = []
+    column_metas = []
+    for index, (metadata, encoded) in reversed(list(enumerate(zip(column_metadata_list, value_vectors)))):
+        if zone_size is not None:
+            with phase('stats'):
+                column_stats, zone_stats = encoded_stats(encoded, zone_size)
 
-        column_metadata_list.append((column_name, data_type))
+        scalars = {}
+        if encoding is not None and metadata[1] == DataType.DataType.Int:
+            with phase('encode'):
+                integers = encode_integers(encoded['vectors']['IntValues'][0], encoding)
+            if integers is not None:
+                del encoded['vectors']['IntValues']
+                encoded['vectors'].update(integers['vectors'])
+                encoded['num_rows'] = len(df)
+                scalars = integers['scalars']
 
-        # Convert column values to FlatBuffer values
-        column_values = df[column_name]
-        value_vectors.append(column_values.tolist())
-        value_vectors_dtype.append(dtype)
-    columns = []
-    for dtype, metadata, value_vector in reversed(list(zip(value_vectors_dtype ,column_metadata_list, value_vectors))):
-        if dtype == 'int64':
-            Column.StartIntValuesVector(builder, len(value_vector))
-            for value in reversed(value_vector):
-                builder.PrependInt64(value)
-            values = builder.EndVector(len(value_vector))
-
-            col_name = builder.CreateString(metadata[0])
-            data_type = metadata[1]
-            Metadata.Start(builder)
-            Metadata.AddName(builder, col_name)
-            Metadata.AddDtype(builder, data_type)
-            meta = Metadata.End(builder)
-            Column.Start(builder)            
-            Column.AddMetadata(builder, meta)
-            Column.AddIntValues(builder, values)
-            columns.append(Column.End(builder))
-        elif dtype == 'float64':
-            Column.StartFloatValuesVector(builder, len(value_vector))
-            for value in reversed(value_vector):
-                builder.PrependFloat64(value)
-            values = builder.EndVector(len(value_vector))
-            
-            col_name = builder.CreateString(metadata[0])
-            data_type = metadata[1]
-            Metadata.Start(builder)
-            Metadata.AddName(builder, col_name)
-            Metadata.AddDtype(builder, data_type)
-            meta = Metadata.End(builder)
-            Column.Start(builder)            
-            Column.AddMetadata(builder, meta)
-            Column.AddFloatValues(builder, values)
-            columns.append(Column.End(builder))
-        elif dtype == 'object':
-            str_offsets = [builder.CreateString(str(value)) for value in value_vector]
-            Column.StartStringValuesVector(builder, len(value_vector))
-            for offset in reversed(str_offsets):
-                builder.PrependUOffsetTRelative(offset)
-            values = builder.EndVector(len(value_vector))
-            
-            col_name = builder.CreateString(metadata[0])
-            data_type = metadata[1]
-            Metadata.Start(builder)
-            Metadata.AddName(builder, col_name)
-            Metadata.AddDtype(builder, data_type)
-            meta = Metadata.End(builder)
-            Column.Start(builder)            
-            Column.AddMetadata(builder, meta)
-            Column.AddStringValues(builder, values)
-            columns.append(Column.End(builder))
+        vectors = {}
+        with phase('write'):
+            for field, (values, dtype) in encoded['vectors'].items():
+                vectors[field] = _create_numeric_vector(builder, values, dtype)
+            for field, strings in encoded['strings'].items():
+                vectors[field] = _create_string_vector(builder, strings)
+
+        stats = zones = None
+        if zone_size is not None:
+            stats = create_stats(builder, metadata[1], column_stats)
+            if zone_stats:
+                zone_offsets = [create_stats(builder, metadata[1], zone, sketch=False) for zone in zone_stats]
+                Metadata.StartZoneMapsVector(builder, len(zone_offsets))
+                for zone in reversed(zone_offsets):
+                    builder.PrependUOffsetTRelative(zone)
+                zones = builder.EndVector()
+
+        col_name = builder.CreateString(metadata[0])
+        pandas_dtype = None if encoded['pandas_dtype'] is None else builder.CreateString(encoded['pandas_dtype'])
+        Metadata.Start(builder)
+        Metadata.AddName(builder, col_name)
+        Metadata.AddDtype(builder, metadata[1])
+        Metadata.AddIndex(builder, index)
+        if pandas_dtype is not None:
+            Metadata.AddPandasDtype(builder, pandas_dtype)
+        Metadata.AddOrdered(builder, encoded['ordered'])
+        if stats is not None:
+            Metadata.AddStats(builder, stats)
+            Metadata.AddZoneSize(builder, zone_size)
+        if zones is not None:
+            Metadata.AddZoneMaps(builder, zones)
+        meta = Metadata.End(builder)
+        Column.Start(builder)            
+        Column.AddMetadata(builder, meta)
+        for field, vector in vectors.items():
+            getattr(Column, 'Add' + field)(builder, vector)
+        if encoded['num_rows'] is not None:
+            Column.AddNumRows(builder, encoded['num_rows'])
+        for field, value in scalars.items():
+            getattr(Column, 'Add' + field)(builder, value)
+        columns.append(Column.End(builder))
+        column_metas.append((metadata[0].encode('utf-8'), index, meta))
 
     # Create a vector of Column objects
     DataFrame.StartColumnsVector(builder, len(columns))
     for column in columns:
         builder.PrependUOffsetTRelative(column)
-    columns_vector = builder.EndVector(len(columns))
-    
+    columns_vector = builder.EndVector()
+    return columns_vector, column_metas
+
+
+def _create_column_directory(builder: flatbuffers.Builder, column_metas: list) -> int:
+    """
+        Creates the column directory: the Metadata tables of the columns, sorted by the UTF-8 bytes
+        of the column name (the FlatBuffers key order) so readers can binary search it.
+
+        @param builder: the flatbuffer builder.
+        @param column_metas: (UTF-8 name, index, Metadata offset) of every column.
+    """
+    column_metas = sorted(column_metas, key=lambda entry: (entry[0], entry[1]))
+    DataFrame.StartColumnDirectoryVector(builder, len(column_metas))
+    for _, _, meta in reversed(column_metas):
+        builder.PrependUOffsetTRelative(meta)
+    return builder.EndVector()
+
+
+def _check_encoding(encoding: Optional[str]) -> None:
+    if encoding is not None and encoding != 'auto' and encoding not in ENCODINGS:
+        raise ValueError(f"Unsupported encoding: {encoding}")
+
+
+@instrumented('to_flatbuffer')
+def to_flatbuffer(df: pd.DataFrame, dictionary_threshold: float = 0.5, row_group_size: Optional[int] = None,
+                  zone_size: Optional[int] = DEFAULT_ZONE_SIZE, encoding: Optional[str] = None) -> bytes:
+    """
+        Serializes a Pandas Dataframe into a Flatbuffer Dataframe.
+
+        @param df: the dataframe to serialize.
+        @param dictionary_threshold: string columns whose number of distinct values is at most
+            this fraction of their rows are dictionary encoded (DictString); 0 disables it.
+        @param row_group_size: if given, the rows are stored in row groups of this many rows
+            (see FbDataFrameWriter) instead of a single batch.
+        @param zone_size: rows per block of the zone maps; every column records its statistics
+            and those of each block (see fb_stats). None writes no statistics.
+        @param encoding: lightweight encoding of the Int columns (see fb_encoding): one of
+            'bit_packed', 'frame_of_reference', 'run_length' and 'delta', used where the values
+            allow it, or 'auto' to pick the smallest per column. None stores every value as an
+            int64, which the in-place fb_dataframe_map_numeric_column and the zero-copy
+            fb_dataframe_column need.
+    """
+    if zone_size is not None and zone_size <= 0:
+        raise ValueError("zone_size must be positive")
+    _check_encoding(encoding)
+    if row_group_size is not None:
+        return to_flatbuffer_stream([df], row_group_size, dictionary_threshold, zone_size, encoding)
+
+    builder = flatbuffers.Builder(1024)
+    metadata_string = builder.CreateString("DataFrame Metadata")
+    columns_vector, column_metas = _create_columns(builder, df, dictionary_threshold, zone_size, encoding)
+    column_directory = _create_column_directory(builder, column_metas)
 
     # Create the DataFrame object
     DataFrame.Start(builder)
     DataFrame.AddMetadata(builder, metadata_string)
     DataFrame.AddColumns(builder, columns_vector)
+    DataFrame.AddColumnDirectory(builder, column_directory)
+    DataFrame.AddNumRows(builder, len(df))
     df_data = DataFrame.End(builder)
 
     # Finish building the FlatBuffer
     builder.Finish(df_data)
     # Get the bytes from the builder
-    return builder.Output()
-
-
-def fb_dataframe_head(fb_bytes: bytes, rows: int = 5) -> pd.DataFrame:
-    df = DataFrame.DataFrame.GetRootAs(fb_bytes,0)
-
-    num_columns = df.ColumnsLength()
-    data = {}
-
-    for i in range(num_columns):
-        column = df.Columns(i)
-        metadata = column.Metadata()
-        col_name = metadata.Name().decode()
-        
-        if metadata.Dtype() == DataType.DataType.Int:
-            values = [column.IntValues(j) for j in range(min(rows, column.IntValuesLength()))]
-        elif metadata.Dtype() == DataType.DataType.Float:
-            values = [column.FloatValues(j) for j in range(min(rows, column.FloatValuesLength()))]
-        elif metadata.Dtype() == DataType.DataType.String:
-            values = [column.StringValues(j).decode() for j in range(min(rows, column.StringValuesLength()))]
+    output = builder.Output()
+    fb_metrics.count(bytes_copied=len(output))
+    return output
+
+
+class FbDataFrameWriter:
+    """
+        Builds a Flatbuffer Dataframe with the row-group layout from a stream of Pandas Dataframe
+        chunks, e.g. pd.read_csv(path, chunksize=...). Rows are encoded into row groups of
+        row_group_size rows as soon as enough of them have arrived, so only the pending rows and
+        the encoded bytes are held in memory, never the whole Pandas Dataframe. Every chunk must
+        have the same columns.
+    """
+    def __init__(self, row_group_size: int = DEFAULT_ROW_GROUP_SIZE, dictionary_threshold: float = 0.5,
+                 zone_size: Optional[int] = DEFAULT_ZONE_SIZE, encoding: Optional[str] = None):
+        if row_group_size <= 0:
+            raise ValueError("row_group_size must be positive")
+        if zone_size is not None and zone_size <= 0:
+            raise ValueError("zone_size must be positive")
+        _check_encoding(encoding)
+        self.row_group_size = row_group_size
+        self.dictionary_threshold = dictionary_threshold
+        self.zone_size = zone_size
+        self.encoding = encoding
+        self.builder = flatbuffers.Builder(1024)
+        self.metadata_string = self.builder.CreateString("DataFrame Metadata")
+        self.row_groups = []
+        self.column_metas = None
+        self.num_rows = 0
+        self.empty = None
+        self.pending = []
+        self.pending_rows = 0
+
+    def write(self, chunk: pd.DataFrame) -> None:
+        """
+            Adds the rows of a chunk, encoding every row group that fills up.
+
+            @param chunk: the next rows of the dataframe.
+        """
+        if self.empty is None:
+            self.empty = chunk.iloc[:0]
+        elif list(chunk.columns) != list(self.empty.columns):
+            raise ValueError("All chunks must have the same columns")
+
+        if len(chunk) > 0:
+            self.pending.append(chunk)
+            self.pending_rows += len(chunk)
+        while self.pending_rows >= self.row_group_size:
+            self._flush(self.row_group_size)
+
+    def _flush(self, rows: int) -> None:
+        pending = self.pending[0] if len(self.pending) == 1 else pd.concat(self.pending, ignore_index=True)
+        self._write_row_group(pending.iloc[:rows])
+        rest = pending.iloc[rows:]
+        self.pending = [rest] if len(rest) > 0 else []
+        self.pending_rows = len(rest)
+
+    def _write_row_group(self, rows_df: pd.DataFrame) -> None:
+        columns_vector, column_metas = _create_columns(self.builder, rows_df, self.dictionary_threshold, self.zone_size,
+                                                       self.encoding)
+        if self.column_metas is None:
+            self.column_metas = column_metas
+        RowGroup.Start(self.builder)
+        RowGroup.AddNumRows(self.builder, len(rows_df))
+        RowGroup.AddColumns(self.builder, columns_vector)
+        self.row_groups.append(RowGroup.End(self.builder))
+        self.num_rows += len(rows_df)
+
+    def finish(self) -> bytes:
+        """
+            Encodes the remaining rows as a last, smaller row group and returns the finished
+            Flatbuffer Dataframe. The writer can't be used afterwards.
+        """
+        if self.pending_rows > 0:
+            self._flush(self.pending_rows)
+        if not self.row_groups:
+            self._write_row_group(self.empty if self.empty is not None else pd.DataFrame())
+
+        builder = self.builder
+        DataFrame.StartRowGroupsVector(builder, len(self.row_groups))
+        for row_group in reversed(self.row_groups):
+            builder.PrependUOffsetTRelative(row_group)
+        row_groups_vector = builder.EndVector()
+        column_directory = _create_column_directory(builder, self.column_metas)
+
+        DataFrame.Start(builder)
+        DataFrame.AddMetadata(builder, self.metadata_string)
+        DataFrame.AddColumnDirectory(builder, column_directory)
+        DataFrame.AddRowGroups(builder, row_groups_vector)
+        DataFrame.AddNumRows(builder, self.num_rows)
+        builder.Finish(DataFrame.End(builder))
+        return builder.Output()
+
+
+@instrumented('to_flatbuffer_stream')
+def to_flatbuffer_stream(chunks: Iterable[pd.DataFrame], row_group_size: int = DEFAULT_ROW_GROUP_SIZE,
+                         dictionary_threshold: float = 0.5, zone_size: Optional[int] = DEFAULT_ZONE_SIZE,
+                         encoding: Optional[str] = None) -> bytes:
+    """
+        Serializes a stream of Pandas Dataframe chunks into a Flatbuffer Dataframe with the
+        row-group layout; see FbDataFrameWriter.
+
+        @param chunks: the dataframe as consecutive chunks of rows, e.g. pd.read_csv(path, chunksize=...).
+        @param row_group_size: number of rows per row group.
+        @param dictionary_threshold: see to_flatbuffer.
+        @param zone_size: see to_flatbuffer.
+        @param encoding: see to_flatbuffer.
+    """
+    writer = FbDataFrameWriter(row_group_size, dictionary_threshold, zone_size, encoding)
+    for chunk in chunks:
+        writer.write(chunk)
+    output = writer.finish()
+    fb_metrics.count(bytes_copied=len(output))
+    return output
+
+
+def _column_index_cache(df: DataFrame.DataFrame) -> Dict[str, int]:
+    """
+        Returns the cached column name -> index map of the buffer holding df, creating an empty one
+        if needed. Maps are keyed by the address and length of the buffer, so they are shared by every
+        view of the same bytes (e.g. repeated _get_fb_buf calls on shared memory). Entries are hints
+        only: callers check the name stored in the buffer before trusting them.
+
+        @param df: the root of the Flatbuffer Dataframe.
+    """
+    buf = df._tab.Bytes
+    key = (np.frombuffer(buf, dtype=np.uint8).__array_interface__['data'][0], len(buf), df._tab.Pos)
+    cache = _COLUMN_INDEX_CACHES.get(key)
+    if cache is None:
+        cache = _COLUMN_INDEX_CACHES[key] = {}
+        if len(_COLUMN_INDEX_CACHES) > _COLUMN_INDEX_CACHE_SIZE:
+            _COLUMN_INDEX_CACHES.popitem(last=False)
+    else:
+        _COLUMN_INDEX_CACHES.move_to_end(key)
+    return cache
+
+
+class _Chunks:
+    """
+        Root of a Flatbuffer Dataframe stored as several chunks, each a Flatbuffer Dataframe of
+        its own holding the next rows (see FbSharedMemory.append_rows). Exposes the part of the
+        DataFrame interface the readers use: the row batches are those of every chunk in order,
+        and the column directory is that of the first chunk. Every chunk holds the same columns
+        in the same order.
+    """
+    def __init__(self, fb_bufs: List[memoryview]):
+        self.chunks = [DataFrame.DataFrame.GetRootAs(fb_buf, 0) for fb_buf in fb_bufs]
+        self.batches = [batch for chunk in self.chunks for batch in _row_groups(chunk)]
+        # Column indexes are cached for the first chunk (see _column_index_cache); they hold for all.
+        self._tab = self.chunks[0]._tab
+
+    def NumRows(self) -> int:
+        return sum(chunk.NumRows() for chunk in self.chunks)
+
+    def RowGroupsIsNone(self) -> bool:
+        return False
+
+    def RowGroupsLength(self) -> int:
+        return len(self.batches)
+
+    def RowGroups(self, i: int):
+        return self.batches[i]
+
+    def ColumnDirectoryLength(self) -> int:
+        return self.chunks[0].ColumnDirectoryLength()
+
+    def ColumnDirectory(self, i: int):
+        return self.chunks[0].ColumnDirectory(i)
+
+
+def _root(fb_buf: Union[memoryview, List[memoryview]]) -> Union[DataFrame.DataFrame, _Chunks]:
+    """
+        Returns the root of a Flatbuffer Dataframe held in one buffer, or in a list of buffers
+        holding its chunks in row order; the readers span the chunks as if they were row groups.
+
+        @param fb_buf: buffer holding the Flatbuffer Dataframe, or list of buffers holding its chunks.
+    """
+    if isinstance(fb_buf, list):
+        return DataFrame.DataFrame.GetRootAs(fb_buf[0], 0) if len(fb_buf) == 1 else _Chunks(fb_buf)
+    return DataFrame.DataFrame.GetRootAs(fb_buf, 0)
+
+
+def _row_groups(df: DataFrame.DataFrame) -> list:
+    """
+        Returns the batches of rows of a Flatbuffer Dataframe: its row groups, or the DataFrame
+        itself when it was written as a single batch. Both expose Columns(j) / ColumnsLength() and
+        hold the columns in the same order in every batch.
+
+        @param df: the root of the Flatbuffer Dataframe.
+    """
+    if df.RowGroupsIsNone():
+        return [df]
+    return [df.RowGroups(i) for i in range(df.RowGroupsLength())]
+
+
+def _column_position(df: DataFrame.DataFrame, name: bytes) -> Optional[int]:
+    """
+        Returns the index in the columns of every row batch of the column called name, or None if
+        there is none. Uses binary search over the column directory; buffers written without a
+        directory are scanned linearly.
+
+        @param df: the root of the Flatbuffer Dataframe.
+        @param name: UTF-8 encoded column name.
+    """
+    num_entries = df.ColumnDirectoryLength()
+    if num_entries == 0:
+        batch = _row_groups(df)[0]
+        for i in range(batch.ColumnsLength()):
+            if batch.Columns(i).Metadata().Name() == name:
+                return i
+        return None
+
+    low, high = 0, num_entries
+    while low < high:
+        mid = (low + high) // 2
+        if df.ColumnDirectory(mid).Name() < name:
+            low = mid + 1
         else:
-            continue  # Skip unsupported column types
+            high = mid
+    if low < num_entries:
+        metadata = df.ColumnDirectory(low)
+        if metadata.Name() == name:
+            return metadata.Index()
+    return None
+
+
+def _find_columns(df: DataFrame.DataFrame, col_names: List[str]) -> List[Dict[str, Column.Column]]:
+    """
+        Resolves columns by name through the cached name -> index map of the buffer, falling back
+        to the column directory. Returns, for every row batch (see _row_groups), the columns found
+        by name. Raises ValueError if any of them is missing.
+
+        @param df: the root of the Flatbuffer Dataframe.
+        @param col_names: names of the columns to find.
+    """
+    batches = _row_groups(df)
+    index_cache = _column_index_cache(df)
+    indexes = {}
+    for col_name in col_names:
+        name = col_name.encode('utf-8')
+        index = index_cache.get(col_name)
+        if index is not None and index < batches[0].ColumnsLength():
+            if batches[0].Columns(index).Metadata().Name() == name:
+                indexes[col_name] = index
+                continue
+
+        index = _column_position(df, name)
+        if index is None:
+            raise ValueError(f"Column {col_name} not found")
+        index_cache[col_name] = index
+        indexes[col_name] = index
+    return [{col_name: batch.Columns(index) for col_name, index in indexes.items()} for batch in batches]
+
+
+def _numeric_column_view(df: DataFrame.DataFrame, col_name: str) -> np.ndarray:
+    """
+        Returns the values of a non-string column as a NumPy array, aliasing its vector in the
+        flatbuffer for every type but Bool, whose bit-packed values are unpacked into a new array.
+        Columns split across several row groups are concatenated into a new array.
+
+        @param df: the root of the Flatbuffer Dataframe.
+        @param col_name: name of the column.
+    """
+    parts = []
+    for columns in _find_columns(df, [col_name]):
+        column = columns[col_name]
+        if column.Metadata().Dtype() not in FIXED_WIDTH_TYPES and column.Metadata().Dtype() != DataType.DataType.Bool:
+            raise ValueError(f"Column {col_name} is not numeric")
+        parts.append(column_values(column))
+        _count_read(column, None, parts[-1])
+    return parts[0] if len(parts) == 1 else np.concatenate(parts)
+
+
+@instrumented('column')
+def fb_dataframe_column(fb_buf: memoryview, col_name: str) -> np.ndarray:
+    """
+        Returns a read-only NumPy array over the values of a numeric, bool or datetime column
+        without copying them out of the Flatbuffer Dataframe (bool columns are bit-packed and get
+        unpacked into a copy, as are encoded Int columns, and columns of a Dataframe with several
+        row groups are concatenated).
+        Missing values of nullable columns read as 0; see fb_column.column_validity.
 
-        data[col_name] = values
+        @param fb_buf: buffer holding the Flatbuffer Dataframe, or list of buffers holding its chunks.
+        @param col_name: name of the column.
+    """
+    values = _numeric_column_view(_root(fb_buf), col_name)
+    values.flags.writeable = False
+    return values
+
+
+@instrumented('head')
+def fb_dataframe_head(fb_bytes: bytes, rows: int = 5, selection: Optional[np.ndarray] = None) -> pd.DataFrame:
+    df = _root(fb_bytes)
+
+    # With a selection (see fb_dataframe_filter), only its first rows are decoded and they keep
+    # their row ids as index, like df[mask].head(rows).
+    if selection is not None:
+        selection = np.asarray(selection, dtype=np.int64)[:rows]
+        rows = len(selection)
+
+    # Only the leading row groups holding the first rows are decoded.
+    parts = []
+    offset = 0
+    for batch in _row_groups(df):
+        num_columns = batch.ColumnsLength()
+        data = {}
+        batch_rows, index = rows, None
+        if selection is not None:
+            index = selection[(selection >= offset) & (selection < offset + batch.NumRows())]
+            batch_rows = index - offset
+
+        for i in range(num_columns):
+            column = batch.Columns(i)
+            data[column.Metadata().Name().decode()] = column_to_pandas(column, batch_rows)
+            _count_read(column, batch_rows, data[column.Metadata().Name().decode()], zero_copy=False)
+
+        parts.append(pd.DataFrame(data, index=index))
+        fb_metrics.count(rows_scanned=len(parts[-1]))
+        offset += batch.NumRows()
+        rows -= len(parts[-1])
+        if rows <= 0:
+            break
 
     # Construct and return a Pandas DataFrame
-    return pd.DataFrame(data)
+    return parts[0] if len(parts) == 1 else pd.concat(parts, ignore_index=selection is None)
 
-def fb_dataframe_group_by_sum(fb_bytes: bytes, grouping_col_name: str, sum_col_name: str) -> pd.DataFrame:
-    df = DataFrame.DataFrame.GetRootAs(fb_bytes,0)
-    num_columns = df.ColumnsLength()
-    data = {}
-
-    # Variables to hold column data for group by and sum operations
-    grouping_data = None
-    summing_data = None
-
-    for i in range(num_columns):
-        column = df.Columns(i)
-        metadata = column.Metadata()
-        col_name = metadata.Name().decode()
-
-        if col_name == grouping_col_name:
-            if metadata.Dtype() == DataType.DataType.Int:
-                grouping_data = [column.IntValues(j) for j in range(column.IntValuesLength())]
-            elif metadata.Dtype() == DataType.DataType.Float:
-                grouping_data = [column.FloatValues(j) for j in range(column.FloatValuesLength())]
-            elif metadata.Dtype() == DataType.DataType.String:
-                grouping_data = [column.StringValues(j).decode() for j in range(column.StringValuesLength())]
-
-        elif col_name == sum_col_name:
-            if metadata.Dtype() == DataType.DataType.Int:
-                summing_data = [column.IntValues(j) for j in range(column.IntValuesLength())]
-            elif metadata.Dtype() == DataType.DataType.Float:
-                summing_data = [column.FloatValues(j) for j in range(column.FloatValuesLength())]
-
-        if grouping_data and summing_data:
+
+@instrumented('to_pandas')
+def fb_dataframe_to_pandas(fb_buf: memoryview, columns: Optional[List[str]] = None,
+                           rows: Optional[slice] = None) -> pd.DataFrame:
+    """
+        Returns a range of rows of some columns of a Flatbuffer Dataframe as a Pandas Dataframe,
+        like df.iloc[rows][columns]. Only the requested columns of the row groups overlapping the
+        range are decoded. Fixed-width columns without a recorded Pandas dtype are backed by
+        read-only NumPy views into the buffer when the range lies in a single row group.
+
+        @param fb_buf: buffer holding the Flatbuffer Dataframe, or list of buffers holding its chunks.
+        @param columns: names of the columns to return, in order; all columns if None.
+        @param rows: slice of the rows to return, with a positive step; all rows if None.
+    """
+    df = _root(fb_buf)
+    batches = _row_groups(df)
+    if columns is None:
+        columns = [batches[0].Columns(i).Metadata().Name().decode() for i in range(batches[0].ColumnsLength())]
+    columns = list(columns)
+    batches = [(batch.NumRows(), batch_columns) for batch, batch_columns in zip(batches, _find_columns(df, columns))]
+    return _batches_to_pandas(batches, columns, rows, df.NumRows())
+
+
+def _batches_to_pandas(batches: List[Tuple[int, Dict[str, Column.Column]]], columns: List[str],
+                       rows: Optional[slice], total_rows: int, read: Optional[Callable] = None) -> pd.DataFrame:
+    """
+        Decodes a range of rows of some columns out of the row batches holding them; see
+        fb_dataframe_to_pandas.
+
+        @param batches: number of rows and columns by name of every row batch.
+        @param columns: names of the columns to return, in order.
+        @param rows: slice of the rows to return, with a positive step; all rows if None.
+        @param total_rows: number of rows of the dataframe.
+        @param read: read(batch, col_name, rows) returns a read-only view of some rows of a column
+            of the batch at that position, or None to decode them.
+    """
+    rows = slice(None) if rows is None else rows
+    if not isinstance(rows, slice):
+        raise TypeError("rows must be a slice")
+    start, stop, step = rows.indices(total_rows)
+    if step <= 0:
+        raise ValueError("rows must be a slice with a positive step")
+
+    parts = []
+    offset = 0
+    for position, (batch_rows, batch_columns) in enumerate(batches):
+        # First row of the range in this row group.
+        first = start + max(-(-(offset - start) // step), 0) * step
+        if first < min(stop, offset + batch_rows) or (not parts and offset + batch_rows >= stop):
+            local_rows = slice(first - offset, max(min(stop, offset + batch_rows) - offset, 0), step)
+            data = {}
+            for col_name in columns:
+                column = batch_columns[col_name]
+                values = None if read is None else read(position, col_name, local_rows)
+                view = values is not None
+                if values is None:
+                    values = column_to_pandas(column, local_rows)
+                    view = (isinstance(values, np.ndarray) and column.Metadata().Dtype() in FIXED_WIDTH_TYPES
+                            and not is_encoded(column))
+                    if view:
+                        values.flags.writeable = False
+                _count_read(column, local_rows, values, zero_copy=view)
+                data[col_name] = values
+            parts.append(pd.DataFrame(data, columns=columns, copy=False))
+            fb_metrics.count(rows_scanned=len(parts[-1]))
+        offset += batch_rows
+        if offset >= stop:
             break
 
-    if grouping_data is None or summing_data is None:
-        raise ValueError("Grouping column or summing column not found")
+    result = parts[0] if len(parts) == 1 else pd.concat(parts, ignore_index=True)
+    result.index = pd.RangeIndex(start, max(start, stop), step)
+    return result
 
-    # Create a temporary DataFrame for performing the groupby sum
-    temp_df = pd.DataFrame({
-        grouping_col_name: grouping_data,
-        sum_col_name: summing_data
-    })
 
-    result_df = temp_df.groupby(grouping_col_name).agg({sum_col_name: 'sum'})
-    return result_df
+def _filter_operand(values: np.ndarray, op: str, value):
+    """
+        Converts the operand of a predicate to the type of the column values: timestamps to the
+        datetime64 unit of DateTime columns (in UTC for tz-aware ones).
+    """
+    if values.dtype.kind != 'M':
+        return value
 
-def fb_dataframe_map_numeric_column(fb_buf: memoryview, col_name: str, map_func: types.FunctionType) -> None:
+    unit = np.datetime_data(values.dtype)[0]
+
+    def convert(timestamp):
+        timestamp = pd.Timestamp(timestamp)
+        if timestamp.tz is not None:
+            timestamp = timestamp.tz_convert(None)
+        return timestamp.to_datetime64().astype(f'datetime64[{unit}]')
+
+    if op in ('in', 'not in', 'between'):
+        return [convert(timestamp) for timestamp in value]
+    return convert(value)
+
+
+def _category_positions(column: Column.Column, col_name: str, op: str, value):
+    """
+        Converts the operand of an ordering predicate on a Categorical column to category positions;
+        categories compare in category order, and only if they are ordered.
+    """
+    if not column.Metadata().Ordered():
+        raise ValueError(f"Column {col_name} is an unordered categorical")
+    positions = {category: code for code, category in enumerate(column_dictionary(column).tolist())}
+    if any(operand not in positions for operand in (value if op == 'between' else [value])):
+        raise ValueError(f"{value} is not a category of column {col_name}")
+    return [positions[operand] for operand in value] if op == 'between' else positions[value]
+
+
+def _column_mask(column: Column.Column, col_name: str, op: str, value, rows: slice = slice(None),
+                 scan: Optional[dict] = None) -> np.ndarray:
+    """
+        Evaluates a predicate over some rows of a column. Missing values, NaNs included, never match.
 
-    dataf = DataFrame.DataFrame.GetRootAs(fb_buf, 0)
-    num_elements = dataf.Columns(0).IntValuesLength() # Get number of elements
-    ele_size = 8
-    if(int.from_bytes(fb_buf[472:472 + ele_size], 'little')<10):
-        start_offset_int = 472
-        start_offset_float = 608
+        @param column: the flatbuffer column.
+        @param col_name: name of the column, for error messages.
+        @param op: the operator; see fb_filter.OPERATORS.
+        @param value: the operand.
+        @param rows: the rows to evaluate.
+        @param scan: cache of the reads of the batch, see _scanned.
+    """
+    dtype = column.Metadata().Dtype()
+    valid = _batch_validity(column, rows, scan)
+    if dtype in CODED_TYPES:
+        # Evaluate the predicate once per distinct value, then look the codes up.
+        dictionary = column_dictionary(column)
+        if dtype == DataType.DataType.Categorical and op in ORDERING_OPERATORS:
+            value = _category_positions(column, col_name, op, value)
+            dictionary = np.arange(len(dictionary))
+        mask = compare(dictionary, op, value)[_batch_codes(column, rows, scan)]
+    elif column.Encoding() == Encoding.Encoding.RunLength:
+        # Evaluate the predicate once per run, then look the runs up.
+        mask = compare(column.IntValuesAsNumpy(), op, value)[run_ids(column, rows)]
+    elif dtype == DataType.DataType.String and op in _EQUALITY_OPERATORS and has_blob(column):
+        # Compare the raw bytes of the values without decoding them.
+        mask = strings_isin(column, [value] if op in ('==', '!=') else value, rows)
+        if op in ('!=', 'not in'):
+            mask = ~mask
     else:
-        start_offset_int = 112
-        start_offset_float = 248
-    for i in range(num_elements):
-        if col_name == 'int_col':
-
-            offset = start_offset_int + i * ele_size
-            org_value = int.from_bytes(fb_buf[offset:offset + ele_size], 'little')
-            print(org_value)
-            modified_value = map_func(org_value)
-            print(modified_value)
-            fb_buf[offset:offset + ele_size] = modified_value.to_bytes(ele_size, 'little', signed=True)
-        elif col_name == 'float_col':
-        
-            offset = start_offset_float + i * ele_size
-            original_value = struct.unpack_from('<d', fb_buf, offset)[0]
-            modified_value = map_func(original_value)
-            struct.pack_into('<d', fb_buf, offset, modified_value)
-    
\ No newline at end of file
+        values = _batch_values(column, rows, scan)
+        if values.dtype == object and valid is not None:
+            values = np.where(valid, values, '')
+        elif values.dtype.kind == 'f':
+            present = ~np.isnan(values)
+            valid = present if valid is None else valid & present
+        mask = compare(values, op, _filter_operand(values, op, value))
+    return mask if valid is None else mask & valid
+
+
+def _stats_operand(column: Column.Column, col_name: str, op: str, value):
+    """
+        Converts the operand of a predicate to the domain of the statistics of a column (see
+        fb_stats): DateTime operands to ticks and categories to their positions. Float32 operands
+        are rounded to float32, as NumPy does when comparing them with the values.
+    """
+    dtype = column.Metadata().Dtype()
+    many = op in ('in', 'not in', 'between')
+    if dtype == DataType.DataType.Categorical:
+        if op in ORDERING_OPERATORS:
+            return _category_positions(column, col_name, op, value)
+        positions = {category: code for code, category in enumerate(column_dictionary(column).tolist())}
+        # Unknown categories never match; None leaves the blocks in for == and !=.
+        return [positions[operand] for operand in value if operand in positions] if many else positions.get(value)
+    elif dtype == DataType.DataType.DateTime:
+        converted = _filter_operand(column_values(column)[:0], op, value)
+        return [int(operand.astype(np.int64)) for operand in converted] if many else int(converted.astype(np.int64))
+    elif dtype == DataType.DataType.Float32:
+        def to_float32(operand):
+            return float(np.float32(operand)) if type(operand) in (int, float) else operand
+        return [to_float32(operand) for operand in value] if many else to_float32(value)
+    return value
+
+
+def _zone_mask(column: Column.Column, col_name: str, op: str, value, zone_size: int, num_zones: int) -> np.ndarray:
+    """
+        Tells, per block of zone_size rows of a column, whether its zone map lets the predicate
+        match any of its rows. Columns without statistics, or with blocks of another size, can't
+        rule any block out.
+    """
+    meta = column.Metadata()
+    if meta.Stats() is None or meta.ZoneSize() != zone_size:
+        return np.ones(num_zones, dtype=bool)
+    operand = _stats_operand(column, col_name, op, value)
+    return np.array([may_match(zone['min'], zone['max'], op, operand) for zone in zone_maps(meta, meta.Dtype())], dtype=bool)
+
+
+def _filters_mask(columns: Dict[str, Column.Column], filters: list, evaluate) -> np.ndarray:
+    """
+        Combines the masks evaluate(column, col_name, op, value) of the predicates of normalized
+        filters: AND within a conjunction, OR across them.
+    """
+    mask = None
+    for conjunction in filters:
+        conjunction_mask = None
+        for col_name, op, value in conjunction:
+            predicate_mask = evaluate(columns[col_name], col_name, op, value)
+            conjunction_mask = predicate_mask if conjunction_mask is None else conjunction_mask & predicate_mask
+        mask = conjunction_mask if mask is None else mask | conjunction_mask
+    return mask
+
+
+@instrumented('filter')
+def fb_dataframe_filter(fb_buf: memoryview, filters: list) -> np.ndarray:
+    """
+        Evaluates filters over a Flatbuffer Dataframe and returns the sorted ids (int64) of the
+        matching rows, a selection vector that fb_dataframe_head and fb_dataframe_group_by accept
+        so non-matching rows are never materialized. Blocks of rows whose zone maps rule the
+        filters out are skipped; on the others, predicates run vectorized over zero-copy column
+        views, and on dictionary encoded and categorical columns they are evaluated once per
+        distinct value. Missing values never match, as in SQL.
+
+        @param fb_buf: buffer holding the Flatbuffer Dataframe, or list of buffers holding its chunks.
+        @param filters: predicates in disjunctive normal form (see fb_filter), e.g.
+            [('a', '>', 1), ('b', 'in', ['x', 'y'])] or [[('a', '<', 0)], [('c', '==', 'z')]].
+            Operators: ==, !=, <, <=, >, >=, in, not in, between.
+    """
+    df = _root(fb_buf)
+    filters = normalize_filters(filters)
+    col_names = list(dict.fromkeys(col_name for conjunction in filters for col_name, _, _ in conjunction))
+
+    selections = []
+    offset = 0
+    for batch, columns in zip(_row_groups(df), _find_columns(df, col_names)):
+        selections.append(_batch_selection(columns, filters, batch.NumRows()) + offset)
+        offset += batch.NumRows()
+    return np.concatenate(selections).astype(np.int64)
+
+
+def _batch_selection(columns: Dict[str, Column.Column], filters: list, rows: int,
+                     scan: Optional[dict] = None) -> np.ndarray:
+    """
+        Evaluates normalized filters over one row batch and returns the ids (int64) of its matching
+        rows, skipping the blocks of rows whose zone maps rule the filters out.
+
+        @param columns: the filtered columns of the batch, by name.
+        @param filters: normalized filters.
+        @param rows: number of rows of the batch.
+        @param scan: cache of the reads of the batch, see _scanned.
+    """
+    zone_size = columns[filters[0][0][0]].Metadata().ZoneSize() or max(rows, 1)
+    num_zones = max(-(-rows // zone_size), 1)
+    with phase('zone_maps'):
+        zones = _filters_mask(columns, filters, lambda column, col_name, op, value:
+                              _zone_mask(column, col_name, op, value, zone_size, num_zones))
+
+    # Evaluate the filters over every run of consecutive blocks that may match.
+    selections = [np.empty(0, dtype=np.int64)]
+    edges = np.flatnonzero(np.diff(np.concatenate(([0], zones.view(np.int8), [0]))))
+    for first, last in zip(edges[0::2].tolist(), edges[1::2].tolist()):
+        span = slice(first * zone_size, min(last * zone_size, rows))
+        fb_metrics.count(rows_scanned=span.stop - span.start)
+        with phase('evaluate'):
+            mask = _filters_mask(columns, filters, lambda column, col_name, op, value:
+                                 _column_mask(column, col_name, op, value, span, scan))
+        selections.append(np.flatnonzero(mask) + span.start)
+    return np.concatenate(selections).astype(np.int64)
+
+
+def _count_read(column: Column.Column, rows, values, zero_copy: Optional[bool] = None) -> None:
+    """
+        Records values read from a column in the metrics of the current operation (see
+        fb_metrics), as zero-copy when they are a view of the buffer; by default, when the column
+        is a plain fixed-width one and rows isn't an array of row ids.
+    """
+    if fb_metrics.is_enabled():
+        if zero_copy is None:
+            zero_copy = (column.Metadata().Dtype() in FIXED_WIDTH_TYPES and not is_encoded(column)
+                         and not isinstance(rows, np.ndarray))
+        nbytes = getattr(values, 'nbytes', 0)
+        fb_metrics.count(**{'bytes_zero_copy' if zero_copy else 'bytes_copied': nbytes})
+
+
+def _scanned(scan: Optional[dict], kind: str, column: Column.Column, rows: Union[slice, np.ndarray], read: Callable):
+    """
+        Returns read(), or what it returned for the same column and rows earlier in the scan.
+        Queries sharing a scan of a row batch (see fb_batch) pass it a dict, so that every column is
+        read once however many of them use it; the dict keeps the row arrays it saw alive, so their
+        ids can't be reused.
+
+        @param scan: cache of the reads of the batch, or None not to cache.
+        @param kind: what read() returns: values, codes or validity.
+        @param column: the column read.
+        @param rows: the rows read, as a slice or an array of row ids.
+        @param read: reads them.
+    """
+    if scan is None:
+        return read()
+    key = (kind, column._tab.Pos, (rows.start, rows.stop, rows.step) if isinstance(rows, slice) else id(rows))
+    if key not in scan:
+        scan[key] = (rows, read())
+    return scan[key][1]
+
+
+def _batch_values(column: Column.Column, rows: Union[slice, np.ndarray], scan: Optional[dict] = None) -> np.ndarray:
+    def read():
+        values = column_values(column, rows)
+        _count_read(column, rows, values)
+        return values
+    return _scanned(scan, 'values', column, rows, read)
+
+
+def _batch_codes(column: Column.Column, rows: Union[slice, np.ndarray], scan: Optional[dict] = None) -> np.ndarray:
+    def read():
+        codes = column_codes(column)[rows]
+        _count_read(column, rows, codes, zero_copy=not isinstance(rows, np.ndarray))
+        return codes
+    return _scanned(scan, 'codes', column, rows, read)
+
+
+def _batch_validity(column: Column.Column, rows: Union[slice, np.ndarray], scan: Optional[dict] = None) -> Optional[np.ndarray]:
+    return _scanned(scan, 'validity', column, rows, lambda: column_validity(column, rows))
+
+
+def _partial_group_by(columns: Dict[str, Column.Column], grouping_col_name: str, aggs: Dict[str, List[str]],
+                      rows: Union[slice, np.ndarray], scan: Optional[dict] = None) -> dict:
+    """
+        Aggregates some rows of one row batch; see fb_groupby.partial_group_by. DictString keys are
+        grouped by their codes and decoded into their strings, Categorical keys are kept as codes.
+
+        @param columns: the grouping and value columns of the batch, by name.
+        @param grouping_col_name: column to group by.
+        @param aggs: normalized aggregation spec.
+        @param rows: the rows of the batch to aggregate, as a slice or an array of row ids.
+        @param scan: cache of the reads of the batch, see _scanned.
+    """
+    grouping_column = columns[grouping_col_name]
+    coded = grouping_column.Metadata().Dtype() in CODED_TYPES
+    with phase('read'):
+        keys = _batch_codes(grouping_column, rows, scan) if coded else _batch_values(grouping_column, rows, scan)
+        values = {col_name: _batch_values(columns[col_name], rows, scan) for col_name in aggs}
+        valid = {col_name: _batch_validity(columns[col_name], rows, scan) for col_name in aggs}
+        valid = {col_name: mask for col_name, mask in valid.items() if mask is not None}
+    fb_metrics.count(rows_scanned=len(keys))
+
+    # Rows with a missing group key are dropped, as Pandas does.
+    key_valid = _batch_validity(grouping_column, rows, scan)
+    if key_valid is not None:
+        keys = keys[key_valid]
+        values = {col_name: column[key_valid] for col_name, column in values.items()}
+        valid = {col_name: mask[key_valid] for col_name, mask in valid.items()}
+
+    with phase('aggregate'):
+        partial = partial_group_by(keys, values, aggs, valid)
+    if grouping_column.Metadata().Dtype() == DataType.DataType.DictString:
+        # Every row group has its own dictionary, so codes are only comparable within a batch.
+        # Dictionaries are sorted, so decoded keys stay in order; only the present ones get decoded.
+        labels = np.empty(len(partial['keys']), dtype=object)
+        labels[:] = [grouping_column.Dictionary(code).decode() for code in partial['keys'].tolist()]
+        partial['keys'] = labels
+    return partial
+
+
+def fb_dataframe_num_rows(fb_buf: memoryview) -> int:
+    """
+        Returns the number of rows of a Flatbuffer Dataframe.
+
+        @param fb_buf: buffer holding the Flatbuffer Dataframe, or list of buffers holding its chunks.
+    """
+    return _root(fb_buf).NumRows()
+
+
+def fb_dataframe_summary(fb_buf: memoryview) -> Tuple[int, int, int]:
+    """
+        Returns the number of rows and columns of a Flatbuffer Dataframe, and a bitmask with bit t
+        set if one of its columns has DataType t.
+
+        @param fb_buf: buffer holding the Flatbuffer Dataframe, or list of buffers holding its chunks.
+    """
+    df = _root(fb_buf)
+    dtypes = 0
+    for i in range(df.ColumnDirectoryLength()):
+        dtypes |= 1 << df.ColumnDirectory(i).Dtype()
+    return df.NumRows(), df.ColumnDirectoryLength(), dtypes
+
+
+def _stats_value(column: Column.Column, value):
+    """
+        Converts a min or max from the domain of the statistics (see fb_stats) to the type Pandas
+        reports it with.
+    """
+    dtype = column.Metadata().Dtype()
+    if value is None:
+        return None
+    elif dtype == DataType.DataType.DateTime:
+        timestamp = pd.Timestamp(np.datetime64(value, np.datetime_data(column_values(column).dtype)[0]))
+        tz = getattr(pandas_dtype(column), 'tz', None)
+        return timestamp if tz is None else timestamp.tz_localize('UTC').tz_convert(tz)
+    elif dtype == DataType.DataType.Categorical:
+        return column.Dictionary(value).decode()
+    elif dtype == DataType.DataType.Bool:
+        return bool(value)
+    return value
+
+
+@instrumented('column_stats')
+def fb_dataframe_column_stats(fb_buf: memoryview, col_name: str) -> dict:
+    """
+        Returns the statistics of a column, read from its metadata without scanning its values:
+        a dict with the number of present values ('count'), missing values ('null_count'), 'min',
+        'max', 'sum' and 'mean' (None where not applicable, as for strings), and the estimated
+        number of distinct values ('nunique', exact up to fb_stats.KMV_SIZE). NaNs count as missing.
+
+        @param fb_buf: buffer holding the Flatbuffer Dataframe, or list of buffers holding its chunks.
+        @param col_name: name of the column.
+    """
+    df = _root(fb_buf)
+    parts = []
+    for columns in _find_columns(df, [col_name]):
+        column = columns[col_name]
+        if column.Metadata().Stats() is None:
+            raise ValueError(f"Column {col_name} has no statistics")
+        parts.append(read_stats(column.Metadata().Stats(), column.Metadata().Dtype()))
+
+    stats = parts[0] if len(parts) == 1 else merge_stats(column.Metadata().Dtype(), parts)
+    count = stats['num_rows'] - stats['null_count']
+    mean = None
+    if stats['float_sum'] is not None:
+        mean = stats['float_sum'] / count if count else np.nan
+    return {
+        'count': count,
+        'null_count': stats['null_count'],
+        'min': _stats_value(column, stats['min']),
+        'max': _stats_value(column, stats['max']),
+        'sum': stats['sum'],
+        'mean': mean,
+        'nunique': round(stats['distinct']),
+    }
+
+
+@instrumented('partial_group_by')
+def fb_dataframe_partial_group_by(fb_buf: memoryview, grouping_col_name: str,
+                                  aggs: Dict[str, Union[str, List[str]]],
+                                  start: int = 0, stop: Optional[int] = None,
+                                  selection: Optional[np.ndarray] = None) -> dict:
+    """
+        Aggregates rows [start, stop) of a Flatbuffer Dataframe into a partial group-by result
+        (see fb_groupby.partial_group_by). Partials of disjoint row ranges, e.g. computed by
+        several processes, are combined with fb_dataframe_merge_group_by.
+
+        @param fb_buf: buffer holding the Flatbuffer Dataframe, or list of buffers holding its chunks.
+        @param grouping_col_name: column to group by.
+        @param aggs: mapping from value column name to one or more of sum, count, min, max, mean.
+        @param start: first row to aggregate.
+        @param stop: end of the rows to aggregate; the last row if None.
+        @param selection: sorted ids of the rows to aggregate (see fb_dataframe_filter), if not all.
+    """
+    df = _root(fb_buf)
+    batches = _find_columns(df, [grouping_col_name] + list(aggs))
+    aggs = normalize_aggs(aggs)
+    stop = df.NumRows() if stop is None else stop
+
+    partials = []
+    offset = 0
+    for columns in batches:
+        rows = num_rows(columns[grouping_col_name])
+        low, high = max(start - offset, 0), min(stop - offset, rows)
+        if low < high and selection is None:
+            partials.append(_partial_group_by(columns, grouping_col_name, aggs, slice(low, high)))
+        elif low < high:
+            first, last = np.searchsorted(selection, [offset + low, offset + high])
+            if first < last:
+                partials.append(_partial_group_by(columns, grouping_col_name, aggs, selection[first:last] - offset))
+        offset += rows
+    if not partials:
+        partials.append(_partial_group_by(batches[0], grouping_col_name, aggs, slice(0, 0)))
+    return merge_partials(partials, aggs)
+
+
+def _pandas_dtype_of(column: Column.Column):
+    """
+        Returns the Pandas dtype of a column: the recorded one, or else the dtype of its values.
+    """
+    recorded_dtype = pandas_dtype(column)
+    return column_values(column, 0).dtype if recorded_dtype is None else recorded_dtype
+
+
+@instrumented('merge_group_by')
+def fb_dataframe_merge_group_by(fb_buf: memoryview, partials: List[dict], grouping_col_name: str,
+                                aggs: Dict[str, Union[str, List[str]]]) -> pd.DataFrame:
+    """
+        Merges partials computed by fb_dataframe_partial_group_by over disjoint row ranges into the
+        result of df.groupby(grouping_col_name).agg(aggs).
+
+        @param fb_buf: buffer(s) holding the Flatbuffer Dataframe the partials were computed on.
+        @param partials: the partial results.
+        @param grouping_col_name: column to group by.
+        @param aggs: the aggregation spec the partials were computed with.
+    """
+    single = {col_name: isinstance(funcs, str) for col_name, funcs in aggs.items()}
+    aggs = normalize_aggs(aggs)
+    df = _root(fb_buf)
+    columns = _find_columns(df, [grouping_col_name] + list(aggs))[0]
+    dtypes = {col_name: _pandas_dtype_of(columns[col_name]) for col_name in aggs}
+    result = finalize_group_by(merge_partials(partials, aggs), grouping_col_name, aggs, single, dtypes)
+
+    grouping_column = columns[grouping_col_name]
+    if grouping_column.Metadata().Dtype() == DataType.DataType.Categorical:
+        # Categoricals are grouped by their integer codes, which follow category order; only the
+        # categories present in the result get decoded. Every row group shares the categories.
+        labels = [grouping_column.Dictionary(code).decode() for code in result.index.tolist()]
+        result.index = pd.Index(labels, dtype=object, name=grouping_col_name)
+    elif grouping_column.Metadata().Dtype() == DataType.DataType.DictString:
+        result.index = pd.Index(result.index, dtype=object, name=grouping_col_name)
+    return result
+
+
+@instrumented('group_by')
+def fb_dataframe_group_by(fb_buf: memoryview, grouping_col_name: str,
+                          aggs: Dict[str, Union[str, List[str]]],
+                          selection: Optional[np.ndarray] = None) -> pd.DataFrame:
+    """
+        Computes df.groupby(grouping_col_name).agg(aggs) directly on a Flatbuffer Dataframe.
+        Numeric columns are read through zero-copy views and every aggregate is computed in a
+        single vectorized pass per row group; see fb_groupby for the engine.
+
+        @param fb_buf: buffer holding the Flatbuffer Dataframe, or list of buffers holding its chunks.
+        @param grouping_col_name: column to group by.
+        @param aggs: mapping from value column name to one or more of sum, count, min, max, mean,
+            e.g. {'a': 'sum', 'b': ['min', 'max']}.
+        @param selection: sorted ids of the rows to aggregate (see fb_dataframe_filter), if not all.
+    """
+    partial = fb_dataframe_partial_group_by(fb_buf, grouping_col_name, aggs, selection=selection)
+    return fb_dataframe_merge_group_by(fb_buf, [partial], grouping_col_name, aggs)
+
+
+def fb_dataframe_group_by_sum(fb_bytes: bytes, grouping_col_name: str, sum_col_name: str) -> pd.DataFrame:
+    return fb_dataframe_group_by(fb_bytes, grouping_col_name, {sum_col_name: 'sum'})
+
+def _apply_map(map_func: types.FunctionType, values: np.ndarray) -> np.ndarray:
+    """
+        Applies map_func to a whole column. NumPy-vectorizable callables and ufuncs are called once
+        on the array; anything else (e.g. functions branching on the value) falls back to one call
+        per element.
+
+        @param map_func: function to apply to the column values.
+        @param values: the column values.
+    """
+    try:
+        result = map_func(values)
+    except (TypeError, ValueError):
+        # The callable can't take an array, e.g. it branches on the value or converts it to a
+        # Python scalar. Any other error is a failure of the callable itself and propagates.
+        result = None
+    if result is None or np.shape(result) != values.shape:
+        result = np.frompyfunc(map_func, 1, 1)(values)
+
+    result = np.asarray(result)
+    if result.dtype == object:
+        result = np.array(result.tolist())
+    return result
+
+
+@instrumented('map')
+def fb_dataframe_map_numeric_column(fb_buf: memoryview, col_name: str, map_func: types.FunctionType) -> None:
+    """
+        Applies map_func to every value of a numeric column, writing the results back into the
+        Flatbuffer Dataframe in place. The value vector of every row group is found through the
+        column directory and mapped as a single NumPy array aliasing the buffer. Does nothing for
+        string columns; raises ValueError for encoded Int columns (see to_flatbuffer).
+
+        @param fb_buf: writable buffer holding the Flatbuffer Dataframe (e.g. a bytearray or shared memory),
+            or list of buffers holding its chunks.
+        @param col_name: name of the numeric column to apply map_func to.
+        @param map_func: function or ufunc to apply to the values of the column.
+    """
+    df = _root(fb_buf)
+    for columns in _find_columns(df, [col_name]):
+        _map_column(columns[col_name], col_name, map_func)
+
+
+def _map_column(column: Column.Column, col_name: str, map_func: types.FunctionType) -> None:
+    dtype = column.Metadata().Dtype()
+    if dtype not in NUMERIC_TYPES:
+        return
+    if is_encoded(column):
+        raise ValueError(f"Column {col_name} is encoded and can't be mapped in place")
+
+    # Bool columns are bit-packed: map the unpacked values and pack the results back.
+    target = column.BoolValuesAsNumpy() if dtype == DataType.DataType.Bool else column_values(column)
+    values = column_values(column)
+    if len(values) == 0:
+        return
+    if not target.flags.writeable:
+        raise ValueError("The Flatbuffer Dataframe is read-only; map needs a writable buffer")
+
+    fb_metrics.count(bytes_zero_copy=target.nbytes, rows_scanned=len(values))
+    try:
+        with phase('apply'):
+            result = _apply_map(map_func, values)
+            if dtype == DataType.DataType.Bool:
+                np.copyto(values, result, casting='same_kind')
+                result = np.packbits(values, bitorder='little')
+            np.copyto(target, result, casting='same_kind')
+    except TypeError:
+        raise TypeError(f"map_func must keep column {col_name} of type {values.dtype}")
+
+    # Keep the statistics and zone maps in line with the new values.
+    meta = column.Metadata()
+    if meta.Stats() is not None:
+        with phase('stats'):
+            stats, zones = compute_stats(dtype, column_values(column), column_validity(column), meta.ZoneSize())
+            rewrite_stats(meta.Stats(), dtype, stats)
+            for i in range(meta.ZoneMapsLength()):
+                rewrite_stats(meta.ZoneMaps(i), dtype, zones[i])
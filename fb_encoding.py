@@ -0,0 +1,189 @@
+"""
+    Lightweight encodings of Int columns.
+
+    Small-range integers don't need 64 bits each: BitPacked stores the values in bit_width bits,
+    FrameOfReference stores their offsets from the column minimum and Delta the differences
+    between consecutive values (sorted ids, timestamps), both bit-packed too, while RunLength
+    stores every run of repeated values once. Bit-packed values are decoded vectorized for any set
+    of rows by gathering the 8 bytes that hold each of them, so a slice or a selection only
+    decodes the rows it holds.
+"""
+import numpy as np
+
+from typing import Optional
+
+from CS598 import Column
+from CS598 import Encoding
+
+
+# Encoding names accepted by to_flatbuffer -> Encoding.
+ENCODINGS = {
+    'bit_packed': Encoding.Encoding.BitPacked,
+    'frame_of_reference': Encoding.Encoding.FrameOfReference,
+    'run_length': Encoding.Encoding.RunLength,
+    'delta': Encoding.Encoding.Delta,
+}
+
+# Widest bit-packed value: a value and its offset within its first byte fit in a uint64.
+MAX_BIT_WIDTH = 56
+
+# Bit-packed vectors end with this many zero bytes, so every value can be read as 8 bytes.
+_PADDING = 7
+
+# Values packed at a time; a multiple of 8, so that every chunk starts on a byte boundary.
+_PACK_CHUNK = 1 << 16
+
+
+def _pack(offsets: np.ndarray, bit_width: int) -> np.ndarray:
+    """
+        Packs uint64 values of bit_width bits, least significant bit first, and pads the result.
+    """
+    parts = []
+    if bit_width > 0:
+        for start in range(0, len(offsets), _PACK_CHUNK):
+            chunk = np.ascontiguousarray(offsets[start:start + _PACK_CHUNK], dtype='<u8')
+            bits = np.unpackbits(chunk.view(np.uint8).reshape(-1, 8), axis=1, bitorder='little')
+            parts.append(np.packbits(bits[:, :bit_width], bitorder='little'))
+    parts.append(np.zeros(_PADDING, dtype=np.uint8))
+    return np.concatenate(parts)
+
+
+def _unpack(packed: np.ndarray, bit_width: int, rows: np.ndarray) -> np.ndarray:
+    """
+        Returns the uint64 values of the given rows out of a vector written by _pack.
+    """
+    if bit_width == 0:
+        return np.zeros(len(rows), dtype=np.uint64)
+    bits = rows.astype(np.uint64) * np.uint64(bit_width)
+    # Row i of windows are the 8 bytes starting at byte i of the vector.
+    windows = np.lib.stride_tricks.as_strided(packed, shape=(max(len(packed) - _PADDING, 0), 8),
+                                              strides=(packed.strides[0], packed.strides[0]), writeable=False)
+    words = np.ascontiguousarray(windows[bits >> np.uint64(3)]).view('<u8').ravel()
+    return (words >> (bits & np.uint64(7))) & np.uint64((1 << bit_width) - 1)
+
+
+def _row_ids(rows, total: int) -> np.ndarray:
+    """
+        Converts a row selection (see fb_column.column_values) to an array of row ids.
+    """
+    if rows is None:
+        return np.arange(total)
+    elif isinstance(rows, (int, np.integer)):
+        return np.arange(min(rows, total))
+    elif isinstance(rows, slice):
+        return np.arange(*rows.indices(total))
+    rows = np.asarray(rows, dtype=np.int64)
+    return np.where(rows < 0, rows + total, rows)
+
+
+def _span(low: int, high: int) -> Optional[int]:
+    """
+        Returns the bit width needed for the offsets of values in [low, high], or None if too wide.
+    """
+    bit_width = (high - low).bit_length()
+    return bit_width if bit_width <= MAX_BIT_WIDTH else None
+
+
+def _packed_size(num_values: int, bit_width: Optional[int]) -> Optional[int]:
+    return None if bit_width is None else -(-num_values * bit_width // 8) + _PADDING
+
+
+def encode_integers(values: np.ndarray, encoding: str) -> Optional[dict]:
+    """
+        Encodes the values of an Int column. Returns the contents to write into its Column, a dict
+        with 'scalars': Column field -> value and 'vectors': Column field -> (NumPy array,
+        little-endian dtype), or None if the values are best, or can only be, stored plain.
+
+        @param values: the int64 values.
+        @param encoding: one of ENCODINGS, or 'auto' for the smallest of them if any is smaller
+            than the plain values.
+    """
+    if encoding != 'auto' and encoding not in ENCODINGS:
+        raise ValueError(f"Unsupported encoding: {encoding}")
+    values = np.asarray(values, dtype=np.int64)
+    if len(values) == 0:
+        return None
+
+    low, high = int(values.min()), int(values.max())
+    # Differences wrap around like int64, as does decoding them.
+    deltas = np.diff(values.view(np.uint64)).view(np.int64)
+    delta_low, delta_high = (int(deltas.min()), int(deltas.max())) if len(deltas) else (0, 0)
+    num_runs = 1 + int(np.count_nonzero(deltas))
+
+    bit_widths = {
+        'bit_packed': _span(0, high) if low >= 0 else None,
+        'frame_of_reference': _span(low, high),
+        'delta': _span(delta_low, delta_high),
+    }
+    sizes = {
+        'bit_packed': _packed_size(len(values), bit_widths['bit_packed']),
+        'frame_of_reference': _packed_size(len(values), bit_widths['frame_of_reference']),
+        'delta': _packed_size(len(deltas), bit_widths['delta']),
+        'run_length': 16 * num_runs,
+    }
+    if encoding == 'auto':
+        candidates = [(size, name) for name, size in sizes.items() if size is not None and size < 8 * len(values)]
+        if not candidates:
+            return None
+        encoding = min(candidates, key=lambda candidate: candidate[0])[1]
+    elif sizes[encoding] is None:
+        return None
+
+    scalars = {'Encoding': ENCODINGS[encoding]}
+    if encoding == 'run_length':
+        ends = np.append(np.flatnonzero(deltas) + 1, len(values))
+        return {'scalars': scalars, 'vectors': {'IntValues': (values[ends - 1], '<i8'), 'RunEnds': (ends, '<i8')}}
+
+    scalars['BitWidth'] = bit_widths[encoding]
+    if encoding == 'delta':
+        scalars['Reference'] = delta_low
+        scalars['Base'] = int(values[0])
+        offsets = deltas.view(np.uint64) - np.uint64(delta_low & ((1 << 64) - 1))
+    else:
+        scalars['Reference'] = low if encoding == 'frame_of_reference' else 0
+        offsets = values.view(np.uint64) - np.uint64(scalars['Reference'] & ((1 << 64) - 1))
+    return {'scalars': scalars, 'vectors': {'PackedValues': (_pack(offsets, scalars['BitWidth']), '<u1')}}
+
+
+def is_encoded(column: Column.Column) -> bool:
+    """
+        Tells whether the values of a column are stored with one of the encodings.
+
+        @param column: the flatbuffer column.
+    """
+    return column.Encoding() != Encoding.Encoding.Plain
+
+
+def run_ids(column: Column.Column, rows=None) -> np.ndarray:
+    """
+        Returns, for the selected rows of a RunLength column, the index of the run holding them,
+        i.e. of their value in int_values.
+
+        @param column: the flatbuffer column.
+        @param rows: number of leading rows, array of row ids or slice of them; all rows if None.
+    """
+    return np.searchsorted(column.RunEndsAsNumpy(), _row_ids(rows, column.NumRows()), side='right')
+
+
+def decode_integers(column: Column.Column, rows=None) -> np.ndarray:
+    """
+        Decodes the selected values of an encoded Int column into an int64 array.
+
+        @param column: the flatbuffer column.
+        @param rows: number of leading rows, array of row ids or slice of them; all rows if None.
+    """
+    encoding = column.Encoding()
+    if encoding == Encoding.Encoding.RunLength:
+        return column.IntValuesAsNumpy()[run_ids(column, rows)]
+
+    row_ids = _row_ids(rows, column.NumRows())
+    packed = column.PackedValuesAsNumpy()
+    reference = np.uint64(column.Reference() & ((1 << 64) - 1))
+    if encoding != Encoding.Encoding.Delta:
+        return (_unpack(packed, column.BitWidth(), row_ids) + reference).view(np.int64)
+
+    # Prefix sums of the differences, up to the last selected row.
+    count = int(row_ids.max()) if len(row_ids) else 0
+    deltas = _unpack(packed, column.BitWidth(), np.arange(count)) + reference
+    prefix = np.concatenate(([np.uint64(column.Base() & ((1 << 64) - 1))], deltas))
+    return np.cumsum(prefix, dtype=np.uint64).view(np.int64)[row_ids]
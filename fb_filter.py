@@ -0,0 +1,111 @@
+"""
+    Vectorized row filters over NumPy column views.
+
+    Filters are written in the disjunctive normal form used by pyarrow and pandas.read_parquet:
+    a predicate is a (column name, op, value) tuple, a list of predicates is their AND, and a list
+    of such lists is the OR of them, e.g. [[('a', '>', 1), ('b', 'in', ['x', 'y'])], [('c', '==', 0)]].
+"""
+import numpy as np
+
+from typing import Any, List, Tuple
+
+
+OPERATORS = ('==', '!=', '<', '<=', '>', '>=', 'in', 'not in', 'between')
+
+# Operators that depend on the order of the values.
+ORDERING_OPERATORS = frozenset(('<', '<=', '>', '>=', 'between'))
+
+
+def normalize_filters(filters: list) -> List[List[Tuple[str, str, Any]]]:
+    """
+        Validates filters and returns them as a list of conjunctions (lists of predicates).
+
+        @param filters: a list of predicates, or a list of lists of predicates.
+    """
+    if not filters:
+        raise ValueError("At least one predicate is required")
+    if all(isinstance(predicate, tuple) for predicate in filters):
+        filters = [filters]
+
+    normalized = []
+    for conjunction in filters:
+        if not conjunction:
+            raise ValueError("Empty conjunction in filters")
+        for predicate in conjunction:
+            if not isinstance(predicate, tuple) or len(predicate) != 3:
+                raise ValueError(f"Predicates are (column, op, value) tuples, got {predicate!r}")
+            col_name, op, value = predicate
+            if op not in OPERATORS:
+                raise ValueError(f"Unsupported operator: {op}")
+            if op == 'between' and (not isinstance(value, (tuple, list)) or len(value) != 2):
+                raise ValueError("between takes a (low, high) pair")
+            if op in ('in', 'not in') and isinstance(value, str):
+                raise ValueError(f"{op} takes a collection of values")
+        normalized.append(list(conjunction))
+    return normalized
+
+
+def compare(values: np.ndarray, op: str, value: Any) -> np.ndarray:
+    """
+        Evaluates a predicate over an array. Returns a boolean mask of the matching values.
+
+        @param values: the column values.
+        @param op: one of OPERATORS.
+        @param value: the operand; a collection for in / not in, a (low, high) pair for between
+            (both ends included, as Series.between).
+    """
+    if op == '==':
+        mask = values == value
+    elif op == '!=':
+        mask = values != value
+    elif op == '<':
+        mask = values < value
+    elif op == '<=':
+        mask = values <= value
+    elif op == '>':
+        mask = values > value
+    elif op == '>=':
+        mask = values >= value
+    elif op == 'between':
+        low, high = value
+        mask = (values >= low) & (values <= high)
+    else:
+        mask = np.isin(values, list(value))
+        if op == 'not in':
+            mask = ~mask
+    return np.asarray(mask, dtype=bool)
+
+
+def may_match(low: Any, high: Any, op: str, value: Any) -> bool:
+    """
+        Tells whether a predicate can match any value of a block whose present values lie in
+        [low, high], e.g. from its zone map. False means the block can be skipped; operands that
+        don't compare with the bounds never rule a block out.
+
+        @param low: smallest present value of the block, or None if every value is missing.
+        @param high: largest present value of the block.
+        @param op: one of OPERATORS.
+        @param value: the operand, in the domain of low and high.
+    """
+    if low is None:
+        return False
+    try:
+        if op == '==':
+            return bool(low <= value <= high)
+        elif op == '!=':
+            return not (low == high == value)
+        elif op == '<':
+            return bool(low < value)
+        elif op == '<=':
+            return bool(low <= value)
+        elif op == '>':
+            return bool(high > value)
+        elif op == '>=':
+            return bool(high >= value)
+        elif op == 'between':
+            return bool(value[0] <= high and low <= value[1])
+        elif op == 'in':
+            return any(low <= operand <= high for operand in value)
+        return not (low == high and low in list(value))
+    except TypeError:
+        return True
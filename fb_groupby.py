@@ -0,0 +1,297 @@
+"""
+    Vectorized GROUP BY engine over NumPy column views.
+
+    Aggregation happens in three steps so that work can be split across row ranges:
+    partial_group_by() aggregates one slice of the rows, merge_partials() combines the partials of
+    several slices, and finalize_group_by() turns the merged partial into a Pandas Dataframe shaped
+    like df.groupby(grouping_col_name).agg(aggs).
+"""
+import functools
+import numpy as np
+import pandas as pd
+
+from typing import Dict, List, Optional, Union
+
+
+AGGREGATES = ('sum', 'count', 'min', 'max', 'mean')
+
+# Integer keys spanning at most this many values (or 2x the row count, if larger) are grouped
+# with a dense bincount over key - min instead of sorting.
+DENSE_KEY_SPAN = 1 << 16
+
+# Largest magnitude a float64 holds exactly; integer sums below it can go through bincount.
+_EXACT_FLOAT_INT = 1 << 53
+
+
+def normalize_aggs(aggs: Dict[str, Union[str, List[str]]]) -> Dict[str, List[str]]:
+    """
+        Validates an aggregation spec such as {'a': 'sum', 'b': ['min', 'max']} and returns it
+        with every value as a list of aggregate names.
+
+        @param aggs: mapping from value column name to one or more aggregate names.
+    """
+    if not aggs:
+        raise ValueError("At least one aggregate is required")
+
+    normalized = {}
+    for col_name, funcs in aggs.items():
+        funcs = [funcs] if isinstance(funcs, str) else list(funcs)
+        for func in funcs:
+            if func not in AGGREGATES:
+                raise ValueError(f"Unsupported aggregate: {func}")
+        normalized[col_name] = funcs
+    return normalized
+
+
+def _group_codes(keys: np.ndarray):
+    """
+        Maps every key to the bin of its group. Returns (bin_keys, codes): bin_keys[codes[i]] is
+        the key of row i. Dense integer grouping may leave bins without rows; callers drop them
+        using the per-bin row counts.
+    """
+    if keys.dtype.kind in 'iu' and len(keys) > 0:
+        key_min, key_max = int(keys.min()), int(keys.max())
+        span = key_max - key_min + 1
+        if span <= max(DENSE_KEY_SPAN, 2 * len(keys)):
+            # Subtract in 64 bits: the span of narrow keys may not fit their own type.
+            wide = np.uint64 if keys.dtype.kind == 'u' else np.int64
+            codes = (keys.astype(wide, copy=False) - wide(key_min)).astype(np.intp, copy=False)
+            return np.arange(key_min, key_max + 1, dtype=keys.dtype), codes
+
+    bin_keys, codes = np.unique(keys, return_inverse=True)
+    return bin_keys, codes.reshape(-1)
+
+
+def _sum(codes: np.ndarray, values: np.ndarray, num_bins: int) -> np.ndarray:
+    if values.dtype.kind in 'mM':
+        raise ValueError("Cannot sum datetime values")
+    if values.dtype.kind in 'iub':
+        # Unsigned columns sum to uint64 and the others to int64, both wrapping like Pandas' sums.
+        wide = np.uint64 if values.dtype.kind == 'u' else np.int64
+        if len(values) == 0:
+            return np.zeros(num_bins, dtype=wide)
+        bound = max(abs(int(values.min())), abs(int(values.max())))
+        if bound * len(values) < _EXACT_FLOAT_INT:
+            return np.bincount(codes, weights=values, minlength=num_bins).astype(wide)
+        sums = np.zeros(num_bins, dtype=wide)
+        np.add.at(sums, codes, values.astype(wide, copy=False))
+        return sums
+    return np.bincount(codes, weights=values, minlength=num_bins)
+
+
+def _float_sum(codes: np.ndarray, values: np.ndarray, num_bins: int) -> np.ndarray:
+    if values.dtype.kind in 'mM':
+        raise ValueError("Cannot sum datetime values")
+    return np.bincount(codes, weights=values.astype(np.float64, copy=False), minlength=num_bins)
+
+
+def _extreme(codes: np.ndarray, values: np.ndarray, num_bins: int, func: str) -> np.ndarray:
+    if values.dtype.kind in 'bmM':
+        # Reduce bools as uint8 and datetimes as their int64 ticks.
+        base = np.uint8 if values.dtype.kind == 'b' else np.int64
+        return _extreme(codes, values.view(base), num_bins, func).view(values.dtype)
+
+    ufunc = np.minimum if func == 'min' else np.maximum
+    if values.dtype.kind == 'f':
+        out = np.full(num_bins, np.inf if func == 'min' else -np.inf, dtype=values.dtype)
+    else:
+        info = np.iinfo(values.dtype)
+        out = np.full(num_bins, info.max if func == 'min' else info.min, dtype=values.dtype)
+    ufunc.at(out, codes, values)
+    return out
+
+
+def _aggregate(codes: np.ndarray, values: np.ndarray, num_bins: int, funcs: List[str],
+               valid: Optional[np.ndarray] = None) -> dict:
+    """
+        Computes the per-bin states needed by funcs for one value column. Missing values (NaN, or
+        cleared in valid) are skipped, as Pandas does.
+    """
+    if values.dtype.kind == 'f':
+        not_nan = ~np.isnan(values)
+        valid = not_nan if valid is None else valid & not_nan
+    if valid is not None and not valid.all():
+        codes, values = codes[valid], values[valid]
+
+    states = {'count': np.bincount(codes, minlength=num_bins)}
+    if 'sum' in funcs:
+        states['sum'] = _sum(codes, values, num_bins)
+    if 'mean' in funcs:
+        # Integer sums wrap around like Pandas' do; means divide a float64 sum instead.
+        states['float_sum'] = _float_sum(codes, values, num_bins)
+    for func in ('min', 'max'):
+        if func in funcs:
+            states[func] = _extreme(codes, values, num_bins, func)
+    return states
+
+
+def partial_group_by(keys: np.ndarray, values: Dict[str, np.ndarray], aggs: Dict[str, List[str]],
+                     valid: Optional[Dict[str, np.ndarray]] = None) -> dict:
+    """
+        Aggregates one slice of rows. Returns a partial holding the group keys that occur in the
+        slice and, per value column, the count/sum/float_sum/min/max states of every group.
+
+        @param keys: grouping column values.
+        @param values: value column name -> column values, each as long as keys.
+        @param aggs: normalized aggregation spec (see normalize_aggs).
+        @param valid: value column name -> boolean mask of its present values, for nullable columns.
+    """
+    valid = dict(valid or {})
+    if keys.dtype.kind in 'fM':
+        # Pandas drops rows whose group key is NaN / NaT.
+        present = ~np.isnan(keys)
+        if not present.all():
+            keys = keys[present]
+            values = {col_name: column[present] for col_name, column in values.items()}
+            valid = {col_name: mask[present] for col_name, mask in valid.items()}
+
+    bin_keys, codes = _group_codes(keys)
+    num_bins = len(bin_keys)
+    group_sizes = np.bincount(codes, minlength=num_bins)
+    present = group_sizes > 0
+
+    states = {}
+    for col_name, funcs in aggs.items():
+        if values[col_name].dtype == object and funcs != ['count']:
+            raise ValueError(f"Column {col_name} is not numeric")
+        col_states = _aggregate(codes, values[col_name], num_bins, funcs, valid.get(col_name))
+        if not present.all():
+            col_states = {state: array[present] for state, array in col_states.items()}
+        states[col_name] = col_states
+
+    return {'keys': bin_keys[present], 'states': states}
+
+
+def merge_partials(partials: List[dict], aggs: Dict[str, List[str]]) -> dict:
+    """
+        Combines partials computed over disjoint row slices into a single partial.
+
+        @param partials: partials returned by partial_group_by.
+        @param aggs: normalized aggregation spec the partials were computed with.
+    """
+    if len(partials) == 1:
+        return partials[0]
+
+    bin_keys, codes = np.unique(np.concatenate([partial['keys'] for partial in partials]), return_inverse=True)
+    codes = codes.reshape(-1)
+    num_bins = len(bin_keys)
+
+    states = {}
+    for col_name in aggs:
+        col_states = {}
+        for state in partials[0]['states'][col_name]:
+            stacked = np.concatenate([partial['states'][col_name][state] for partial in partials])
+            if state == 'count':
+                col_states[state] = np.bincount(codes, weights=stacked, minlength=num_bins).astype(np.int64)
+            elif state == 'float_sum':
+                col_states[state] = np.bincount(codes, weights=stacked, minlength=num_bins)
+            elif state == 'sum':
+                col_states[state] = _sum(codes, stacked, num_bins)
+            else:
+                col_states[state] = _extreme(codes, stacked, num_bins, state)
+        states[col_name] = col_states
+
+    return {'keys': bin_keys, 'states': states}
+
+
+@functools.lru_cache(maxsize=None)
+def _pandas_result_dtype(dtype, func: str):
+    """
+        Returns the dtype Pandas gives the func aggregate of a column of the given dtype. It varies
+        across Pandas versions (e.g. for counts of nullable columns), so an empty column is grouped.
+    """
+    empty = pd.DataFrame({'key': np.empty(0, dtype=np.int64), 'value': pd.Series([], dtype=dtype)})
+    return empty.groupby('key').agg({'value': func})['value'].dtype
+
+
+def _to_pandas_result(result: np.ndarray, missing: np.ndarray, dtype, func: str):
+    """
+        Converts the per-group values of an aggregate to the dtype Pandas gives it for a value
+        column of the given dtype. Groups in missing (that have no values to take a min, max or
+        mean of) become NA, NaN or NaT, as in that dtype.
+    """
+    target = _pandas_result_dtype(dtype, func)
+    if isinstance(target, pd.DatetimeTZDtype):
+        values = pd.array(np.where(missing, np.datetime64('NaT'), result))
+        return values.tz_localize('UTC').tz_convert(target.tz).astype(target)
+
+    masked = isinstance(target, pd.api.extensions.ExtensionDtype)
+    numpy_target = target.numpy_dtype if masked else target
+    if func == 'sum' and numpy_target.kind in 'iu' and numpy_target.itemsize < 8 and len(result):
+        # Pandas sums narrow integers in 64 bits and only casts back to their dtype if every sum fits.
+        info = np.iinfo(numpy_target)
+        if result.min() < info.min or result.max() > info.max:
+            signed = numpy_target.kind == 'i'
+            numpy_target = np.dtype(np.int64 if signed else np.uint64)
+            target = (pd.Int64Dtype() if signed else pd.UInt64Dtype()) if masked else numpy_target
+
+    if masked:
+        values = pd.array(result.astype(numpy_target), dtype=target)
+        if missing.any():
+            values[missing] = pd.NA
+        return values
+    elif missing.any():
+        result = np.where(missing, np.datetime64('NaT') if result.dtype.kind == 'M' else np.nan, result)
+    return result.astype(target, copy=False)
+
+
+def finalize_group_by(partial: dict, grouping_col_name: str, aggs: Dict[str, List[str]],
+                      single: Dict[str, bool] = None, dtypes: Optional[Dict[str, object]] = None) -> pd.DataFrame:
+    """
+        Builds the result Dataframe from a merged partial. Columns are named like the output of
+        df.groupby(grouping_col_name).agg(aggs): a column given a single aggregate name keeps its
+        own name, otherwise the columns form a (column, aggregate) MultiIndex.
+
+        @param partial: the merged partial.
+        @param grouping_col_name: name of the grouping column, used as the index name.
+        @param aggs: normalized aggregation spec.
+        @param single: column name -> whether its aggregate was given as a plain string.
+        @param dtypes: value column name -> its Pandas dtype; every aggregate gets the dtype Pandas
+            gives it for that column. Aggregates keep the dtypes of the partial's states if None.
+    """
+    results = {}
+    for col_name, funcs in aggs.items():
+        col_states = partial['states'][col_name]
+        count = col_states['count']
+        for func in funcs:
+            if func == 'count':
+                result = count.astype(np.int64)
+            elif func == 'sum':
+                result = col_states['sum']
+            elif func == 'mean':
+                with np.errstate(invalid='ignore', divide='ignore'):
+                    result = col_states['float_sum'] / count
+            else:
+                result = col_states[func]
+            # Groups whose values are all missing have no min, max or mean.
+            missing = (count == 0) if func in ('min', 'max', 'mean') else np.zeros(len(count), dtype=bool)
+            if dtypes is not None:
+                result = _to_pandas_result(result, missing, dtypes[col_name], func)
+            elif missing.any():
+                result = np.where(missing, np.datetime64('NaT') if result.dtype.kind == 'M' else np.nan, result)
+            results[(col_name, func)] = result
+
+    index = pd.Index(partial['keys'], name=grouping_col_name)
+    if single is not None and all(single.get(col_name, False) for col_name in aggs):
+        return pd.DataFrame({col_name: results[(col_name, funcs[0])] for col_name, funcs in aggs.items()}, index=index)
+
+    columns = pd.MultiIndex.from_tuples(list(results.keys()))
+    return pd.DataFrame(dict(zip(columns, results.values())), index=index, columns=columns)
+
+
+def group_by(keys: np.ndarray, values: Dict[str, np.ndarray], grouping_col_name: str,
+             aggs: Dict[str, Union[str, List[str]]], valid: Optional[Dict[str, np.ndarray]] = None) -> pd.DataFrame:
+    """
+        Computes df.groupby(grouping_col_name).agg(aggs) over column arrays in a single pass.
+
+        @param keys: grouping column values.
+        @param values: value column name -> column values.
+        @param grouping_col_name: name of the grouping column.
+        @param aggs: mapping from value column name to one or more of sum, count, min, max, mean.
+        @param valid: value column name -> boolean mask of its present values, for nullable columns.
+    """
+    single = {col_name: isinstance(funcs, str) for col_name, funcs in aggs.items()}
+    aggs = normalize_aggs(aggs)
+    partial = partial_group_by(keys, values, aggs, valid)
+    dtypes = {col_name: values[col_name].dtype for col_name in aggs}
+    return finalize_group_by(partial, grouping_col_name, aggs, single, dtypes)
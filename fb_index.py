@@ -0,0 +1,297 @@
+"""
+    Secondary indexes over a column of a Flatbuffer Dataframe.
+
+    An index is a flatbuffer of its own (see index.fbs) holding a sorted index, a hash index or
+    both. The sorted index is the permutation of the row ids that orders the column; equality and
+    range lookups binary search it in O(log n) value reads. The hash index groups the row ids by
+    the hash of their value, CSR style, and answers equality lookups in O(1) expected time. Both
+    only hold row ids: lookups read the values they need from the dataframe itself. FbSharedMemory
+    stores the indexes of a dataframe next to it.
+"""
+import bisect
+import flatbuffers
+import numpy as np
+import pandas as pd
+
+from typing import Iterable, List, Tuple
+
+from CS598 import ColumnIndex
+from CS598 import DataType
+from fb_column import CODED_TYPES, FIXED_WIDTH_TYPES, column_codes, column_validity, column_values, num_rows
+from fb_dataframe import _filter_operand, _find_columns, _root
+from fb_strings import has_blob, hash_strings, string_hashes
+
+
+INDEX_KINDS = ('sorted', 'hash')
+
+# Column types a hash index can be built on: integers, DateTime ticks and strings.
+HASH_TYPES = (frozenset(FIXED_WIDTH_TYPES) - {DataType.DataType.Float, DataType.DataType.Float32}
+              | {DataType.DataType.String} | CODED_TYPES)
+
+# Column types a sorted index can be built on.
+SORTED_TYPES = frozenset(FIXED_WIDTH_TYPES) | {DataType.DataType.String, DataType.DataType.DictString}
+
+# Boundaries included by index_range, as in Series.between.
+INCLUSIVE = ('both', 'neither', 'left', 'right')
+
+# vtable slot of ColumnIndex.frame_version.
+_FRAME_VERSION = 6
+
+
+class _ColumnReader:
+    """
+        Reads the values of a column by row id, across the row groups of a Flatbuffer Dataframe.
+    """
+    def __init__(self, fb_buf: memoryview, col_name: str):
+        df = _root(fb_buf)
+        self.col_name = col_name
+        self.columns = [columns[col_name] for columns in _find_columns(df, [col_name])]
+        self.dtype = self.columns[0].Metadata().Dtype()
+        self.offsets = np.cumsum([0] + [num_rows(column) for column in self.columns]).tolist()
+        self.blob = self.dtype == DataType.DataType.String and all(has_blob(column) for column in self.columns)
+        # Row groups and appended chunks may store the same strings as String or DictString.
+        self.kinds = [column.Metadata().Dtype() for column in self.columns]
+        self.vectors = [self._vector(column, kind) for column, kind in zip(self.columns, self.kinds)]
+
+    @staticmethod
+    def _vector(column, kind: int):
+        if kind in FIXED_WIDTH_TYPES:
+            return column_values(column)
+        elif kind in CODED_TYPES:
+            return column_codes(column)
+        elif has_blob(column):
+            return column.StringOffsetsAsNumpy(), memoryview(column.StringBlobAsNumpy())
+        return None
+
+    def values(self) -> Tuple[np.ndarray, np.ndarray]:
+        """
+            Returns the values of every row and a mask of the present ones (NaNs are missing).
+        """
+        values = np.concatenate([column_values(column) for column in self.columns])
+        valid = [column_validity(column) for column in self.columns]
+        valid = np.concatenate([np.ones(num_rows(column), dtype=bool) if mask is None else mask
+                                for column, mask in zip(self.columns, valid)])
+        if values.dtype.kind == 'f':
+            valid &= ~np.isnan(values)
+        return values, valid
+
+    def value(self, row: int):
+        """
+            Returns the value of one row.
+        """
+        batch = bisect.bisect_right(self.offsets, row) - 1
+        row -= self.offsets[batch]
+        kind, vector = self.kinds[batch], self.vectors[batch]
+        if kind in FIXED_WIDTH_TYPES:
+            return vector[row]
+        elif kind in CODED_TYPES:
+            return self.columns[batch].Dictionary(vector[row]).decode()
+        elif vector is not None:
+            offsets, blob = vector
+            return str(blob[offsets[row]:offsets[row + 1]], 'utf-8')
+        return self.columns[batch].StringValues(row).decode()
+
+    def take(self, rows: np.ndarray) -> np.ndarray:
+        """
+            Returns the values of the given rows, which must be sorted.
+        """
+        bounds = np.searchsorted(rows, self.offsets).tolist()
+        return np.concatenate([column_values(column, rows[bounds[i]:bounds[i + 1]] - self.offsets[i])
+                               for i, column in enumerate(self.columns)])
+
+    def operand(self, value):
+        """
+            Converts a lookup value to the type of the column values; timestamps to datetime64.
+        """
+        if self.dtype == DataType.DataType.DateTime:
+            return _filter_operand(self.vectors[0][:0], '==', value)
+        return value
+
+    def hash(self, values: np.ndarray) -> np.ndarray:
+        """
+            Hashes values of the column; strings by their UTF-8 bytes, as row_hashes does.
+        """
+        if self.dtype == DataType.DataType.String:
+            return hash_strings(values.tolist())
+        elif values.dtype.kind == 'M':
+            values = values.view(np.int64)
+        return pd.util.hash_array(values)
+
+    def row_hashes(self, rows: np.ndarray, values: np.ndarray) -> np.ndarray:
+        """
+            Hashes the values of the given rows; those of String columns in the blob layout are
+            hashed in place, without decoding them.
+        """
+        if self.blob:
+            return np.concatenate([string_hashes(column) for column in self.columns])[rows]
+        return self.hash(values)
+
+
+def build_index(fb_buf: memoryview, col_name: str, kinds: Iterable[str] = INDEX_KINDS, frame_version: int = 0) -> bytes:
+    """
+        Builds an index over a column of a Flatbuffer Dataframe and returns it serialized.
+
+        @param fb_buf: buffer holding the Flatbuffer Dataframe, or list of buffers holding its chunks.
+        @param col_name: name of the column to index.
+        @param kinds: 'sorted' (equality and range lookups) and/or 'hash' (equality lookups).
+        @param frame_version: version of the dataframe to record in the index, see FbSharedMemory.
+    """
+    kinds = [kinds] if isinstance(kinds, str) else list(kinds)
+    if not kinds:
+        raise ValueError("At least one index kind is required")
+    reader = _ColumnReader(fb_buf, col_name)
+    for kind in kinds:
+        if kind not in INDEX_KINDS:
+            raise ValueError(f"Unsupported index kind: {kind}")
+        if reader.dtype not in (SORTED_TYPES if kind == 'sorted' else HASH_TYPES):
+            raise ValueError(f"Can't build a {kind} index on column {col_name}")
+
+    values, valid = reader.values()
+    rows = np.flatnonzero(valid)
+    values = values[rows]
+
+    builder = flatbuffers.Builder(1024)
+    vectors = {}
+    if 'sorted' in kinds:
+        order = rows[np.argsort(values, kind='stable')]
+        vectors['Order'] = builder.CreateNumpyVector(order.astype('<i8'))
+    if 'hash' in kinds:
+        num_buckets = 1 << max(len(rows) - 1, 0).bit_length()
+        buckets = (reader.row_hashes(rows, values) & np.uint64(num_buckets - 1)).astype(np.int64)
+        offsets = np.concatenate(([0], np.cumsum(np.bincount(buckets, minlength=num_buckets))))
+        vectors['BucketOffsets'] = builder.CreateNumpyVector(offsets.astype('<i8'))
+        vectors['BucketRows'] = builder.CreateNumpyVector(rows[np.argsort(buckets, kind='stable')].astype('<i8'))
+    column = builder.CreateString(col_name)
+
+    ColumnIndex.Start(builder)
+    ColumnIndex.AddColumn(builder, column)
+    # Always written, so that it can be updated in place.
+    builder.ForceDefaults(True)
+    ColumnIndex.AddFrameVersion(builder, frame_version)
+    builder.ForceDefaults(False)
+    ColumnIndex.AddNumRows(builder, reader.offsets[-1])
+    for field, vector in vectors.items():
+        getattr(ColumnIndex, 'Add' + field)(builder, vector)
+    builder.Finish(ColumnIndex.End(builder))
+    return builder.Output()
+
+
+def index_kinds(index_buf: memoryview) -> List[str]:
+    """
+        Returns the kinds of index held by a serialized index.
+
+        @param index_buf: buffer holding the index.
+    """
+    index = ColumnIndex.ColumnIndex.GetRootAs(index_buf, 0)
+    return [kind for kind, missing in zip(INDEX_KINDS, (index.OrderIsNone(), index.BucketOffsetsIsNone())) if not missing]
+
+
+def index_frame_version(index_buf: memoryview) -> int:
+    """
+        Returns the dataframe version recorded in a serialized index.
+
+        @param index_buf: buffer holding the index.
+    """
+    return ColumnIndex.ColumnIndex.GetRootAs(index_buf, 0).FrameVersion()
+
+
+def set_index_frame_version(index_buf: memoryview, frame_version: int) -> None:
+    """
+        Overwrites the dataframe version recorded in a serialized index, in place.
+
+        @param index_buf: writable buffer holding the index.
+        @param frame_version: the new version.
+    """
+    index = ColumnIndex.ColumnIndex.GetRootAs(index_buf, 0)
+    position = index._tab.Offset(_FRAME_VERSION)
+    flatbuffers.encode.Write(flatbuffers.number_types.Uint64Flags.packer_type, index._tab.Bytes,
+                             index._tab.Pos + position, frame_version)
+
+
+def index_lookup(fb_buf: memoryview, index_buf: memoryview, value) -> np.ndarray:
+    """
+        Returns the sorted ids (int64) of the rows of the indexed column equal to value, using the
+        hash index if there is one and the sorted index otherwise.
+
+        @param fb_buf: buffer(s) holding the Flatbuffer Dataframe the index was built on.
+        @param index_buf: buffer holding the index.
+        @param value: the value to look up.
+    """
+    index = ColumnIndex.ColumnIndex.GetRootAs(index_buf, 0)
+    if index.BucketOffsetsIsNone():
+        return index_range(fb_buf, index_buf, value, value)
+
+    reader = _ColumnReader(fb_buf, index.Column().decode())
+    operand = reader.operand(value)
+    if reader.dtype in FIXED_WIDTH_TYPES:
+        # Hash the value as the column stores it; values it can't hold match nothing.
+        try:
+            operand = np.array([operand]).astype(reader.vectors[0].dtype)
+        except (TypeError, ValueError):
+            return np.empty(0, dtype=np.int64)
+        if operand[0] != reader.operand(value):
+            return np.empty(0, dtype=np.int64)
+    elif not isinstance(operand, str):
+        return np.empty(0, dtype=np.int64)
+    else:
+        operand = np.array([operand], dtype=object)
+
+    offsets = index.BucketOffsetsAsNumpy()
+    bucket = int(reader.hash(operand)[0] & np.uint64(len(offsets) - 2))
+    candidates = np.sort(index.BucketRowsAsNumpy()[offsets[bucket]:offsets[bucket + 1]])
+    return candidates[reader.take(candidates) == operand[0]].astype(np.int64)
+
+
+def index_range(fb_buf: memoryview, index_buf: memoryview, low=None, high=None, inclusive: str = 'both') -> np.ndarray:
+    """
+        Returns the sorted ids (int64) of the rows of the indexed column whose value lies between
+        low and high, by binary search over the sorted index.
+
+        @param fb_buf: buffer(s) holding the Flatbuffer Dataframe the index was built on.
+        @param index_buf: buffer holding the index.
+        @param low: smallest value to return; unbounded if None.
+        @param high: largest value to return; unbounded if None.
+        @param inclusive: which of the boundaries to include: both, neither, left or right.
+    """
+    if inclusive not in INCLUSIVE:
+        raise ValueError(f"inclusive must be one of {', '.join(INCLUSIVE)}")
+    index = ColumnIndex.ColumnIndex.GetRootAs(index_buf, 0)
+    if index.OrderIsNone():
+        raise ValueError(f"Column {index.Column().decode()} has no sorted index")
+
+    reader = _ColumnReader(fb_buf, index.Column().decode())
+    order = index.OrderAsNumpy()
+    start, stop = 0, len(order)
+    if low is not None:
+        start = _search(reader, order, reader.operand(low), inclusive not in ('both', 'left'), 0, (low, high))
+    if high is not None:
+        stop = _search(reader, order, reader.operand(high), inclusive in ('both', 'right'), start, (low, high))
+    return np.sort(order[start:max(start, stop)]).astype(np.int64)
+
+
+def _search(reader: _ColumnReader, order: np.ndarray, operand, right: bool, lo: int, bounds: tuple) -> int:
+    """
+        Binary search of operand over the rows of the sorted index, as bisect.bisect_left (or
+        bisect_right if right) over their values would do; its key argument needs Python 3.10.
+        Raises ValueError if the values can't be compared with operand.
+
+        @param reader: reads the values of the indexed column.
+        @param order: the row ids sorted by value.
+        @param operand: the value to search for, see _ColumnReader.operand.
+        @param right: whether to return the position after the rows equal to operand.
+        @param lo: first position to search from.
+        @param bounds: the (low, high) boundaries of the lookup, for the error message.
+    """
+    hi = len(order)
+    while lo < hi:
+        mid = (lo + hi) // 2
+        value = reader.value(order[mid])
+        try:
+            before = operand < value if right else value < operand
+        except TypeError:
+            raise ValueError(f"Column {reader.col_name} can't be compared with {bounds[0]!r} and {bounds[1]!r}")
+        if before == right:
+            hi = mid
+        else:
+            lo = mid + 1
+    return lo
@@ -0,0 +1,220 @@
+"""
+    Per-operation metrics of Flatbuffer Dataframe operations.
+
+    Operations of fb_dataframe and FbSharedMemory are instrumented: each call records its duration,
+    the time spent in its phases (e.g. encoding, copying, aggregating), the bytes it copied, the
+    bytes it read through zero-copy views and the rows it scanned. Operations called by another one
+    roll up into it, as a phase named after them. Completed calls are added to per-operation
+    totals, read with snapshot(), and passed to the hooks registered with add_hook, e.g. to feed a
+    metrics collector.
+
+    Metrics are disabled by default; instrumentation then costs a flag check per call. They are
+    kept per process: calls run by parallel query workers are not recorded.
+"""
+import functools
+import threading
+import time
+
+from typing import Callable, Dict, List
+
+
+# Counters recorded by every operation.
+COUNTERS = ('bytes_copied', 'bytes_zero_copy', 'rows_scanned')
+
+_enabled = False
+_hooks: List[Callable] = []
+_totals: Dict[str, dict] = {}
+_totals_lock = threading.Lock()
+_local = threading.local()
+
+
+class OperationMetrics:
+    """
+        Metrics of one call of an operation, as passed to the hooks.
+    """
+    def __init__(self, name: str, depth: int):
+        # Name of the operation, e.g. 'group_by' or 'shm.add_dataframe'.
+        self.name = name
+        # Number of enclosing operations.
+        self.depth = depth
+        self.seconds = 0.0
+        # Phase name -> seconds spent in it.
+        self.phases: Dict[str, float] = {}
+        self.bytes_copied = 0
+        self.bytes_zero_copy = 0
+        self.rows_scanned = 0
+
+    def as_dict(self) -> dict:
+        return {'name': self.name, 'depth': self.depth, 'seconds': self.seconds, 'phases': dict(self.phases),
+                **{counter: getattr(self, counter) for counter in COUNTERS}}
+
+
+def _stack() -> List[OperationMetrics]:
+    stack = getattr(_local, 'stack', None)
+    if stack is None:
+        stack = _local.stack = []
+    return stack
+
+
+def enable() -> None:
+    """
+        Starts recording metrics.
+    """
+    global _enabled
+    _enabled = True
+
+
+def disable() -> None:
+    """
+        Stops recording metrics; the totals recorded so far are kept.
+    """
+    global _enabled
+    _enabled = False
+
+
+def is_enabled() -> bool:
+    return _enabled
+
+
+def add_hook(hook: Callable[[OperationMetrics], None]) -> None:
+    """
+        Registers a function called with the OperationMetrics of every completed call, nested calls
+        included (see OperationMetrics.depth), in the thread that ran it.
+
+        @param hook: the function to call.
+    """
+    _hooks.append(hook)
+
+
+def remove_hook(hook: Callable[[OperationMetrics], None]) -> None:
+    """
+        Unregisters a hook added by add_hook.
+
+        @param hook: the function to unregister.
+    """
+    _hooks.remove(hook)
+
+
+def reset() -> None:
+    """
+        Clears the per-operation totals.
+    """
+    with _totals_lock:
+        _totals.clear()
+
+
+def snapshot() -> Dict[str, dict]:
+    """
+        Returns the totals recorded so far per operation name: calls, seconds, seconds per phase,
+        and the COUNTERS.
+    """
+    with _totals_lock:
+        return {name: {**totals, 'phases': dict(totals['phases'])} for name, totals in _totals.items()}
+
+
+def _finish(record: OperationMetrics) -> None:
+    with _totals_lock:
+        totals = _totals.get(record.name)
+        if totals is None:
+            totals = _totals[record.name] = {'calls': 0, 'seconds': 0.0, 'phases': {}, **dict.fromkeys(COUNTERS, 0)}
+        totals['calls'] += 1
+        totals['seconds'] += record.seconds
+        for phase_name, seconds in record.phases.items():
+            totals['phases'][phase_name] = totals['phases'].get(phase_name, 0.0) + seconds
+        for counter in COUNTERS:
+            totals[counter] += getattr(record, counter)
+    for hook in list(_hooks):
+        hook(record)
+
+
+def instrumented(name: str) -> Callable:
+    """
+        Decorator recording every call of a function as the operation name.
+
+        @param name: name of the operation.
+    """
+    def decorator(func: Callable) -> Callable:
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not _enabled:
+                return func(*args, **kwargs)
+            stack = _stack()
+            record = OperationMetrics(name, len(stack))
+            stack.append(record)
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                record.seconds = time.perf_counter() - start
+                stack.pop()
+                if stack:
+                    # Roll the call up into the enclosing operation.
+                    parent = stack[-1]
+                    parent.phases[name] = parent.phases.get(name, 0.0) + record.seconds
+                    for counter in COUNTERS:
+                        setattr(parent, counter, getattr(parent, counter) + getattr(record, counter))
+                _finish(record)
+        return wrapper
+    return decorator
+
+
+class _Phase:
+    __slots__ = ('name', 'record', 'start')
+
+    def __init__(self, name: str, record: OperationMetrics):
+        self.name = name
+        self.record = record
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.record.phases[self.name] = self.record.phases.get(self.name, 0.0) + time.perf_counter() - self.start
+        return False
+
+
+class _NoPhase:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+
+_NO_PHASE = _NoPhase()
+
+
+def phase(name: str):
+    """
+        Returns a context manager timing a phase of the current operation, e.g.
+        `with phase('encode'): ...`. Does nothing outside of an operation or when disabled.
+
+        @param name: name of the phase.
+    """
+    if not _enabled:
+        return _NO_PHASE
+    stack = _stack()
+    return _Phase(name, stack[-1]) if stack else _NO_PHASE
+
+
+def count(bytes_copied: int = 0, bytes_zero_copy: int = 0, rows_scanned: int = 0) -> None:
+    """
+        Adds to the counters of the current operation. Does nothing outside of an operation or
+        when disabled.
+
+        @param bytes_copied: bytes copied, e.g. decoded or written into shared memory.
+        @param bytes_zero_copy: bytes read through views of the buffer.
+        @param rows_scanned: rows read.
+    """
+    if not _enabled:
+        return
+    stack = _stack()
+    if stack:
+        record = stack[-1]
+        record.bytes_copied += bytes_copied
+        record.bytes_zero_copy += bytes_zero_copy
+        record.rows_scanned += rows_scanned
+
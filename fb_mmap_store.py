@@ -0,0 +1,82 @@
+import mmap
+import os
+
+from typing import Callable, Optional, Tuple
+
+from fb_shared_memory import FbSharedMemory
+
+
+class FileSegment:
+    """
+        A memory-mapped file with the interface FbSharedMemory uses from
+        multiprocessing.shared_memory.SharedMemory: name, size, buf, close() and unlink().
+    """
+    def __init__(self, path: str, size: Optional[int] = None):
+        """
+            @param path: path of the file.
+            @param size: size of the file to create; None opens an existing one.
+        """
+        self.name = path
+        if size is None:
+            self._fd = os.open(path, os.O_RDWR)
+        else:
+            self._fd = os.open(path, os.O_RDWR | os.O_CREAT | os.O_EXCL, 0o600)
+            os.ftruncate(self._fd, size)
+        self.size = os.fstat(self._fd).st_size
+        try:
+            self._mmap = mmap.mmap(self._fd, self.size)
+        except ValueError:
+            # The file has not been sized yet by the process creating it.
+            os.close(self._fd)
+            raise
+        self.buf = memoryview(self._mmap)
+
+    def flush(self) -> None:
+        """
+            Writes the dirty pages of the file back to disk.
+        """
+        self._mmap.flush()
+
+    def close(self) -> None:
+        if self.buf is not None:
+            self.buf.release()
+            self.buf = None
+            self._mmap.close()
+            os.close(self._fd)
+
+    def unlink(self) -> None:
+        os.unlink(self.name)
+
+
+class FbMmapStore(FbSharedMemory):
+    """
+        FbSharedMemory backend keeping the flatbuffer dataframes and their catalog in memory-mapped
+        files in a directory on local disk instead of POSIX shared memory. The files outlive the
+        processes and reboots: reopening the directory maps them back with no decoding, and reads
+        are served by the page cache. Files are created sparse, so unused space costs no disk.
+    """
+    def __init__(self, directory: str, name: str = "CS598", segment_size: int = 200000000):
+        """
+            @param directory: directory holding the files; created if needed.
+            @param name: name of the first data file; the other files are named after it.
+            @param segment_size: size in bytes of the data files created by this process.
+        """
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+        super().__init__(name, segment_size)
+
+    def _open_segment(self, name: str, size: Optional[int] = None) -> FileSegment:
+        return FileSegment(os.path.join(self.directory, name), size)
+
+    def _worker_segment(self, index: int) -> Tuple[Callable, str]:
+        return FileSegment, os.path.join(self.directory, self._segment_name(index))
+
+    def flush(self) -> None:
+        """
+            Writes every dataframe and the catalog back to disk, e.g. before a planned shutdown.
+            Without it the page cache writes them back on its own schedule.
+        """
+        for segment in self.attached.values():
+            segment.flush()
+        self.catalog.root.flush()
+        self.catalog._table().flush()
@@ -0,0 +1,102 @@
+"""
+    Change notifications for the dataframe catalog.
+
+    A process waiting for catalog changes binds a Unix datagram socket in a directory named after
+    the catalog (a CatalogWatcher). After bumping the catalog generation, writers send an empty
+    datagram to every socket in that directory, so waiters wake up as soon as something changed
+    instead of polling the generation. Sockets left behind by processes that died are removed
+    by the first writer that finds nobody listening on them.
+"""
+import itertools
+import os
+import socket
+import tempfile
+
+from typing import Optional
+
+
+# Sending socket of this process, created on first use.
+_sender: Optional[socket.socket] = None
+
+_watcher_ids = itertools.count()
+
+
+def watchers_dir(name: str) -> str:
+    """
+        Returns the directory holding the sockets of the watchers of a catalog.
+
+        @param name: name of the catalog.
+    """
+    return os.path.join(tempfile.gettempdir(), f"{name}_watchers")
+
+
+def notify(name: str) -> None:
+    """
+        Wakes up every watcher of a catalog. Never blocks: watchers with wakeups already pending
+        are skipped.
+
+        @param name: name of the catalog.
+    """
+    global _sender
+    try:
+        paths = [entry.path for entry in os.scandir(watchers_dir(name))]
+    except FileNotFoundError:
+        return
+    if _sender is None:
+        _sender = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+        _sender.setblocking(False)
+    for path in paths:
+        try:
+            _sender.sendto(b'', path)
+        except (ConnectionRefusedError, FileNotFoundError):
+            # Nobody listens on it any more.
+            try:
+                os.unlink(path)
+            except FileNotFoundError:
+                pass
+        except (BlockingIOError, OSError):
+            pass
+
+
+class CatalogWatcher:
+    """
+        Socket receiving the notifications of a catalog; readable whenever the catalog changed
+        since the last drain().
+    """
+    def __init__(self, name: str):
+        """
+            @param name: name of the catalog.
+        """
+        directory = watchers_dir(name)
+        os.makedirs(directory, exist_ok=True)
+        self.path = os.path.join(directory, f"{os.getpid()}_{next(_watcher_ids)}")
+        self.socket = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+        self.socket.setblocking(False)
+        if os.path.exists(self.path):
+            os.unlink(self.path)
+        self.socket.bind(self.path)
+
+    def fileno(self) -> int:
+        return self.socket.fileno()
+
+    def drain(self) -> int:
+        """
+            Consumes the pending notifications and returns how many there were.
+        """
+        count = 0
+        while True:
+            try:
+                self.socket.recv(1)
+            except BlockingIOError:
+                return count
+            count += 1
+
+    def close(self) -> None:
+        """
+            Stops receiving notifications.
+        """
+        self.socket.close()
+        try:
+            os.unlink(self.path)
+        except FileNotFoundError:
+            pass
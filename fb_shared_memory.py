@@ -1,95 +1,661 @@
 import dill
 import hashlib
+import numpy as np
 import pandas as pd
 import types
 import json
+import bisect
+import fb_metrics
 
+from typing import Callable, Dict, List, Optional, Tuple, Union
 
+
+import multiprocessing
 from multiprocessing import shared_memory
+from multiprocessing.pool import Pool
+
+from fb_dataframe import to_flatbuffer, fb_dataframe_column, fb_dataframe_head, fb_dataframe_group_by, fb_dataframe_map_numeric_column
+from fb_dataframe import fb_dataframe_column_stats, fb_dataframe_filter, fb_dataframe_to_pandas
+from fb_dataframe import fb_dataframe_merge_group_by, fb_dataframe_num_rows, fb_dataframe_partial_group_by, fb_dataframe_summary
+from fb_batch import fb_dataframe_batch
+from fb_view import FbDataFrame
+from fb_catalog import ALLOCATOR_LOCK, CatalogEntry, FbCatalog, VersionConflict
+from fb_metrics import instrumented, phase
+from fb_index import INCLUSIVE, INDEX_KINDS, build_index, index_frame_version, index_kinds, index_lookup, index_range, set_index_frame_version
+
+
+# Dataframes start at multiples of this many bytes, so fixed-width column views stay aligned.
+ALIGNMENT = 8
+
+# The index of a column is stored in the catalog as <dataframe name> INDEX_SEPARATOR <column name>.
+INDEX_SEPARATOR = '\x1f'
+
+# The n-th chunk of rows appended to a dataframe is stored in the catalog as
+# <dataframe name> CHUNK_SEPARATOR <n>, n counting from 1.
+CHUNK_SEPARATOR = '\x1e'
+
+# Segments attached by a worker process of a parallel query pool, by (opener, name).
+_worker_segments = {}
+
+
+def _align(size: int) -> int:
+    return (size + ALIGNMENT - 1) // ALIGNMENT * ALIGNMENT
+
+
+def _allocate(free: List[list], size: int) -> Optional[list]:
+    """
+        Takes size bytes from the first free extent large enough to hold them (first fit, in
+        segment then address order). Returns the [segment, start, end] extent allocated, or None
+        if no free extent is large enough.
+
+        @param free: sorted [segment, start, end] free extents, updated in place.
+        @param size: number of bytes to allocate, a multiple of ALIGNMENT.
+    """
+    for i, (segment, start, end) in enumerate(free):
+        if end - start >= size:
+            if end - start == size:
+                del free[i]
+            else:
+                free[i] = [segment, start + size, end]
+            return [segment, start, start + size]
+    return None
+
 
-from fb_dataframe import to_flatbuffer, fb_dataframe_head, fb_dataframe_group_by_sum, fb_dataframe_map_numeric_column
+def _release(free: List[list], extent: list) -> None:
+    """
+        Returns an extent to the free list, coalescing it with the free extents right before
+        and after it in the same segment.
+
+        @param free: sorted [segment, start, end] free extents, updated in place.
+        @param extent: the [segment, start, end] extent to release.
+    """
+    segment, start, end = extent
+    i = bisect.bisect_left(free, [segment, start, end])
+    if i < len(free) and free[i][0] == segment and free[i][1] == end:
+        end = free.pop(i)[2]
+    if i > 0 and free[i - 1][0] == segment and free[i - 1][2] == start:
+        i -= 1
+        start = free.pop(i)[1]
+    free.insert(i, [segment, start, end])
+
+
+def _partial_group_by_worker(task: Tuple) -> dict:
+    """
+        Computes the partial group-by of one row range of a dataframe in shared memory. The worker
+        process attaches to each segment by name the first time one of its dataframes is queried,
+        and reads the dataframe in place.
+
+        @param task: ([(segment opener, segment name, start, end) of every chunk of the dataframe],
+            grouping column name, aggs, first row, end row, selected row ids or None). opener(name)
+            attaches to the segment.
+    """
+    locations, grouping_col_name, aggs, row_start, row_stop, selection = task
+    fb_bufs = []
+    for opener, segment_name, start, end in locations:
+        if (opener, segment_name) not in _worker_segments:
+            _worker_segments[(opener, segment_name)] = opener(segment_name)
+        fb_bufs.append(_worker_segments[(opener, segment_name)].buf[start:end])
+    return fb_dataframe_partial_group_by(fb_bufs, grouping_col_name, aggs, row_start, row_stop, selection)
 
 
 class FbSharedMemory:
     """
         Class for managing the shared memory for holding flatbuffer dataframes.
-    """
-    def __init__(self):
-        try:
-            self.df_shared_memory = shared_memory.SharedMemory(name = "CS598")
-            self.offsets_mem = shared_memory.SharedMemory(name="CS598_offsets")
-            self.offsets = self.load_offsets()
-        except FileNotFoundError:
-            # Shared memory is not created yet, create it with size 200M.
-            self.df_shared_memory = shared_memory.SharedMemory(name = "CS598", create=True, size=200000000)
-            self.offsets_mem = shared_memory.SharedMemory(name="CS598_offsets", create=True, size=4096)
-            self.offsets = {}
 
-            # Add more initialization steps if needed here...
+        Dataframes live in a pool of segments named name, name_1, name_2, ...; a new segment is
+        added whenever no free extent can hold a dataframe. Space is managed with a first-fit free
+        list that coalesces neighbouring extents. Dataframe locations, the free list and the segment
+        sizes are kept in a binary catalog in shared memory (see fb_catalog) that is read in place
+        on every operation, so every attached process sees dataframes added, replaced or moved by
+        others.
+
+        Several processes may add and replace dataframes at once: a writer encodes and copies its
+        flatbuffer without any lock, holding the allocator lock only to reserve its extent, and
+        publishes it in the catalog only once it is fully written. Readers never lock; see
+        fb_catalog for the protocol.
+
+        Readers hold views into a dataframe's extent, so extents given up by remove_dataframe,
+        replace_dataframe and compact() are retired rather than freed: they are only reused after
+        reclaim(), which the host calls once no reader uses the old versions any more.
+
+        Columns can have secondary indexes (see fb_index), stored in the pool next to their
+        dataframe. An index records the catalog version of the dataframe it was built from;
+        lookups fall back to scanning the column when it doesn't match the current version.
+
+        Operations are instrumented (see fb_metrics); stats() returns their metrics together
+        with the usage of the segments.
+
+        Every change to the catalog, in-place maps included, gives the dataframe a new version and
+        wakes up the processes waiting for it with AsyncFbSharedMemory (see fb_async).
+
+        Rows appended with append_rows are stored as chunks, each a Flatbuffer Dataframe of its own
+        linked to the dataframe in the catalog, so appending only encodes and copies the new rows.
+        Reads and aggregates span the chunks as if they were row groups of a single dataframe.
+    """
+    def __init__(self, name: str = "CS598", segment_size: int = 200000000):
+        """
+            @param name: name of the first shared memory segment; other segments are named after it.
+            @param segment_size: size in bytes of the segments created by this process.
+        """
+        self.name = name
+        self.segment_size = segment_size
+        self.attached = {}
+        self.catalog = FbCatalog(name, self._open_segment)
+        with self.catalog.locked(ALLOCATOR_LOCK):
+            if not self.catalog.segment_sizes():
+                # Shared memory is not created yet, create its first segment (200M by default).
+                self._add_segment(segment_size)
+        self.df_shared_memory = self._segment(0)
 
         # Add other class members you need here...
-        self.current_offset = max((end for start, end in self.offsets.values()), default=0)
+        self.pool = None
+        self.pool_processes = 0
+        # Dataframe name -> (catalog versions of the dataframe and its chunks, FbDataFrame) of the views
+        # returned by dataframe().
+        self.views = {}
+
+    def _open_segment(self, name: str, size: Optional[int] = None) -> shared_memory.SharedMemory:
+        """
+            Attaches to the shared memory segment called name, or creates it with size bytes.
 
-    def save_offsets(self):
-        # Serialize and save the offsets dictionary to shared memory
-        offsets_data = json.dumps(self.offsets).encode('utf-8')
-        # Clear buffer before saving new data
-        self.offsets_mem.buf[:len(offsets_data)] = offsets_data
-        self.offsets_mem.buf[len(offsets_data):] = b'\x00' * (self.offsets_mem.size - len(offsets_data))
+            @param name: name of the segment.
+            @param size: size of the segment to create; None attaches to an existing one.
+        """
+        if size is None:
+            return shared_memory.SharedMemory(name=name)
+        return shared_memory.SharedMemory(name=name, create=True, size=size)
+
+    def _segment_name(self, index: int) -> str:
+        return self.name if index == 0 else f"{self.name}_{index}"
 
-    def load_offsets(self):
-        # Read until the first null byte, assuming null byte indicates end of valid JSON data
-        raw_data = bytes(self.offsets_mem.buf)
-        end_of_json = raw_data.find(b'\x00')
-        valid_json = raw_data[:end_of_json].decode('utf-8')
-        return json.loads(valid_json)
+    def _worker_segment(self, index: int) -> Tuple[Callable, str]:
+        """
+            Returns how a worker process attaches to a data segment: a picklable opener and the
+            name to call it with.
+
+            @param index: index of the segment.
+        """
+        return shared_memory.SharedMemory, self._segment_name(index)
+
+    def _segment(self, index: int) -> shared_memory.SharedMemory:
+        """
+            Returns the data segment with the given index in the pool, attaching to it if needed.
+
+            @param index: index of the segment.
+        """
+        segment_name = self._segment_name(index)
+        if segment_name not in self.attached:
+            self.attached[segment_name] = self._open_segment(segment_name)
+        return self.attached[segment_name]
+
+    def _add_segment(self, min_size: int) -> None:
+        """
+            Grows the pool by one segment of at least min_size bytes and frees all of it. Callers
+            hold the allocator lock.
+
+            @param min_size: number of bytes the new segment must hold.
+        """
+        index = len(self.catalog.segment_sizes())
+        segment_name = self._segment_name(index)
+        segment = self._open_segment(segment_name, max(self.segment_size, min_size))
+        self.attached[segment_name] = segment
+        self.catalog.add_segment(segment.size)
+        self.catalog.set_extents(self.catalog.extents() + [[index, 0, segment.size]])
+
+    def _store(self, fb_bytes: bytes) -> list:
+        """
+            Allocates an extent for a flatbuffer, growing the pool if needed, and copies the
+            flatbuffer into it. Returns the [segment, start, end] of the flatbuffer. Only the
+            reservation holds the allocator lock; the copy runs concurrently with other writers.
 
-    def add_dataframe(self, name: str, df: pd.DataFrame) -> None:
+            @param fb_bytes: the serialized dataframe.
+        """
+        size = _align(max(len(fb_bytes), 1))
+        with phase('allocate'), self.catalog.locked(ALLOCATOR_LOCK):
+            free = self.catalog.extents()
+            extent = _allocate(free, size)
+            if extent is None:
+                self._add_segment(size)
+                free = self.catalog.extents()
+                extent = _allocate(free, size)
+            self.catalog.set_extents(free)
+        segment, start, _ = extent
+        with phase('copy'):
+            self._segment(segment).buf[start:start + len(fb_bytes)] = fb_bytes
+        fb_metrics.count(bytes_copied=len(fb_bytes))
+        return [segment, start, start + len(fb_bytes)]
+
+    def _publish(self, name: str, fb_bytes: bytes, expected_version: Optional[int] = None,
+                 summary: Optional[Tuple[int, int, int]] = None) -> None:
+        """
+            Stores a flatbuffer and then publishes it in the catalog under name, retiring the
+            extent of the version it replaces. If the catalog entry no longer has expected_version,
+            the flatbuffer is dropped and VersionConflict raised.
+
+            @param name: name of the dataframe.
+            @param fb_bytes: the serialized dataframe.
+            @param expected_version: see FbCatalog.put.
+            @param summary: (rows, columns, dtypes) to record; read from the dataframe if None.
+        """
+        segment, start, end = self._store(fb_bytes)
+        summary = fb_dataframe_summary(fb_bytes) if summary is None else summary
+        try:
+            with phase('publish'):
+                previous = self.catalog.put(name, segment, start, end - start, *summary,
+                                            expected_version=expected_version)
+        except VersionConflict:
+            # Never published, so no reader can see it: free it right away.
+            self._release(CatalogEntry(segment, start, end - start, 0, 0, 0, 0))
+            raise
+        if previous is not None:
+            self._retire(previous)
+
+    def _release(self, entry: CatalogEntry, retired: bool = False) -> None:
+        with self.catalog.locked(ALLOCATOR_LOCK):
+            extents = self.catalog.extents(retired)
+            extent = [entry.segment, entry.offset, entry.offset + _align(max(entry.length, 1))]
+            if retired:
+                extents.append(extent)
+            else:
+                _release(extents, extent)
+            self.catalog.set_extents(extents, retired)
+
+    def _retire(self, entry: CatalogEntry) -> None:
+        self._release(entry, retired=True)
+
+    @instrumented('shm.add_dataframe')
+    def add_dataframe(self, name: str, df: pd.DataFrame, indexes: Optional[Dict[str, Union[str, List[str]]]] = None) -> None:
         """
             Adds a dataframe into the shared memory. Does nothing if a dataframe with 'name' already exists.
 
             @param name: name of the dataframe.
             @param df: the dataframe to add to shared memory.
+            @param indexes: columns to index, each with the kind(s) of index to build ('sorted',
+                'hash'), e.g. {'user_id': 'hash', 'time': ['sorted']}; see create_index.
         """
-        if name in self.offsets:
+        if self.catalog.lookup(name) is not None:
+            return
+
+        try:
+            self._publish(name, to_flatbuffer(df), expected_version=0)
+        except VersionConflict:
+            # Another writer added it first.
             return
+        for col_name, kinds in (indexes or {}).items():
+            self.create_index(name, col_name, kinds)
 
+    @instrumented('shm.append_rows')
+    def append_rows(self, df_name: str, df_chunk: pd.DataFrame) -> None:
+        """
+            Appends rows to a dataframe. Only the new rows are encoded: they are stored as a chunk
+            of their own, published in the catalog as the next chunk of the dataframe, and every
+            read and aggregate spans the chunks. The dataframe then gets a new version, as if it
+            was replaced. Every chunk has its own indexes, so only the new rows get indexed.
+
+            @param df_name: name of the Dataframe.
+            @param df_chunk: the rows to append, with the columns of the dataframe and their dtypes;
+                columns may come in any order.
+        """
+        frame = self.dataframe(df_name)
+        if len(df_chunk.columns) != len(frame.columns) or set(df_chunk.columns) != set(frame.columns):
+            raise ValueError("The rows to append must have the columns of the dataframe")
+        # Every chunk holds the columns in the same order.
+        df_chunk = df_chunk[list(frame.columns)]
+        for col_name, dtype in frame.dtypes.items():
+            if df_chunk[col_name].dtype != dtype:
+                raise ValueError(f"Column {col_name} is {df_chunk[col_name].dtype}, not {dtype} as in the dataframe")
+        if len(df_chunk) == 0:
+            return
+
+        # Categoricals are read by their codes: they must follow the category order of the dataframe
+        # (unordered categories compare equal in any order).
+        categoricals = {col_name: dtype for col_name, dtype in frame.dtypes.items() if isinstance(dtype, pd.CategoricalDtype)}
+        if categoricals:
+            df_chunk = df_chunk.assign(**{col_name: df_chunk[col_name].cat.set_categories(dtype.categories)
+                                          for col_name, dtype in categoricals.items()})
+        fb_bytes = to_flatbuffer(df_chunk)
+        while True:
+            entries = self._frame_entries(df_name)
+            chunk_name = self._chunk_name(df_name, len(entries))
+            try:
+                self._publish(chunk_name, fb_bytes, expected_version=0)
+                break
+            except VersionConflict:
+                # Another writer appended a chunk first: take the next one.
+                continue
+
+        frame = self.catalog.touch(df_name)
+        if frame is None:
+            # Removed meanwhile: don't leave the chunk behind.
+            self._drop_chunks(df_name)
+            raise ValueError("Dataframe not found in shared memory")
+        # The rows indexed before are unchanged: only the new chunk needs indexing.
+        for col_name, kinds in self._indexes(df_name).items():
+            self._carry_index(self._index_name(df_name, col_name), entries[0].version, frame)
+            self._build_index(chunk_name, col_name, kinds)
+
+    @instrumented('shm.replace_dataframe')
+    def replace_dataframe(self, name: str, df: pd.DataFrame) -> None:
+        """
+            Stores a new version of a dataframe (adding it if there is none). The new version is
+            written to a fresh extent and then published, so readers of the old version are not
+            disturbed; the old extent is retired until reclaim().
+
+            @param name: name of the dataframe.
+            @param df: the new contents of the dataframe.
+        """
         fb_bytes = to_flatbuffer(df)
-        if self.current_offset + len(fb_bytes) > self.df_shared_memory.size:
-            raise MemoryError("Not enough space in shared memory")
+        # Readers see the old version lose its appended rows before the new version shows up.
+        self._drop_chunks(name)
+        self._publish(name, fb_bytes)
+        # Rebuild the indexes for the new version, dropping those of columns that are gone.
+        for col_name, kinds in self._indexes(name).items():
+            if col_name in df.columns:
+                self.create_index(name, col_name, kinds)
+            else:
+                self.drop_index(name, col_name)
+
+    @instrumented('shm.remove_dataframe')
+    def remove_dataframe(self, name: str) -> None:
+        """
+            Removes a dataframe from the shared memory. Its extent is retired until reclaim().
+
+            @param name: name of the dataframe.
+        """
+        entry = self.catalog.remove(name)
+        if entry is None:
+            raise ValueError("Dataframe not found in shared memory")
+        self._retire(entry)
+        self._drop_chunks(name)
+        for col_name in self._indexes(name):
+            self.drop_index(name, col_name)
+
+    @instrumented('shm.reclaim')
+    def reclaim(self) -> None:
+        """
+            Returns the extents retired by remove_dataframe, replace_dataframe and compact() to the
+            free list. Call it only once no reader holds views of removed or replaced dataframe
+            versions any more; their memory gets reused afterwards.
+        """
+        with self.catalog.locked(ALLOCATOR_LOCK):
+            free = self.catalog.extents()
+            for extent in self.catalog.extents(retired=True):
+                _release(free, extent)
+            self.catalog.set_extents(free)
+            self.catalog.set_extents([], retired=True)
+
+    @instrumented('shm.compact')
+    def compact(self) -> None:
+        """
+            Moves dataframes into the lowest free extents that can hold them, so free space gathers
+            at the end of the segments. Compaction runs online: each dataframe is copied to its new
+            extent before the new location is published, and its old extent is retired until
+            reclaim(), so attached readers keep seeing consistent data. A dataframe replaced by another
+            writer while it is being moved keeps its new version.
+        """
+        entries = sorted(self.catalog.entries().items(), key=lambda item: (item[1].segment, item[1].offset))
+        moved = {}
+        for name, entry in entries:
+            size = _align(max(entry.length, 1))
+            with self.catalog.locked(ALLOCATOR_LOCK):
+                free = self.catalog.extents()
+                first_fit = next((extent for extent in free if extent[2] - extent[1] >= size), None)
+                if first_fit is None or first_fit[:2] >= [entry.segment, entry.offset]:
+                    continue
+                segment, start, _ = _allocate(free, size)
+                self.catalog.set_extents(free)
+
+            with phase('copy'):
+                self._segment(segment).buf[start:start + entry.length] = self._segment(entry.segment).buf[entry.offset:entry.offset + entry.length]
+            fb_metrics.count(bytes_copied=entry.length)
+            relocated = CatalogEntry(segment, start, entry.length, 0, entry.num_rows, entry.num_columns, entry.dtypes)
+            try:
+                self.catalog.put(name, segment, start, entry.length, entry.num_rows, entry.num_columns, entry.dtypes,
+                                 expected_version=entry.version)
+            except VersionConflict:
+                self._release(relocated)
+                continue
+            self._retire(entry)
+            moved[name] = entry.version
+
+        # Moving a dataframe gives it a new version: carry its indexes over to it.
+        for name, entry in self.catalog.entries().items():
+            df_name = name.split(INDEX_SEPARATOR)[0]
+            if INDEX_SEPARATOR in name and df_name in moved:
+                self._carry_index(name, moved[df_name], self.catalog.lookup(df_name))
+
+    def _carry_index(self, index_name: str, old_version: int, frame: Optional[CatalogEntry]) -> None:
+        """
+            Stamps an index built from an older version of a dataframe with its current version,
+            when the indexed column did not change in between.
+
+            @param index_name: catalog name of the index.
+            @param old_version: version of the dataframe the index must have been built from.
+            @param frame: current entry of the dataframe, or None if it was removed.
+        """
+        index_buf = self._get_fb_buf(index_name)
+        if frame is not None and index_frame_version(index_buf) == old_version:
+            set_index_frame_version(index_buf, frame.version)
+
+    def _chunk_name(self, df_name: str, chunk: int) -> str:
+        return f"{df_name}{CHUNK_SEPARATOR}{chunk}"
+
+    def _chunks(self, df_name: str) -> List[CatalogEntry]:
+        """
+            Returns the catalog entries of the chunks of rows appended to a dataframe, in order.
+
+            @param df_name: name of the Dataframe.
+        """
+        chunks = []
+        while True:
+            entry = self.catalog.lookup(self._chunk_name(df_name, len(chunks) + 1))
+            if entry is None:
+                return chunks
+            chunks.append(entry)
 
-        self.df_shared_memory.buf[self.current_offset:self.current_offset + len(fb_bytes)] = fb_bytes
-        self.offsets[name] = (self.current_offset, self.current_offset + len(fb_bytes))
-        self.current_offset += len(fb_bytes)
+    def _drop_chunks(self, df_name: str) -> None:
+        """
+            Removes the chunks of rows appended to a dataframe, last first, with their indexes.
+            Their extents are retired until reclaim().
 
-        self.save_offsets() 
+            @param df_name: name of the Dataframe.
+        """
+        for chunk in range(len(self._chunks(df_name)), 0, -1):
+            chunk_name = self._chunk_name(df_name, chunk)
+            names = [self._index_name(chunk_name, col_name) for col_name in self._indexes(chunk_name)]
+            for name in names + [chunk_name]:
+                entry = self.catalog.remove(name)
+                if entry is not None:
+                    self._retire(entry)
 
+    def _frame_entries(self, df_name: str) -> List[CatalogEntry]:
+        """
+            Returns the catalog entries of a dataframe and of the chunks appended to it, in row
+            order. Raises ValueError if there is no such dataframe.
 
-    def _get_fb_buf(self, df_name: str) -> memoryview:
+            @param df_name: name of the Dataframe.
         """
-            Returns the section of the buffer corresponding to the dataframe with df_name.
+        with phase('lookup'):
+            entry = self.catalog.lookup(df_name)
+            if entry is None:
+                raise ValueError("Dataframe not found in shared memory")
+            return [entry] + self._chunks(df_name)
+
+    def _entry_buf(self, entry: CatalogEntry) -> memoryview:
+        return memoryview(self._segment(entry.segment).buf)[entry.offset:entry.offset + entry.length]
+
+    def _frame_buf(self, entries: List[CatalogEntry]) -> Union[memoryview, List[memoryview]]:
+        """
+            Returns the buffer of a dataframe, or the list of the buffers of its chunks if rows were
+            appended to it; the fb_dataframe functions take either.
+
+            @param entries: the catalog entries of the dataframe and its chunks, see _frame_entries.
+        """
+        if len(entries) == 1:
+            return self._entry_buf(entries[0])
+        return [self._entry_buf(entry) for entry in entries]
+
+    def _get_fb_buf(self, df_name: str) -> Union[memoryview, List[memoryview]]:
+        """
+            Returns the section of the buffer corresponding to the dataframe with df_name, or the
+            sections holding its chunks if rows were appended to it.
             Hint: get buffer section (fb_buf) holding the flatbuffer from shared memory.
 
             @param df_name: name of the Dataframe.
         """
-        if df_name not in self.offsets:
-            raise ValueError("Dataframe not found in shared memory")
-        start, end = self.offsets[df_name]
-        return memoryview(self.df_shared_memory.buf)[start:end]
+        return self._frame_buf(self._frame_entries(df_name))
 
 
-    def dataframe_head(self, df_name: str, rows: int = 5) -> pd.DataFrame:
+    @instrumented('shm.column')
+    def column(self, df_name: str, col_name: str) -> np.ndarray:
+        """
+            Returns a read-only NumPy array aliasing the values of a numeric column inside the
+            shared memory; nothing is copied. The array keeps the shared memory mapped, so it
+            should be released before calling close().
+
+            @param df_name: name of the Dataframe.
+            @param col_name: name of the int or float column.
+        """
+        return fb_dataframe_column(self._get_fb_buf(df_name), col_name)
+
+    @instrumented('shm.dataframe_head')
+    def dataframe_head(self, df_name: str, rows: int = 5, selection: Optional[np.ndarray] = None) -> pd.DataFrame:
         """
             Returns the first n rows of the Flatbuffer Dataframe as a Pandas Dataframe
             similar to df.head(). If there are less than n rows, returns the entire Dataframe.
 
             @param df_name: name of the Dataframe.
             @param rows: number of rows to return.
+            @param selection: row ids returned by dataframe_filter; only those rows are returned.
+        """
+        return fb_dataframe_head(self._get_fb_buf(df_name), rows, selection)
+
+    @instrumented('shm.dataframe_to_pandas')
+    def dataframe_to_pandas(self, df_name: str, columns: Optional[List[str]] = None,
+                            rows: Optional[slice] = None) -> pd.DataFrame:
         """
-        fb_bytes = bytes(self._get_fb_buf(df_name))
-        return fb_dataframe_head(fb_bytes, rows)
+            Returns a range of rows of some columns of the Flatbuffer Dataframe as a Pandas
+            Dataframe, decoding only those; see fb_dataframe_to_pandas. Numeric columns may be
+            read-only views into the shared memory.
 
-    def dataframe_group_by_sum(self, df_name: str, grouping_col_name: str, sum_col_name: str) -> pd.DataFrame:
+            @param df_name: name of the Dataframe.
+            @param columns: names of the columns to return, in order; all columns if None.
+            @param rows: slice of the rows to return; all rows if None.
+        """
+        return fb_dataframe_to_pandas(self._get_fb_buf(df_name), columns, rows)
+
+    @instrumented('shm.dataframe')
+    def dataframe(self, df_name: str) -> FbDataFrame:
+        """
+            Returns a Pandas-like view of the Flatbuffer Dataframe in the shared memory (see
+            fb_view). Views are cached per catalog version of the dataframe and its chunks: repeated
+            calls return the same view, with its columns already resolved, until the dataframe is
+            replaced, appended to, mapped or moved.
+
+            @param df_name: name of the Dataframe.
+        """
+        try:
+            entries = self._frame_entries(df_name)
+        except ValueError:
+            self.views.pop(df_name, None)
+            raise
+        versions = tuple(entry.version for entry in entries)
+        cached = self.views.get(df_name)
+        if cached is None or cached[0] != versions:
+            cached = self.views[df_name] = (versions, FbDataFrame(self._frame_buf(entries)))
+        return cached[1]
+
+    @instrumented('shm.dataframe_column_stats')
+    def dataframe_column_stats(self, df_name: str, col_name: str) -> dict:
+        """
+            Returns the statistics of a column (count, null_count, min, max, sum, mean, nunique),
+            read from its metadata in the shared memory; see fb_dataframe_column_stats.
+
+            @param df_name: name of the Dataframe.
+            @param col_name: name of the column.
+        """
+        return fb_dataframe_column_stats(self._get_fb_buf(df_name), col_name)
+
+    @instrumented('shm.dataframe_filter')
+    def dataframe_filter(self, df_name: str, filters: list) -> np.ndarray:
+        """
+            Returns the sorted ids of the rows matching filters, evaluated in place in the shared
+            memory; see fb_dataframe_filter for the predicate syntax.
+
+            @param df_name: name of the Dataframe.
+            @param filters: predicates in disjunctive normal form, e.g. [('a', '>', 1), ('b', '==', 'x')].
+        """
+        return fb_dataframe_filter(self._get_fb_buf(df_name), filters)
+
+    @instrumented('shm.dataframe_batch')
+    def dataframe_batch(self, df_name: str, queries: List[tuple]) -> list:
+        """
+            Runs several queries over a dataframe in one shared scan of the shared memory and
+            returns their results in order; see fb_batch for the query syntax.
+
+            @param df_name: name of the Dataframe.
+            @param queries: the queries, e.g. [('head', 10), ('group_by', 'a', {'b': 'sum'}, [('c', '>', 0)])].
+        """
+        return fb_dataframe_batch(self._get_fb_buf(df_name), queries)
+
+    def _get_pool(self, processes: int) -> Pool:
+        """
+            Returns the worker pool used by parallel queries, (re)creating it with the given number
+            of processes.
+
+            @param processes: number of worker processes.
+        """
+        if self.pool is None or self.pool_processes != processes:
+            if self.pool is not None:
+                self.pool.terminate()
+            self.pool = multiprocessing.Pool(processes)
+            self.pool_processes = processes
+        return self.pool
+
+    @instrumented('shm.dataframe_group_by')
+    def dataframe_group_by(self, df_name: str, grouping_col_name: str,
+                           aggs: Dict[str, Union[str, List[str]]], processes: Optional[int] = 1,
+                           selection: Optional[np.ndarray] = None) -> pd.DataFrame:
+        """
+            Applies GROUP BY on the flatbuffer dataframe grouping by grouping_col_name and computing
+            the aggregates in aggs (sum, count, min, max, mean) over zero-copy column views.
+            Returns the same result as df.groupby(grouping_col_name).agg(aggs).
+
+            With more than one process, the rows are split into one range per process; worker
+            processes aggregate their range in place in the shared memory and the partial results
+            are merged here.
+
+            @param df_name: name of the Dataframe.
+            @param grouping_col_name: column to group by.
+            @param aggs: mapping from value column name to one or more aggregate names.
+            @param processes: number of worker processes; one per CPU if None, 1 runs in this process.
+            @param selection: row ids returned by dataframe_filter; only those rows are aggregated.
+        """
+        entries = self._frame_entries(df_name)
+        fb_buf = self._frame_buf(entries)
+        processes = multiprocessing.cpu_count() if processes is None else processes
+        if processes <= 1:
+            return fb_dataframe_group_by(fb_buf, grouping_col_name, aggs, selection)
+
+        num_rows = fb_dataframe_num_rows(fb_buf)
+        bounds = np.linspace(0, num_rows, processes + 1).astype(np.int64).tolist()
+        locations = [(*self._worker_segment(entry.segment), entry.offset, entry.offset + entry.length)
+                     for entry in entries]
+        if selection is not None:
+            # Each worker only gets the selected rows of its range.
+            selection = np.asarray(selection, dtype=np.int64)
+            cuts = np.searchsorted(selection, bounds).tolist()
+            tasks = [(locations, grouping_col_name, aggs, bounds[i], bounds[i + 1], selection[cuts[i]:cuts[i + 1]])
+                     for i in range(processes)]
+        else:
+            tasks = [(locations, grouping_col_name, aggs, bounds[i], bounds[i + 1], None) for i in range(processes)]
+        with phase('workers'):
+            partials = self._get_pool(processes).map(_partial_group_by_worker, tasks)
+        return fb_dataframe_merge_group_by(fb_buf, partials, grouping_col_name, aggs)
+
+    @instrumented('shm.dataframe_group_by_sum')
+    def dataframe_group_by_sum(self, df_name: str, grouping_col_name: str, sum_col_name: str,
+                               processes: Optional[int] = 1) -> pd.DataFrame:
         """
             Applies GROUP BY SUM operation on the flatbuffer dataframe grouping by grouping_col_name
             and summing sum_col_name. Returns the aggregate result as a Pandas dataframe.
@@ -97,26 +663,229 @@ class FbSharedMemory:
             @param df_name: name of the Dataframe.
             @param grouping_col_name: column to group by.
             @param sum_col_name: column to sum.
+            @param processes: number of worker processes; see dataframe_group_by.
         """
-        fb_bytes = bytes(self._get_fb_buf(df_name))
-        return fb_dataframe_group_by_sum(fb_bytes, grouping_col_name, sum_col_name)
+        return self.dataframe_group_by(df_name, grouping_col_name, {sum_col_name: 'sum'}, processes)
 
+    @instrumented('shm.dataframe_map_numeric_column')
     def dataframe_map_numeric_column(self, df_name: str, col_name: str, map_func: types.FunctionType) -> None:
         """
             Apply map_func to elements in a numeric column in the Flatbuffer Dataframe in place.
+            The dataframe gets a new version, as if it was replaced.
 
             @param df_name: name of the Dataframe.
             @param col_name: name of the numeric column to apply map_func to.
             @param map_func: function to apply to elements in the numeric column.
         """
+        entry = self.catalog.lookup(df_name)
         fb_dataframe_map_numeric_column(self._get_fb_buf(df_name), col_name, map_func)
+        # The new version tells watchers the dataframe changed; the other indexes stay valid.
+        frame = self.catalog.touch(df_name)
+        for indexed_col, kinds in self._indexes(df_name).items():
+            if indexed_col == col_name:
+                self.create_index(df_name, col_name, kinds)
+            else:
+                self._carry_index(self._index_name(df_name, indexed_col), entry.version, frame)
+
+    def _index_name(self, df_name: str, col_name: str) -> str:
+        return f"{df_name}{INDEX_SEPARATOR}{col_name}"
+
+    def _indexes(self, df_name: str) -> Dict[str, List[str]]:
+        """
+            Returns the kinds of index of every indexed column of a dataframe, by column name.
+
+            @param df_name: name of the Dataframe.
+        """
+        prefix = df_name + INDEX_SEPARATOR
+        return {name[len(prefix):]: index_kinds(self._get_fb_buf(name))
+                for name in self.catalog.entries() if name.startswith(prefix)}
+
+    def _index_parts(self, df_name: str, col_name: str) -> List[Tuple[memoryview, Optional[memoryview], int]]:
+        """
+            Returns, for the dataframe and every chunk appended to it, its buffer, the buffer of the
+            index of one of its columns and the id of its first row. The index is None if the
+            column has no index built from the current version of the dataframe or chunk.
+
+            @param df_name: name of the Dataframe.
+            @param col_name: name of the indexed column.
+        """
+        entries = self._frame_entries(df_name)
+        names = [df_name] + [self._chunk_name(df_name, chunk) for chunk in range(1, len(entries))]
+        parts = []
+        first_row = 0
+        for name, entry in zip(names, entries):
+            index = self.catalog.lookup(self._index_name(name, col_name))
+            index_buf = None if index is None else self._entry_buf(index)
+            if index_buf is not None and index_frame_version(index_buf) != entry.version:
+                index_buf = None
+            parts.append((self._entry_buf(entry), index_buf, first_row))
+            first_row += entry.num_rows
+        return parts
+
+    def _build_index(self, name: str, col_name: str, kinds: Union[str, List[str]]) -> None:
+        """
+            Builds the indexes of a column of a dataframe, or of one of its chunks, on their own.
+
+            @param name: catalog name of the dataframe or chunk.
+            @param col_name: name of the column to index.
+            @param kinds: 'sorted', 'hash' or both.
+        """
+        entry = self.catalog.lookup(name)
+        if entry is None:
+            raise ValueError("Dataframe not found in shared memory")
+        index = build_index(self._entry_buf(entry), col_name, kinds, entry.version)
+        self._publish(self._index_name(name, col_name), index, summary=(entry.num_rows, 1, 0))
+
+    @instrumented('shm.create_index')
+    def create_index(self, df_name: str, col_name: str, kinds: Union[str, List[str]] = INDEX_KINDS) -> None:
+        """
+            Builds secondary indexes over a column and stores them in the shared memory next to the
+            dataframe, replacing the ones the column had. A sorted index (the row ids ordered by
+            value) answers equality and range lookups in O(log n); a hash index answers equality
+            lookups in O(1). Indexes are rebuilt when the column is mapped or the dataframe replaced.
+            The dataframe and every chunk of rows appended to it are indexed on their own: appending
+            only indexes the new rows, and lookups combine the results of every chunk.
+
+            @param df_name: name of the Dataframe.
+            @param col_name: name of the column to index; sorted indexes need a numeric, DateTime or
+                string column, hash indexes an integer, DateTime, string or categorical one.
+            @param kinds: 'sorted', 'hash' or both.
+        """
+        self._build_index(df_name, col_name, kinds)
+        for chunk in range(1, len(self._frame_entries(df_name))):
+            self._build_index(self._chunk_name(df_name, chunk), col_name, kinds)
+
+    @instrumented('shm.drop_index')
+    def drop_index(self, df_name: str, col_name: str) -> None:
+        """
+            Removes the indexes of a column, in the dataframe and its chunks. Their extents are
+            retired until reclaim().
+
+            @param df_name: name of the Dataframe.
+            @param col_name: name of the indexed column.
+        """
+        entry = self.catalog.remove(self._index_name(df_name, col_name))
+        if entry is None:
+            raise ValueError(f"Column {col_name} has no index")
+        self._retire(entry)
+        for chunk in range(1, len(self._chunks(df_name)) + 1):
+            entry = self.catalog.remove(self._index_name(self._chunk_name(df_name, chunk), col_name))
+            if entry is not None:
+                self._retire(entry)
+
+    @instrumented('shm.dataframe_index_lookup')
+    def dataframe_index_lookup(self, df_name: str, col_name: str, value) -> np.ndarray:
+        """
+            Returns the sorted ids of the rows whose value in col_name equals value, through the hash
+            index of the column (O(1)) or its sorted index (O(log n)). Columns without an index are
+            scanned, as by dataframe_filter.
+
+            @param df_name: name of the Dataframe.
+            @param col_name: name of the column.
+            @param value: the value to look up.
+        """
+        selections = []
+        for fb_buf, index_buf, first_row in self._index_parts(df_name, col_name):
+            if index_buf is None:
+                selections.append(fb_dataframe_filter(fb_buf, [(col_name, '==', value)]) + first_row)
+            else:
+                selections.append(index_lookup(fb_buf, index_buf, value) + first_row)
+        return np.concatenate(selections)
+
+    @instrumented('shm.dataframe_index_range')
+    def dataframe_index_range(self, df_name: str, col_name: str, low=None, high=None, inclusive: str = 'both') -> np.ndarray:
+        """
+            Returns the sorted ids of the rows whose value in col_name lies between low and high,
+            by binary search over the sorted index of the column. Columns without a sorted index
+            are scanned, as by dataframe_filter.
+
+            @param df_name: name of the Dataframe.
+            @param col_name: name of the column.
+            @param low: smallest value to return; unbounded if None.
+            @param high: largest value to return; unbounded if None.
+            @param inclusive: which of the boundaries to include: both, neither, left or right.
+        """
+        if inclusive not in INCLUSIVE:
+            raise ValueError(f"inclusive must be one of {', '.join(INCLUSIVE)}")
+        filters = []
+        if low is not None:
+            filters.append((col_name, '>=' if inclusive in ('both', 'left') else '>', low))
+        if high is not None:
+            filters.append((col_name, '<=' if inclusive in ('both', 'right') else '<', high))
+
+        selections = []
+        for fb_buf, index_buf, first_row in self._index_parts(df_name, col_name):
+            if index_buf is not None and 'sorted' in index_kinds(index_buf):
+                selections.append(index_range(fb_buf, index_buf, low, high, inclusive) + first_row)
+            else:
+                # Every present value, if unbounded.
+                selections.append(fb_dataframe_filter(fb_buf, filters or [(col_name, 'not in', [])]) + first_row)
+        return np.concatenate(selections)
+
+    def stats(self) -> dict:
+        """
+            Returns a snapshot of the metrics of the operations run by this process (see
+            fb_metrics.snapshot; empty unless fb_metrics.enable() was called) under 'operations',
+            and of the usage of the pool under 'segments': for every segment its size and its
+            used, free and retired bytes, its number of free extents and the largest of them.
+            'utilization' is the fraction of the pool used by dataframes and indexes, and
+            'fragmentation' the fraction of the free bytes outside of the largest free extent.
+            'dataframes', 'indexes' and 'chunks' count the dataframes, the indexes and the chunks
+            of appended rows held in the pool.
+        """
+        names = list(self.catalog.entries())
+        indexes = sum(INDEX_SEPARATOR in name for name in names)
+        chunks = sum(CHUNK_SEPARATOR in name and INDEX_SEPARATOR not in name for name in names)
+        with self.catalog.locked(ALLOCATOR_LOCK):
+            sizes = self.catalog.segment_sizes()
+            free = self.catalog.extents()
+            retired = self.catalog.extents(retired=True)
+
+        segments = [{'size': size, 'used': size, 'free': 0, 'retired': 0, 'free_extents': 0, 'largest_free': 0}
+                    for size in sizes]
+        for segment, start, end in free:
+            usage = segments[segment]
+            usage['free'] += end - start
+            usage['free_extents'] += 1
+            usage['largest_free'] = max(usage['largest_free'], end - start)
+        for segment, start, end in retired:
+            segments[segment]['retired'] += end - start
+        for usage in segments:
+            usage['used'] -= usage['free'] + usage['retired']
+
+        total = sum(sizes)
+        total_free = sum(usage['free'] for usage in segments)
+        largest_free = max((usage['largest_free'] for usage in segments), default=0)
+        return {
+            'operations': fb_metrics.snapshot(),
+            'segments': segments,
+            'dataframes': len(names) - indexes - chunks,
+            'indexes': indexes,
+            'chunks': chunks,
+            'utilization': sum(usage['used'] for usage in segments) / total if total else 0.0,
+            'fragmentation': 1 - largest_free / total_free if total_free else 0.0,
+        }
 
     def close(self) -> None:
         """
             Closes the managed shared memory.
         """
+        if self.pool is not None:
+            self.pool.terminate()
+            self.pool = None
+        self.views.clear()
         try:
-            self.df_shared_memory.close()
-            self.offsets_mem.close()
+            for segment in self.attached.values():
+                segment.close()
+            self.catalog.close()
         except:
-            pass
\ No newline at end of file
+            pass
+
+    def unlink(self) -> None:
+        """
+            Destroys every segment of the pool and the catalog. Other processes must not use the
+            shared memory afterwards.
+        """
+        for index in range(len(self.catalog.segment_sizes())):
+            self._segment(index).unlink()
+        self.catalog.unlink()
\ No newline at end of file
@@ -0,0 +1,318 @@
+"""
+    Column statistics and zone maps.
+
+    to_flatbuffer records in the Metadata of every column a ColumnStats table covering all of its
+    rows, and a zone map: one ColumnStats per block of zone_size rows. They hold the row and missing
+    value counts, min, max, sum and an estimate of the number of distinct values, so simple
+    aggregates are answered without reading the column and filters skip the blocks whose min and
+    max rule a predicate out.
+
+    Statistics are handled as dicts with the keys num_rows, null_count, min, max, sum, float_sum,
+    distinct and sketch. min and max are in the domain the column is stored in: ints for integer,
+    Bool and DateTime (ticks) columns and for the category positions of Categorical columns, floats
+    for float columns and strs for string columns; they are None when every value is missing. sum
+    wraps around like the int64 / uint64 sums of NumPy, float_sum doesn't; both are None for
+    non-numeric columns.
+"""
+import flatbuffers
+import numpy as np
+import pandas as pd
+
+from typing import List, Optional, Tuple
+
+from CS598 import ColumnStats
+from CS598 import DataType
+from fb_column import CODED_TYPES, FIXED_WIDTH_TYPES, NUMERIC_TYPES
+
+
+# Rows per block of the zone maps written by to_flatbuffer by default.
+DEFAULT_ZONE_SIZE = 1 << 16
+
+# Number of hashes kept by the K-minimum-values sketch of a column. The relative error of the
+# distinct estimate is about 1 / sqrt(KMV_SIZE - 2), ~6%; smaller counts are exact.
+KMV_SIZE = 256
+
+FLOAT_TYPES = frozenset((DataType.DataType.Float, DataType.DataType.Float32))
+STRING_TYPES = frozenset((DataType.DataType.String, DataType.DataType.DictString))
+UNSIGNED_TYPES = frozenset((DataType.DataType.UInt8, DataType.DataType.UInt16,
+                            DataType.DataType.UInt32, DataType.DataType.UInt64))
+
+# Padding of sketches rewritten in place with fewer hashes than they were written with.
+_SKETCH_PAD = np.iinfo(np.uint64).max
+_UINT64_MASK = (1 << 64) - 1
+
+# vtable slots of the ColumnStats scalars rewritten by rewrite_stats, in dataframe.fbs field order.
+_NULL_COUNT, _HAS_MIN_MAX, _MIN_INT, _MAX_INT, _MIN_FLOAT, _MAX_FLOAT = 6, 8, 10, 12, 14, 16
+_SUM_INT, _SUM_FLOAT, _DISTINCT_COUNT = 22, 24, 26
+
+
+def kmv_sketch(hashes: np.ndarray) -> np.ndarray:
+    """
+        Returns the KMV_SIZE smallest distinct values of an array of uint64 hashes, in order.
+
+        @param hashes: the hashes, possibly repeated.
+    """
+    if len(hashes) > 8 * KMV_SIZE:
+        # The smallest distinct hashes are among the smallest hashes, unless most are repeats.
+        sketch = np.unique(np.partition(hashes, 8 * KMV_SIZE)[:8 * KMV_SIZE])
+        if len(sketch) >= KMV_SIZE:
+            return sketch[:KMV_SIZE]
+    return np.unique(hashes)[:KMV_SIZE]
+
+
+def kmv_estimate(sketch: np.ndarray) -> float:
+    """
+        Estimates the number of distinct values from their KMV sketch.
+
+        @param sketch: the sketch returned by kmv_sketch.
+    """
+    if len(sketch) < KMV_SIZE:
+        return float(len(sketch))
+    return (KMV_SIZE - 1) * 2.0 ** 64 / (float(sketch[KMV_SIZE - 1]) + 1)
+
+
+def _wrap(dtype: int, total: int) -> int:
+    """
+        Wraps an integer sum around like the uint64 / int64 accumulator of NumPy and Pandas.
+    """
+    if dtype in UNSIGNED_TYPES:
+        return total & _UINT64_MASK
+    return ((total + (1 << 63)) & _UINT64_MASK) - (1 << 63)
+
+
+def _block_stats(dtype: int, values: np.ndarray, valid: Optional[np.ndarray], hashes: np.ndarray,
+                 dictionary: Optional[list]) -> dict:
+    present = values if valid is None else values[valid]
+    stats = {'num_rows': len(values), 'null_count': len(values) - len(present), 'min': None, 'max': None,
+             'sum': None, 'float_sum': None}
+    if len(present) > 0:
+        low, high = present.min(), present.max()
+        if present.dtype != object:
+            low, high = low.item(), high.item()
+        if dtype == DataType.DataType.DictString:
+            # Dictionaries are sorted, so the smallest code is the smallest string.
+            low, high = dictionary[low], dictionary[high]
+        stats['min'], stats['max'] = low, high
+    if dtype in FLOAT_TYPES:
+        stats['sum'] = float(np.sum(present, dtype=np.float64))
+    elif dtype in UNSIGNED_TYPES:
+        stats['sum'] = int(np.sum(present, dtype=np.uint64))
+    elif dtype in NUMERIC_TYPES:
+        stats['sum'] = int(np.sum(present, dtype=np.int64))
+    if dtype in NUMERIC_TYPES:
+        stats['float_sum'] = float(np.sum(present, dtype=np.float64))
+
+    stats['sketch'] = kmv_sketch(hashes if valid is None else hashes[valid])
+    stats['distinct'] = kmv_estimate(stats['sketch'])
+    return stats
+
+
+def merge_stats(dtype: int, parts: List[dict]) -> dict:
+    """
+        Combines the statistics of disjoint sets of rows of a column, e.g. of its row groups.
+
+        @param dtype: DataType of the column.
+        @param parts: the statistics to combine; at least one.
+    """
+    present = [part for part in parts if part['min'] is not None]
+    stats = {
+        'num_rows': sum(part['num_rows'] for part in parts),
+        'null_count': sum(part['null_count'] for part in parts),
+        'min': min(part['min'] for part in present) if present else None,
+        'max': max(part['max'] for part in present) if present else None,
+        'sum': None,
+        'float_sum': None,
+    }
+    if dtype in FLOAT_TYPES:
+        stats['sum'] = sum(part['sum'] for part in parts)
+    elif dtype in NUMERIC_TYPES:
+        stats['sum'] = _wrap(dtype, sum(part['sum'] for part in parts))
+    if dtype in NUMERIC_TYPES:
+        stats['float_sum'] = sum(part['float_sum'] for part in parts)
+    stats['sketch'] = kmv_sketch(np.concatenate([part['sketch'] for part in parts]))
+    stats['distinct'] = kmv_estimate(stats['sketch'])
+    return stats
+
+
+def compute_stats(dtype: int, values: np.ndarray, valid: Optional[np.ndarray], zone_size: int,
+                  dictionary: Optional[list] = None) -> Tuple[dict, List[dict]]:
+    """
+        Computes the statistics of a column and of every block of zone_size of its rows. Returns
+        (column statistics, block statistics); the block statistics are only returned if the
+        column spans more than one block. NaNs count as missing values.
+
+        @param dtype: DataType of the column.
+        @param values: the stored values: numbers (DateTime columns as int64 ticks, Bool columns
+            unpacked), the codes of DictString and Categorical columns, or an object array of strs.
+        @param valid: boolean mask of the present values, or None if none is missing.
+        @param zone_size: number of rows per block.
+        @param dictionary: the dictionary or categories of a DictString or Categorical column.
+    """
+    if values.dtype.kind == 'f':
+        present = ~np.isnan(values)
+        valid = present if valid is None else valid & present
+    if dictionary is not None:
+        hashes = pd.util.hash_array(np.array(dictionary, dtype=object))[values]
+    else:
+        hashes = pd.util.hash_array(values.astype(np.int64) if values.dtype.kind == 'M' else values)
+
+    bounds = range(0, max(len(values), 1), zone_size)
+    zones = [_block_stats(dtype, values[start:start + zone_size], None if valid is None else valid[start:start + zone_size],
+                          hashes[start:start + zone_size], dictionary) for start in bounds]
+    if len(zones) == 1:
+        return zones[0], []
+    return merge_stats(dtype, zones), zones
+
+
+def encoded_stats(encoded: dict, zone_size: int) -> Tuple[dict, List[dict]]:
+    """
+        Computes the statistics of a column encoded by fb_column.encode_column; see compute_stats.
+
+        @param encoded: the encoded column.
+        @param zone_size: number of rows per block.
+    """
+    dtype = encoded['dtype']
+    vectors = encoded['vectors']
+    valid = None
+    if 'Validity' in vectors:
+        valid = np.unpackbits(vectors['Validity'][0], count=encoded['num_rows'], bitorder='little').view(bool)
+
+    dictionary = None
+    if dtype in CODED_TYPES:
+        values = np.asarray(vectors['Codes'][0])
+        dictionary = encoded['strings']['Dictionary']
+    elif dtype == DataType.DataType.String:
+        values = np.empty(len(encoded['values']), dtype=object)
+        values[:] = encoded['values']
+    elif dtype == DataType.DataType.Bool:
+        values = np.unpackbits(vectors['BoolValues'][0], count=encoded['num_rows'], bitorder='little').view(bool)
+    else:
+        np_dtype, field = FIXED_WIDTH_TYPES[dtype]
+        values = np.asarray(vectors[field][0], dtype=np_dtype)
+    return compute_stats(dtype, values, valid, zone_size, dictionary)
+
+
+def _to_int64(value: int) -> int:
+    return value - (1 << 64) if value >= 1 << 63 else value
+
+
+def create_stats(builder: flatbuffers.Builder, dtype: int, stats: dict, sketch: bool = True) -> int:
+    """
+        Writes statistics into the builder as a ColumnStats table and returns its offset.
+
+        @param builder: the flatbuffer builder.
+        @param dtype: DataType of the column.
+        @param stats: the statistics.
+        @param sketch: whether to write the distinct sketch, which only column statistics keep.
+    """
+    min_string = max_string = sketch_vector = None
+    if dtype in STRING_TYPES and stats['min'] is not None:
+        min_string, max_string = builder.CreateString(stats['min']), builder.CreateString(stats['max'])
+    if sketch:
+        sketch_vector = builder.CreateNumpyVector(np.ascontiguousarray(stats['sketch'], dtype='<u8'))
+
+    has_min_max = stats['min'] is not None
+    builder.ForceDefaults(True)
+    ColumnStats.Start(builder)
+    ColumnStats.AddNumRows(builder, stats['num_rows'])
+    ColumnStats.AddNullCount(builder, stats['null_count'])
+    ColumnStats.AddHasMinMax(builder, has_min_max)
+    if dtype in FLOAT_TYPES:
+        ColumnStats.AddMinFloat(builder, stats['min'] if has_min_max else 0.0)
+        ColumnStats.AddMaxFloat(builder, stats['max'] if has_min_max else 0.0)
+    elif min_string is not None:
+        ColumnStats.AddMinString(builder, min_string)
+        ColumnStats.AddMaxString(builder, max_string)
+    elif dtype not in STRING_TYPES:
+        ColumnStats.AddMinInt(builder, _to_int64(int(stats['min'])) if has_min_max else 0)
+        ColumnStats.AddMaxInt(builder, _to_int64(int(stats['max'])) if has_min_max else 0)
+        ColumnStats.AddSumInt(builder, _to_int64(stats['sum'] or 0))
+    if dtype in NUMERIC_TYPES:
+        ColumnStats.AddSumFloat(builder, stats['float_sum'])
+    ColumnStats.AddDistinctCount(builder, round(stats['distinct']))
+    if sketch_vector is not None:
+        ColumnStats.AddDistinctSketch(builder, sketch_vector)
+    offset = ColumnStats.End(builder)
+    builder.ForceDefaults(False)
+    return offset
+
+
+def read_stats(table: ColumnStats.ColumnStats, dtype: int) -> dict:
+    """
+        Reads a ColumnStats table back into a statistics dict.
+
+        @param table: the flatbuffer table.
+        @param dtype: DataType of the column.
+    """
+    stats = {'num_rows': table.NumRows(), 'null_count': table.NullCount(), 'min': None, 'max': None,
+             'sum': None, 'float_sum': None}
+    unsigned = _UINT64_MASK if dtype in UNSIGNED_TYPES else -1
+    if table.HasMinMax():
+        if dtype in FLOAT_TYPES:
+            stats['min'], stats['max'] = table.MinFloat(), table.MaxFloat()
+        elif dtype in STRING_TYPES:
+            stats['min'], stats['max'] = table.MinString().decode(), table.MaxString().decode()
+        else:
+            stats['min'], stats['max'] = table.MinInt() & unsigned, table.MaxInt() & unsigned
+    if dtype in FLOAT_TYPES:
+        stats['sum'] = table.SumFloat()
+    elif dtype in NUMERIC_TYPES:
+        stats['sum'] = table.SumInt() & unsigned
+    if dtype in NUMERIC_TYPES:
+        stats['float_sum'] = table.SumFloat()
+
+    sketch = np.empty(0, dtype=np.uint64) if table.DistinctSketchIsNone() else table.DistinctSketchAsNumpy()
+    stats['sketch'] = sketch[sketch != _SKETCH_PAD]
+    stats['distinct'] = float(table.DistinctCount())
+    return stats
+
+
+def _mutate(table: ColumnStats.ColumnStats, slot: int, flags, value) -> None:
+    position = table._tab.Offset(slot)
+    if position == 0:
+        raise ValueError("The statistics can't be rewritten in place")
+    flatbuffers.encode.Write(flags.packer_type, table._tab.Bytes, table._tab.Pos + position, value)
+
+
+def rewrite_stats(table: ColumnStats.ColumnStats, dtype: int, stats: dict) -> None:
+    """
+        Overwrites a ColumnStats table of a numeric column in place, e.g. after its values were
+        mapped. The table has to be in a writable buffer.
+
+        @param table: the flatbuffer table.
+        @param dtype: DataType of the column.
+        @param stats: the new statistics of the same rows.
+    """
+    number_types = flatbuffers.number_types
+    has_min_max = stats['min'] is not None
+    _mutate(table, _NULL_COUNT, number_types.Uint64Flags, stats['null_count'])
+    _mutate(table, _HAS_MIN_MAX, number_types.BoolFlags, has_min_max)
+    if dtype in FLOAT_TYPES:
+        _mutate(table, _MIN_FLOAT, number_types.Float64Flags, stats['min'] if has_min_max else 0.0)
+        _mutate(table, _MAX_FLOAT, number_types.Float64Flags, stats['max'] if has_min_max else 0.0)
+    else:
+        _mutate(table, _MIN_INT, number_types.Int64Flags, _to_int64(int(stats['min'])) if has_min_max else 0)
+        _mutate(table, _MAX_INT, number_types.Int64Flags, _to_int64(int(stats['max'])) if has_min_max else 0)
+        _mutate(table, _SUM_INT, number_types.Int64Flags, _to_int64(stats['sum']))
+    _mutate(table, _SUM_FLOAT, number_types.Float64Flags, stats['float_sum'])
+    _mutate(table, _DISTINCT_COUNT, number_types.Uint64Flags, round(stats['distinct']))
+
+    if not table.DistinctSketchIsNone():
+        # A function maps equal values to equal results, so the sketch can only shrink.
+        sketch = table.DistinctSketchAsNumpy()
+        count = min(len(sketch), len(stats['sketch']))
+        sketch[:count] = stats['sketch'][:count]
+        sketch[count:] = _SKETCH_PAD
+
+
+def zone_maps(table, dtype: int) -> List[dict]:
+    """
+        Returns the statistics of every block of a column, from the Metadata of the column. A column
+        within a single block has no zone map; its column statistics are returned instead.
+
+        @param table: the Metadata table of the column, which must have statistics.
+        @param dtype: DataType of the column.
+    """
+    if table.ZoneMapsLength() == 0:
+        return [read_stats(table.Stats(), dtype)]
+    return [read_stats(table.ZoneMaps(i), dtype) for i in range(table.ZoneMapsLength())]
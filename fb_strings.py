@@ -0,0 +1,180 @@
+"""
+    Blob layout of String columns.
+
+    A vector of flatbuffer strings scatters its values through the buffer: every read follows an
+    indirect offset to a separately length-prefixed string and decodes it on its own. String
+    columns are instead written as one int32 offsets vector plus one contiguous blob of UTF-8
+    bytes, row i spanning blob[offsets[i]:offsets[i + 1]]. A range of rows is then decoded with a
+    single decode of its bytes, sliced at character offsets (the byte offsets themselves when the
+    bytes are ASCII), and equality predicates and hashes run on the raw bytes without decoding
+    anything. Columns written before the layout existed keep their string_values vector.
+"""
+import numpy as np
+
+from typing import Iterable, List, Optional, Tuple
+
+from CS598 import Column
+
+
+# Rows hashed, or candidate rows compared, at a time, bounding the temporary arrays.
+_CHUNK_ROWS = 1 << 16
+
+# Multiplier of the polynomial hash of the bytes (the 64-bit FNV prime; odd, so invertible
+# modulo 2^64), and its inverse.
+_HASH_MULTIPLIER = 0x100000001b3
+_HASH_INVERSE = pow(_HASH_MULTIPLIER, -1, 1 << 64)
+
+
+def encode_strings(strings: List[Optional[str]]) -> Tuple[np.ndarray, np.ndarray]:
+    """
+        Encodes strings into the blob layout. Returns the offsets (int64, one more than there are
+        strings) and the blob (uint8). None is written as an empty string.
+
+        @param strings: the strings.
+    """
+    data = [b'' if value is None else value.encode('utf-8') for value in strings]
+    offsets = np.zeros(len(data) + 1, dtype=np.int64)
+    np.cumsum(np.fromiter(map(len, data), dtype=np.int64, count=len(data)), out=offsets[1:])
+    return offsets, np.frombuffer(b''.join(data), dtype=np.uint8)
+
+
+def has_blob(column: Column.Column) -> bool:
+    """
+        Tells whether a String column is stored in the blob layout.
+
+        @param column: the flatbuffer column.
+    """
+    return not column.StringOffsetsIsNone()
+
+
+def _vectors(column: Column.Column) -> Tuple[np.ndarray, np.ndarray]:
+    blob = np.empty(0, dtype=np.uint8) if column.StringBlobIsNone() else column.StringBlobAsNumpy()
+    return column.StringOffsetsAsNumpy(), blob
+
+
+def _row_ids(rows, total: int) -> np.ndarray:
+    """
+        Converts a row selection (see fb_column.column_values) to an array of row ids.
+    """
+    if rows is None:
+        return np.arange(total)
+    elif isinstance(rows, (int, np.integer)):
+        return np.arange(min(rows, total))
+    elif isinstance(rows, slice):
+        return np.arange(*rows.indices(total))
+    rows = np.asarray(rows, dtype=np.int64)
+    return np.where(rows < 0, rows + total, rows)
+
+
+def decode_strings(column: Column.Column, rows=None) -> np.ndarray:
+    """
+        Decodes the selected values of a String column in the blob layout into an object array.
+        Missing values read as empty strings; see fb_column.column_validity.
+
+        @param column: the flatbuffer column.
+        @param rows: number of leading rows, array of row ids or slice of them; all rows if None.
+    """
+    offsets, blob = _vectors(column)
+    row_ids = _row_ids(rows, len(offsets) - 1)
+    values = np.empty(len(row_ids), dtype=object)
+    if len(row_ids) == 0:
+        return values
+
+    low, high = int(row_ids.min()), int(row_ids.max()) + 1
+    if 8 * len(row_ids) < high - low:
+        # Few rows spread over many: decode them one by one.
+        view = memoryview(blob)
+        values[:] = [str(view[begin:end], 'utf-8') for begin, end in
+                     zip(offsets[row_ids].tolist(), offsets[row_ids + 1].tolist())]
+        return values
+
+    begin = int(offsets[low])
+    span = blob[begin:int(offsets[high])]
+    text = span.tobytes().decode('utf-8')
+    starts = offsets[low:high + 1] - begin
+    if len(text) != len(span):
+        # Not ASCII: map byte offsets to character offsets by counting the bytes starting a character.
+        starts = np.concatenate(([0], np.cumsum((span & 0xC0) != 0x80)))[starts]
+    local = row_ids - low
+    values[:] = [text[start:end] for start, end in zip(starts[local].tolist(), starts[local + 1].tolist())]
+    return values
+
+
+def strings_isin(column: Column.Column, candidates: Iterable, rows=None) -> np.ndarray:
+    """
+        Tells which of the selected values of a String column in the blob layout equal one of the
+        candidates, comparing their UTF-8 bytes in place. Candidates that aren't strings match
+        nothing.
+
+        @param column: the flatbuffer column.
+        @param candidates: the values to look for.
+        @param rows: number of leading rows, array of row ids or slice of them; all rows if None.
+    """
+    offsets, blob = _vectors(column)
+    row_ids = _row_ids(rows, len(offsets) - 1)
+    starts = offsets[row_ids]
+    lengths = offsets[row_ids + 1] - starts
+    mask = np.zeros(len(row_ids), dtype=bool)
+    for candidate in candidates:
+        if not isinstance(candidate, str):
+            continue
+        raw = np.frombuffer(candidate.encode('utf-8'), dtype=np.uint8)
+        matches = np.flatnonzero(lengths == len(raw))
+        if len(raw) == 0:
+            mask[matches] = True
+            continue
+        step = max(_CHUNK_ROWS // len(raw), 1)
+        for first in range(0, len(matches), step):
+            chunk = matches[first:first + step]
+            window = blob[starts[chunk][:, None] + np.arange(len(raw))]
+            mask[chunk[(window == raw).all(axis=1)]] = True
+    return mask
+
+
+def _hash_spans(offsets: np.ndarray, blob: np.ndarray) -> np.ndarray:
+    """
+        Hashes the byte spans blob[offsets[i]:offsets[i + 1]]. A span hashes to the same value
+        wherever it lies: sum((byte_k + 1) * M^k) modulo 2^64 over its bytes, computed for every
+        span at once from the prefix sums of the blob, then mixed with its length.
+    """
+    hashes = np.empty(len(offsets) - 1, dtype=np.uint64)
+    for first in range(0, len(hashes), _CHUNK_ROWS):
+        bounds = offsets[first:first + _CHUNK_ROWS + 1].astype(np.int64)
+        base = int(bounds[0])
+        span = blob[base:int(bounds[-1])].astype(np.uint64) + np.uint64(1)
+        # powers[k] = M^(k + 1), inverses[k] = M^-(k + 1).
+        powers = np.cumprod(np.full(len(span), _HASH_MULTIPLIER, dtype=np.uint64))
+        inverses = np.cumprod(np.full(len(span) + 1, _HASH_INVERSE, dtype=np.uint64))
+        prefix = np.zeros(len(span) + 1, dtype=np.uint64)
+        np.cumsum(span * powers, out=prefix[1:])
+        starts, ends = bounds[:-1] - base, bounds[1:] - base
+        # Multiplying by M^-(start + 1) makes every span start at M^0, wherever it lies.
+        h = (prefix[ends] - prefix[starts]) * inverses[starts]
+        h ^= (ends - starts).astype(np.uint64)
+        # splitmix64 finalizer.
+        h ^= h >> np.uint64(30)
+        h *= np.uint64(0xbf58476d1ce4e5b9)
+        h ^= h >> np.uint64(27)
+        h *= np.uint64(0x94d049bb133111eb)
+        h ^= h >> np.uint64(31)
+        hashes[first:first + len(h)] = h
+    return hashes
+
+
+def string_hashes(column: Column.Column) -> np.ndarray:
+    """
+        Returns the 64-bit hashes of the raw bytes of every value of a String column in the blob
+        layout; hash_strings gives the same hashes for the same strings.
+
+        @param column: the flatbuffer column.
+    """
+    return _hash_spans(*_vectors(column))
+
+
+def hash_strings(strings: List[Optional[str]]) -> np.ndarray:
+    """
+        Returns the 64-bit hashes of the UTF-8 bytes of strings, as string_hashes computes them.
+
+        @param strings: the strings; None hashes as the empty string.
+    """
+    return _hash_spans(*encode_strings(strings))
@@ -0,0 +1,177 @@
+"""
+    Pandas-like view of a Flatbuffer Dataframe.
+
+    The fb_dataframe functions start from the raw buffer on every call: they parse the root, walk
+    the vtables to find their columns and allocate new Column and Metadata wrappers each time.
+    FbDataFrame does that once. It resolves the row batches and columns of a buffer when it is
+    created, and the first time a plain fixed-width column is read it caches a read-only NumPy
+    view of its values, so later reads of the column are slices of that view. Other columns are
+    decoded on every read, through the column wrappers resolved once.
+"""
+import numpy as np
+import pandas as pd
+
+from typing import List, Optional, Tuple, Union
+
+from CS598 import DataType
+from fb_column import FIXED_WIDTH_TYPES, column_dictionary, column_values, pandas_dtype
+from fb_dataframe import _batches_to_pandas, _root, _row_groups
+from fb_encoding import is_encoded
+
+
+class _ILoc:
+    """
+        Positional row slicing of an FbDataFrame, as in df.iloc[start:stop:step].
+    """
+    def __init__(self, frame: 'FbDataFrame'):
+        self.frame = frame
+
+    def __getitem__(self, rows: slice) -> pd.DataFrame:
+        if not isinstance(rows, slice):
+            raise TypeError("FbDataFrame.iloc only supports row slices")
+        return self.frame.to_pandas(rows=rows)
+
+
+class FbDataFrame:
+    """
+        Read-only view of a Flatbuffer Dataframe with a Pandas-like surface: columns, dtypes,
+        shape, len(), df[col_name], df[[col_names]], df[start:stop], head() and iloc[start:stop].
+        Rows are returned as Pandas objects; numeric values are read through zero-copy views when
+        they lie in a single row batch. Unknown columns raise KeyError, as in Pandas.
+
+        The view holds the buffer: it must stay alive, and unchanged in size and layout, for as
+        long as the view is used.
+    """
+    def __init__(self, fb_buf: Union[memoryview, List[memoryview]]):
+        """
+            @param fb_buf: buffer holding the Flatbuffer Dataframe, e.g. bytes returned by
+                to_flatbuffer or a region of shared memory, or list of buffers holding its chunks
+                (see fb_dataframe._root).
+        """
+        self.fb_buf = fb_buf
+        df = _root(fb_buf)
+        self._num_rows = df.NumRows()
+        batches = _row_groups(df)
+        first = batches[0]
+        self._names = [first.Columns(i).Metadata().Name().decode() for i in range(first.ColumnsLength())]
+        # Number of rows and columns by name of every row batch.
+        self._batches = [(batch.NumRows(), {name: batch.Columns(i) for i, name in enumerate(self._names)})
+                         for batch in batches]
+        self._kinds = {name: column.Metadata().Dtype() for name, column in self._batches[0][1].items()}
+        self._dtypes = None
+        # (batch, column name) -> read-only view of the values, or None if they need decoding.
+        self._views = {}
+
+    def _view(self, batch: int, name: str) -> Optional[np.ndarray]:
+        key = (batch, name)
+        if key not in self._views:
+            column = self._batches[batch][1][name]
+            view = None
+            if self._kinds[name] in FIXED_WIDTH_TYPES and not is_encoded(column) and pandas_dtype(column) is None:
+                view = column_values(column)
+                view.flags.writeable = False
+            self._views[key] = view
+        return self._views[key]
+
+    def _read(self, batch: int, name: str, rows: slice) -> Optional[np.ndarray]:
+        view = self._view(batch, name)
+        return None if view is None else view[rows]
+
+    def _check_columns(self, names: List[str]) -> None:
+        missing = [name for name in names if name not in self._kinds]
+        if missing:
+            raise KeyError(f"Columns not found: {', '.join(missing)}")
+
+    @property
+    def columns(self) -> pd.Index:
+        return pd.Index(self._names, dtype=object)
+
+    @property
+    def dtypes(self) -> pd.Series:
+        """
+            The Pandas dtype of every column, as returned by to_pandas().
+        """
+        if self._dtypes is None:
+            dtypes = []
+            for name in self._names:
+                column = self._batches[0][1][name]
+                kind = self._kinds[name]
+                if kind == DataType.DataType.Categorical:
+                    dtype = pd.CategoricalDtype(column_dictionary(column), ordered=column.Metadata().Ordered())
+                elif pandas_dtype(column) is not None:
+                    dtype = pandas_dtype(column)
+                elif kind in FIXED_WIDTH_TYPES:
+                    dtype = np.dtype(FIXED_WIDTH_TYPES[kind][0]).newbyteorder('=')
+                elif kind == DataType.DataType.Bool:
+                    dtype = np.dtype(bool)
+                else:
+                    dtype = np.dtype(object)
+                dtypes.append(dtype)
+            self._dtypes = pd.Series(dtypes, index=self.columns, dtype=object)
+        return self._dtypes
+
+    @property
+    def shape(self) -> Tuple[int, int]:
+        return self._num_rows, len(self._names)
+
+    @property
+    def iloc(self) -> _ILoc:
+        return _ILoc(self)
+
+    def __len__(self) -> int:
+        return self._num_rows
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._kinds
+
+    def __iter__(self):
+        return iter(self._names)
+
+    def __repr__(self) -> str:
+        return f"FbDataFrame({self._num_rows} rows x {len(self._names)} columns: {', '.join(self._names)})"
+
+    def __getitem__(self, key):
+        """
+            df[col_name] returns a column as a Pandas Series, df[[col_names]] some columns and
+            df[start:stop] some rows as a Pandas Dataframe.
+        """
+        if isinstance(key, slice):
+            return self.to_pandas(rows=key)
+        elif isinstance(key, list):
+            return self.to_pandas(key)
+        return self.to_pandas([key])[key]
+
+    def column(self, name: str) -> np.ndarray:
+        """
+            Returns the values of a column as a NumPy array, read-only and without copying them
+            for plain fixed-width columns held in a single row batch; see fb_column.column_values.
+
+            @param name: name of the column.
+        """
+        self._check_columns([name])
+        parts = []
+        for batch, (_, batch_columns) in enumerate(self._batches):
+            view = self._view(batch, name)
+            parts.append(column_values(batch_columns[name]) if view is None else view)
+        return parts[0] if len(parts) == 1 else np.concatenate(parts)
+
+    def head(self, rows: int = 5) -> pd.DataFrame:
+        """
+            Returns the first rows as a Pandas Dataframe, or all but the last -rows ones if rows
+            is negative, as DataFrame.head does.
+
+            @param rows: number of rows.
+        """
+        return self.to_pandas(rows=slice(0, rows))
+
+    def to_pandas(self, columns: Optional[List[str]] = None, rows: Optional[slice] = None) -> pd.DataFrame:
+        """
+            Returns a range of rows of some columns as a Pandas Dataframe, like
+            df.iloc[rows][columns]; see fb_dataframe.fb_dataframe_to_pandas.
+
+            @param columns: names of the columns to return, in order; all columns if None.
+            @param rows: slice of the rows to return, with a positive step; all rows if None.
+        """
+        columns = list(self._names if columns is None else columns)
+        self._check_columns(columns)
+        return _batches_to_pandas(self._batches, columns, rows, self._num_rows, self._read)
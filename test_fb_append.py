@@ -0,0 +1,162 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from fb_dataframe import to_flatbuffer, fb_dataframe_filter, fb_dataframe_group_by, fb_dataframe_to_pandas
+from fb_index import build_index, index_lookup, index_range
+from fb_shared_memory import CHUNK_SEPARATOR, FbSharedMemory
+from test_fb_column import generate_typed_df
+from test_fb_dictionary import generate_country_df
+
+
+def test_chunks_read_as_one_dataframe():
+    df = generate_country_df(900)
+    chunks = [to_flatbuffer(df.iloc[:500]), to_flatbuffer(df.iloc[500:800], row_group_size=120),
+              to_flatbuffer(df.iloc[800:])]
+    pd.testing.assert_frame_equal(fb_dataframe_to_pandas(chunks), df)
+    pd.testing.assert_frame_equal(fb_dataframe_to_pandas(chunks, ["country"], slice(450, 850, 4)),
+                                  df[["country"]].iloc[450:850:4])
+    filters = [("int_col", ">", 5), ("country", "in", ["US", "JP"])]
+    mask = (df["int_col"] > 5) & df["country"].isin(["US", "JP"])
+    assert np.array_equal(fb_dataframe_filter(chunks, filters), np.flatnonzero(mask))
+    result = fb_dataframe_group_by(chunks, "country", {"float_col": ["min", "max"], "int_col": "sum"})
+    expected = df.groupby("country").agg({"float_col": ["min", "max"], "int_col": "sum"})
+    pd.testing.assert_frame_equal(result, expected)
+
+
+def test_chunks_mixing_string_layouts():
+    # A short chunk of repeated strings is dictionary encoded where the rest of the column isn't.
+    unique = pd.DataFrame({"s": [f"x{i}" for i in range(100)], "v": range(100)})
+    repeated = pd.DataFrame({"s": ["x3", "x5"] * 50, "v": range(100)})
+    for parts in [[unique, repeated], [repeated, unique]]:
+        chunks = [to_flatbuffer(part) for part in parts]
+        df = pd.concat(parts, ignore_index=True)
+        pd.testing.assert_frame_equal(fb_dataframe_to_pandas(chunks), df)
+        assert np.array_equal(fb_dataframe_filter(chunks, [("s", ">=", "x5")]), np.flatnonzero(df["s"] >= "x5"))
+        result = fb_dataframe_group_by(chunks, "s", {"v": "sum"})
+        assert result["v"].to_dict() == df.groupby("s").agg({"v": "sum"})["v"].to_dict()
+        for kind in ["hash", "sorted"]:
+            index = build_index(chunks, "s", kind)
+            assert np.array_equal(index_lookup(chunks, index, "x5"), np.flatnonzero(df["s"] == "x5"))
+        index = build_index(chunks, "s", "sorted")
+        assert np.array_equal(index_range(chunks, index, "x3", "x6"), np.flatnonzero(df["s"].between("x3", "x6")))
+
+
+def test_shared_memory_append_rows():
+    df = generate_country_df(1000)
+    fb_shm = FbSharedMemory("CS598_append_test", segment_size=1 << 20)
+    fb_shm.add_dataframe("events", df.iloc[:600], indexes={"country": "hash"})
+    head = fb_shm.dataframe("events").head()
+    fb_shm.append_rows("events", df.iloc[600:900])
+    # Columns may come in any order; the chunk matching no rows adds nothing.
+    fb_shm.append_rows("events", df.iloc[900:][df.columns[::-1]])
+    fb_shm.append_rows("events", df.iloc[:0])
+    assert fb_shm.catalog.lookup(f"events{CHUNK_SEPARATOR}2") is not None
+    assert fb_shm.catalog.lookup(f"events{CHUNK_SEPARATOR}3") is None
+
+    # Another attached process reads every chunk.
+    fb_shm2 = FbSharedMemory("CS598_append_test")
+    pd.testing.assert_frame_equal(fb_shm2.dataframe_head("events", 1000), df)
+    pd.testing.assert_frame_equal(fb_shm2.dataframe_to_pandas("events", rows=slice(550, 950)),
+                                  df.iloc[550:950])
+    view = fb_shm2.dataframe("events")
+    assert view is not head and view.shape == df.shape
+    assert np.array_equal(fb_shm2.column("events", "int_col"), df["int_col"])
+
+    selection = fb_shm2.dataframe_filter("events", [("float_col", "<", 5000)])
+    assert np.array_equal(selection, np.flatnonzero(df["float_col"] < 5000))
+    expected = df.groupby("country").agg({"int_col": "sum", "float_col": "mean"})
+    for processes in [1, 2]:
+        result = fb_shm2.dataframe_group_by("events", "country", {"int_col": "sum", "float_col": "mean"}, processes)
+        pd.testing.assert_frame_equal(result, expected)
+    stats = fb_shm2.dataframe_column_stats("events", "int_col")
+    assert (stats["count"], stats["min"], stats["max"], stats["sum"]) == (1000, df["int_col"].min(), df["int_col"].max(), df["int_col"].sum())
+    sums, = fb_shm2.dataframe_batch("events", [("group_by", "country", {"int_col": "sum"})])
+    assert sums["int_col"].to_dict() == expected["int_col"].to_dict()
+
+    # Every chunk is indexed.
+    assert np.array_equal(fb_shm2.dataframe_index_lookup("events", "country", "DE"), np.flatnonzero(df["country"] == "DE"))
+    assert all(index_buf is not None for _, index_buf, _ in fb_shm2._index_parts("events", "country"))
+
+    # Maps reach every chunk, and moved chunks are still found.
+    fb_shm2.dataframe_map_numeric_column("events", "int_col", lambda x: x * 2)
+    fb_shm.add_dataframe("filler", df.iloc[:10])
+    fb_shm.remove_dataframe("filler")
+    fb_shm.reclaim()
+    fb_shm.compact()
+    assert np.array_equal(fb_shm2.dataframe("events").column("int_col"), df["int_col"] * 2)
+
+    with pytest.raises(ValueError):
+        fb_shm.append_rows("events", df[["int_col", "country"]])
+    with pytest.raises(ValueError):
+        fb_shm.append_rows("events", df.astype({"int_col": float}))
+    with pytest.raises(ValueError):
+        fb_shm.append_rows("missing", df)
+
+    # Replacing or removing the dataframe drops its chunks.
+    fb_shm.replace_dataframe("events", df.iloc[:5])
+    pd.testing.assert_frame_equal(fb_shm2.dataframe_head("events", 100), df.iloc[:5])
+    fb_shm.append_rows("events", df.iloc[5:10])
+    fb_shm.remove_dataframe("events")
+    assert not any(name.startswith("events") for name in fb_shm.catalog.entries())
+
+    fb_shm2.close()
+    fb_shm.unlink()
+    fb_shm.close()
+
+
+def test_append_to_indexed_dataframe():
+    df = generate_country_df(1200)
+    fb_shm = FbSharedMemory("CS598_append_index_test", segment_size=1 << 20)
+    fb_shm.add_dataframe("indexed", df.iloc[:800], indexes={"int_col": ["sorted", "hash"]})
+    base_index = fb_shm.catalog.lookup("indexed\x1fint_col")
+
+    # Appending indexes the new rows only: the index of the first rows stays where it was.
+    fb_shm.append_rows("indexed", df.iloc[800:1000])
+    fb_shm.append_rows("indexed", df.iloc[1000:])
+    assert fb_shm.catalog.lookup("indexed\x1fint_col")[:3] == base_index[:3]
+    assert fb_shm.catalog.lookup(f"indexed{CHUNK_SEPARATOR}2\x1fint_col").num_rows == 200
+    assert all(index_buf is not None for _, index_buf, _ in fb_shm._index_parts("indexed", "int_col"))
+    stats = fb_shm.stats()
+    assert (stats["dataframes"], stats["indexes"], stats["chunks"]) == (1, 3, 2)
+
+    def check(values):
+        assert np.array_equal(fb_shm.dataframe_index_lookup("indexed", "int_col", 3), np.flatnonzero(values == 3))
+        assert np.array_equal(fb_shm.dataframe_index_range("indexed", "int_col", 2, 5, "left"),
+                              np.flatnonzero((values >= 2) & (values < 5)))
+    check(df["int_col"])
+
+    # Mapping rebuilds the indexes of every chunk.
+    fb_shm.dataframe_map_numeric_column("indexed", "int_col", lambda x: 8 - x)
+    check(8 - df["int_col"])
+
+    fb_shm.drop_index("indexed", "int_col")
+    assert not any("\x1f" in name for name in fb_shm.catalog.entries())
+    check(8 - df["int_col"])
+
+    fb_shm.unlink()
+    fb_shm.close()
+
+
+def test_append_typed_rows():
+    df = generate_typed_df(300)
+    fb_shm = FbSharedMemory("CS598_append_typed_test", segment_size=1 << 20)
+    fb_shm.add_dataframe("typed", df.iloc[:200])
+
+    # Ordered categories in another order make another dtype.
+    shuffled = df.iloc[200:].copy()
+    shuffled["category_col"] = shuffled["category_col"].cat.set_categories(["high", "mid", "low"], ordered=True)
+    with pytest.raises(ValueError):
+        fb_shm.append_rows("typed", shuffled)
+    fb_shm.append_rows("typed", df.iloc[200:])
+    pd.testing.assert_frame_equal(fb_shm.dataframe_to_pandas("typed"), df)
+
+    # Unordered categories listed in another order are stored with the codes of the dataframe's.
+    unordered = pd.DataFrame({"label": pd.Categorical(["a", "b", "a"], categories=["a", "b"]), "n": [1, 2, 3]})
+    fb_shm.add_dataframe("unordered", unordered)
+    fb_shm.append_rows("unordered", pd.DataFrame({"label": pd.Categorical(["b", "b"], categories=["b", "a"]), "n": [4, 5]}))
+    assert fb_shm.dataframe_to_pandas("unordered")["label"].tolist() == ["a", "b", "a", "b", "b"]
+    assert fb_shm.dataframe_group_by("unordered", "label", {"n": "sum"})["n"].to_dict() == {"a": 4, "b": 11}
+
+    fb_shm.unlink()
+    fb_shm.close()
@@ -0,0 +1,81 @@
+import asyncio
+import multiprocessing
+import time
+
+import pytest
+
+from fb_async import ADDED, REMOVED, RECHECK_INTERVAL, UPDATED, AsyncFbSharedMemory
+from fb_shared_memory import FbSharedMemory
+from test_fb_dataframe import generate_random_df
+
+
+POOL_NAME = "CS598_async_test"
+
+
+def publish_later(name: str) -> None:
+    time.sleep(0.2)
+    fb_shm = FbSharedMemory(POOL_NAME, segment_size=1 << 20)
+    fb_shm.add_dataframe(name, generate_random_df(10, 1))
+    fb_shm.close()
+
+
+def test_wait_for_and_changes():
+    fb_shm = FbSharedMemory(POOL_NAME, segment_size=1 << 20)
+    client = AsyncFbSharedMemory(shm=FbSharedMemory(POOL_NAME, segment_size=1 << 20))
+
+    async def wait_for_other_process():
+        writer = multiprocessing.get_context("fork").Process(target=publish_later, args=("async_remote",))
+        writer.start()
+        entry = await client.wait_for("async_remote", timeout=10)
+        # Woken up by the writer, not by the periodic re-check.
+        woken_at = time.monotonic()
+        writer.join()
+        return entry, woken_at - (client_started + 0.2)
+
+    client_started = time.monotonic()
+    entry, latency = asyncio.run(wait_for_other_process())
+    assert entry.num_rows == 10
+    assert latency < RECHECK_INTERVAL
+
+    async def collect_changes():
+        events = []
+        existing = client.changes(include_existing=True)
+        assert (await existing.__anext__()).name == "async_remote"
+
+        async def write():
+            fb_shm.add_dataframe("async_df", generate_random_df(10, 1))
+            await asyncio.sleep(0.05)
+            fb_shm.dataframe_map_numeric_column("async_df", "int_col", lambda x: x + 1)
+            await asyncio.sleep(0.05)
+            fb_shm.remove_dataframe("async_df")
+
+        writer = asyncio.ensure_future(write())
+        async for event in existing:
+            events.append(event)
+            if event.kind == REMOVED:
+                break
+        await writer
+        return events
+
+    events = asyncio.run(collect_changes())
+    assert [(event.kind, event.name) for event in events] == [(ADDED, "async_df"), (UPDATED, "async_df"), (REMOVED, "async_df")]
+    assert events[1].entry.version > events[0].entry.version
+    assert events[2].entry is None
+
+    async def wait_for_update():
+        version = client.catalog.lookup("async_remote").version
+        waiting = asyncio.ensure_future(client.wait_for("async_remote", newer_than=version, timeout=10))
+        await asyncio.sleep(0.05)
+        assert not waiting.done()
+        fb_shm.dataframe_map_numeric_column("async_remote", "int_col", lambda x: x * 2)
+        return version, await waiting
+
+    version, entry = asyncio.run(wait_for_update())
+    assert entry.version > version
+
+    with pytest.raises(asyncio.TimeoutError):
+        asyncio.run(client.wait_for("async_missing", timeout=0.1))
+
+    client.close()
+    fb_shm.unlink()
+    fb_shm.close()
@@ -0,0 +1,69 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import fb_batch
+from fb_batch import fb_dataframe_batch
+from fb_dataframe import to_flatbuffer, fb_dataframe_column_stats, fb_dataframe_filter, fb_dataframe_group_by, fb_dataframe_head
+from fb_shared_memory import FbSharedMemory
+from test_fb_dictionary import generate_country_df
+
+
+def test_batch_matches_single_queries(monkeypatch):
+    df = generate_country_df(3000)
+    filters = [("int_col", ">", 3)]
+    queries = [
+        ("head", 7),
+        ("filter", filters),
+        ("group_by", "country", {"int_col": "sum"}),
+        ("group_by", "country", {"float_col": ["min", "max"], "int_col": "mean"}),
+        ("group_by", "int_col", {"float_col": "count"}),
+        ("group_by", "country", {"float_col": "sum"}, filters),
+        ("head", 5, filters),
+        ("group_by", "country", {"int_col": "sum"}, [("country", "==", "XX")]),
+        ("column_stats", "float_col"),
+    ]
+
+    calls = []
+    partial_group_by = fb_batch._partial_group_by
+    monkeypatch.setattr(fb_batch, "_partial_group_by", lambda *args: calls.append(args[1]) or partial_group_by(*args))
+
+    for row_group_size in [None, 1000]:
+        fb_df = to_flatbuffer(df, row_group_size=row_group_size)
+        calls.clear()
+        head, selection, sums, extremes, counts, filtered_sums, filtered_head, empty, stats = fb_dataframe_batch(fb_df, queries)
+
+        pd.testing.assert_frame_equal(head, fb_dataframe_head(fb_df, 7))
+        assert np.array_equal(selection, fb_dataframe_filter(fb_df, filters))
+        pd.testing.assert_frame_equal(sums, fb_dataframe_group_by(fb_df, "country", {"int_col": "sum"}))
+        pd.testing.assert_frame_equal(extremes, fb_dataframe_group_by(fb_df, "country", {"float_col": ["min", "max"], "int_col": "mean"}))
+        pd.testing.assert_frame_equal(counts, fb_dataframe_group_by(fb_df, "int_col", {"float_col": "count"}))
+        pd.testing.assert_frame_equal(filtered_sums, fb_dataframe_group_by(fb_df, "country", {"float_col": "sum"}, selection))
+        pd.testing.assert_frame_equal(filtered_head, fb_dataframe_head(fb_df, 5, selection))
+        assert len(empty) == 0
+        assert stats == fb_dataframe_column_stats(fb_df, "float_col")
+        # Both unfiltered group-bys by country are fused into one pass per row group; the one
+        # matching no rows only aggregates an empty batch.
+        num_batches = 1 if row_group_size is None else 3
+        assert calls.count("country") == 2 * num_batches + 1
+        assert calls.count("int_col") == num_batches
+
+    with pytest.raises(ValueError):
+        fb_dataframe_batch(fb_df, [("sort", "int_col")])
+    with pytest.raises(ValueError):
+        fb_dataframe_batch(fb_df, [("group_by", "country")])
+    with pytest.raises(ValueError):
+        fb_dataframe_batch(fb_df, [("group_by", "country", {"int_col": "median"})])
+
+
+def test_shared_memory_batch():
+    df = generate_country_df(500)
+    fb_shm = FbSharedMemory()
+    fb_shm.add_dataframe("batch_df", df)
+    head, sums = fb_shm.dataframe_batch("batch_df", [("head", 3), ("group_by", "country", {"int_col": "sum"})])
+    fb_shm.remove_dataframe("batch_df")
+    fb_shm.close()
+
+    pd.testing.assert_frame_equal(head, df.head(3))
+    expected = df.groupby("country").agg({"int_col": "sum"})
+    assert sums["int_col"].to_dict() == expected["int_col"].to_dict()
@@ -0,0 +1,39 @@
+import copy
+import json
+
+import pytest
+
+from fb_benchmark import bench_numeric_encoding, compare_reports, run_suite
+
+
+def test_bench_numeric_encoding():
+    # bench_numeric_encoding asserts that both encoders produce identical bytes.
+    results = bench_numeric_encoding(num_rows = 10000, repeat = 1)
+
+    assert set(results) == {"int64", "float64"}
+    for timings in results.values():
+        assert timings["bulk"] > 0 and timings["per_element"] > 0
+
+
+def test_run_suite_and_compare():
+    report = run_suite(rows=[200], columns=[3], dtypes=["float64"], repeat=2, warmup=0, shm_name="CS598_bench_test")
+    json.loads(json.dumps(report))
+
+    results = report["results"]
+    assert {(result["benchmark"], result["impl"]) for result in results} >= {
+        ("to_flatbuffer", "flatbuffer"), ("head", "dill"), ("group_by", "pickle"), ("map", "flatbuffer"),
+        ("shm_add", "flatbuffer"), ("shm_attach", "flatbuffer")}
+    for result in results:
+        assert (result["rows"], result["columns"], result["dtype"]) == (200, 3, "float64")
+        assert 0 < result["median_s"] <= result["p95_s"]
+        assert result["rows_per_s"] > 0 and result["peak_bytes"] >= 0
+
+    assert not any(entry["regression"] for entry in compare_reports(report, report))
+
+    slower = copy.deepcopy(report)
+    slower["results"][1]["median_s"] *= 2
+    slower["results"][2]["peak_bytes"] += 1 << 30
+    regressions = [entry for entry in compare_reports(report, slower, threshold=0.5) if entry["regression"]]
+    assert [(entry["benchmark"], entry["impl"]) for entry in regressions] == \
+        [(result["benchmark"], result["impl"]) for result in results[1:3]]
+    assert regressions[0]["time_change"] == pytest.approx(1.0)
@@ -0,0 +1,52 @@
+from multiprocessing import shared_memory
+
+import pytest
+
+from fb_catalog import FbCatalog, INITIAL_CAPACITY
+from fb_shared_memory import FbSharedMemory
+from test_fb_dataframe import generate_random_df
+
+
+def open_segment(name, size=None):
+    if size is None:
+        return shared_memory.SharedMemory(name=name)
+    return shared_memory.SharedMemory(name=name, create=True, size=size)
+
+
+def test_catalog_put_lookup_remove_and_grow():
+    catalog = FbCatalog("CS598_catalog_test", open_segment)
+
+    # Enough entries to rehash the table a few times.
+    num_entries = 4 * INITIAL_CAPACITY
+    for i in range(num_entries):
+        assert catalog.put(f"df{i}", 0, 100 * i, 10 + i, num_rows=i, num_columns=2, dtypes=0b11) is None
+    assert catalog.table_id > 0
+
+    # Another process attaches and reads single entries in place.
+    other = FbCatalog("CS598_catalog_test", open_segment)
+    entry = other.lookup("df7")
+    assert (entry.segment, entry.offset, entry.length, entry.num_rows, entry.dtypes) == (0, 700, 17, 7, 0b11)
+    assert other.lookup("missing") is None
+
+    previous = other.put("df7", 1, 0, 5)
+    assert previous == entry
+    assert catalog.lookup("df7").version > entry.version
+    assert catalog.remove("df8").offset == 800
+    assert other.lookup("df8") is None
+    assert len(other.entries()) == num_entries - 1
+
+    with pytest.raises(ValueError):
+        catalog.put("x" * 65, 0, 0, 0)
+
+    other.close()
+    catalog.unlink()
+    catalog.close()
+
+
+def test_shared_memory_catalog_summary():
+    fb_shm = FbSharedMemory()
+    fb_shm.add_dataframe("catalog_df", generate_random_df(20, 3))
+
+    entry = fb_shm.catalog.lookup("catalog_df")
+    assert (entry.num_rows, entry.num_columns) == (20, 6)
+    fb_shm.close()
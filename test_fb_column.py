@@ -0,0 +1,89 @@
+import numpy as np
+import pandas as pd
+
+from fb_dataframe import to_flatbuffer, fb_dataframe_column, fb_dataframe_head, fb_dataframe_group_by, fb_dataframe_map_numeric_column
+
+
+def generate_typed_df(num_rows: int = 100):
+    """
+        Generates a dataframe with one column of each supported compact or nullable type.
+    """
+    rng = np.random.default_rng(0)
+    df = pd.DataFrame({
+        "int8_col": rng.integers(-100, 100, num_rows, dtype=np.int8),
+        "int16_col": rng.integers(-1000, 1000, num_rows, dtype=np.int16),
+        "int32_col": rng.integers(0, 10, num_rows, dtype=np.int32),
+        "uint8_col": rng.integers(0, 255, num_rows, dtype=np.uint8),
+        "uint16_col": rng.integers(0, 60000, num_rows, dtype=np.uint16),
+        "uint32_col": rng.integers(0, 2 ** 32 - 1, num_rows, dtype=np.uint32),
+        "uint64_col": rng.integers(0, 2 ** 63, num_rows, dtype=np.uint64),
+        "float32_col": rng.uniform(0, 1, num_rows).astype(np.float32),
+        "bool_col": rng.integers(0, 2, num_rows).astype(bool),
+        "datetime_col": pd.date_range("2024-01-01", periods=num_rows, freq="h"),
+        "datetime_tz_col": pd.date_range("2024-01-01", periods=num_rows, freq="min", tz="US/Central"),
+        "category_col": pd.Categorical(rng.choice(["low", "mid", "high"], num_rows), categories=["low", "mid", "high"], ordered=True),
+    })
+    df["nullable_int_col"] = pd.array(rng.integers(0, 5, num_rows), dtype="Int64")
+    df["nullable_bool_col"] = pd.array(rng.integers(0, 2, num_rows).astype(bool), dtype="boolean")
+    df["string_col"] = [f"s{i}" for i in range(num_rows)]
+
+    # Sprinkle missing values over the nullable columns.
+    missing = rng.random(num_rows) < 0.2
+    for col_name in ["nullable_int_col", "nullable_bool_col", "string_col", "datetime_col", "category_col"]:
+        df.loc[missing, col_name] = None
+    return df
+
+
+def test_typed_round_trip():
+    df = generate_typed_df()
+
+    fb_df = to_flatbuffer(df)
+
+    pd.testing.assert_frame_equal(fb_dataframe_head(fb_df, len(df)), df)
+    pd.testing.assert_frame_equal(fb_dataframe_head(fb_df, 7), df.head(7))
+
+
+def test_compact_types_shrink_buffers():
+    df = generate_typed_df(10000)[["int8_col", "uint16_col", "float32_col", "bool_col"]]
+
+    # Compare the value vectors alone, without the statistics.
+    fb_df = to_flatbuffer(df, zone_size=None)
+
+    # 1 + 2 + 4 bytes plus one bit per row, against 8 bytes per value when upcast.
+    assert len(fb_df) < 10000 * 7.2
+    assert len(fb_df) * 4 < len(to_flatbuffer(df.astype({"int8_col": "int64", "uint16_col": "int64", "float32_col": "float64", "bool_col": "int64"}), zone_size=None))
+
+
+def test_typed_column_views_and_map():
+    df = generate_typed_df()
+
+    fb_df = to_flatbuffer(df)
+
+    int8_values = fb_dataframe_column(fb_df, "int8_col")
+    assert int8_values.dtype == np.int8
+    assert np.shares_memory(int8_values, np.frombuffer(fb_df, dtype=np.uint8))
+    present = df["datetime_col"].notna().to_numpy()
+    assert np.array_equal(fb_dataframe_column(fb_df, "datetime_col")[present], df["datetime_col"].to_numpy()[present])
+
+    fb_dataframe_map_numeric_column(fb_df, "float32_col", lambda x: x * 2)
+    fb_dataframe_map_numeric_column(fb_df, "bool_col", np.logical_not)
+    df["float32_col"] = df["float32_col"] * 2
+    df["bool_col"] = ~df["bool_col"]
+
+    pd.testing.assert_frame_equal(fb_dataframe_head(fb_df, len(df)), df)
+
+
+def test_typed_group_by():
+    df = generate_typed_df(1000)
+
+    fb_df = to_flatbuffer(df)
+
+    aggs = {"uint16_col": ["sum", "min"], "float32_col": "max", "nullable_int_col": ["sum", "count"], "datetime_col": "min"}
+    result = fb_dataframe_group_by(fb_df, "int32_col", aggs)
+    expected = df.groupby("int32_col").agg(aggs)
+    pd.testing.assert_frame_equal(result, expected)
+
+    result = fb_dataframe_group_by(fb_df, "category_col", {"int8_col": "sum"})
+    expected = df.groupby("category_col", observed=True).agg({"int8_col": "sum"})
+    assert result["int8_col"].tolist() == expected["int8_col"].tolist()
+    assert result.index.tolist() == expected.index.tolist()
@@ -0,0 +1,69 @@
+import multiprocessing
+
+import pandas as pd
+
+from fb_shared_memory import FbSharedMemory
+from test_fb_dataframe import generate_random_df
+
+
+POOL_NAME = "CS598_concurrency_test"
+
+
+def make_df(worker: int, i: int) -> pd.DataFrame:
+    df = generate_random_df(20, 1)
+    df["int_col"] = worker * 1000 + i
+    return df
+
+
+def ingest(worker: int) -> None:
+    fb_shm = FbSharedMemory(POOL_NAME, segment_size=1 << 15)
+    for i in range(15):
+        fb_shm.add_dataframe(f"w{worker}_{i}", make_df(worker, i))
+        fb_shm.replace_dataframe("hot", make_df(worker, i))
+    fb_shm.close()
+
+
+def read_hot(rounds: int) -> bool:
+    fb_shm = FbSharedMemory(POOL_NAME, segment_size=1 << 15)
+    ok = True
+    for _ in range(rounds):
+        try:
+            head = fb_shm.dataframe_head("hot", 20)
+        except ValueError:
+            continue
+        # Every published version is whole: a single worker's frame.
+        ok = ok and head["int_col"].nunique() == 1
+    fb_shm.close()
+    return ok
+
+
+def test_concurrent_writers_and_readers():
+    fb_shm = FbSharedMemory(POOL_NAME, segment_size=1 << 15)
+
+    context = multiprocessing.get_context("fork")
+    writers = [context.Process(target=ingest, args=(worker,)) for worker in range(4)]
+    with context.Pool(2) as readers:
+        reads = readers.map_async(read_hot, [200, 200])
+        for writer in writers:
+            writer.start()
+        for writer in writers:
+            writer.join()
+        assert all(reads.get())
+    assert all(writer.exitcode == 0 for writer in writers)
+
+    # Every frame was published, and no two extents overlap.
+    entries = fb_shm.catalog.entries()
+    assert len(entries) == 4 * 15 + 1
+    for worker in range(4):
+        for i in range(15):
+            assert fb_shm.dataframe_head(f"w{worker}_{i}", 20)["int_col"].eq(worker * 1000 + i).all()
+
+    with fb_shm.catalog.locked(0):
+        extents = [[entry.segment, entry.offset, entry.offset + entry.length] for entry in entries.values()]
+        extents += fb_shm.catalog.extents() + fb_shm.catalog.extents(retired=True)
+    extents.sort()
+    for previous, extent in zip(extents, extents[1:]):
+        assert previous[0] != extent[0] or previous[2] <= extent[1]
+
+    fb_shm.unlink()
+    fb_shm.close()
@@ -0,0 +1,65 @@
+import numpy as np
+import pytest
+
+from CS598 import DataFrame
+from fb_dataframe import to_flatbuffer, fb_dataframe_column
+from fb_shared_memory import FbSharedMemory
+from test_fb_dataframe import generate_random_df
+
+
+def test_fb_dataframe_column():
+    df = generate_random_df(100, 3)
+
+    fb_df = to_flatbuffer(df)
+
+    int_values = fb_dataframe_column(fb_df, "int_col")
+    float_values = fb_dataframe_column(fb_df, "float_col")
+
+    assert np.array_equal(int_values, df["int_col"].to_numpy())
+    assert np.array_equal(float_values, df["float_col"].to_numpy())
+
+    # The arrays alias the flatbuffer and can't be written through.
+    assert not int_values.flags.writeable
+    assert np.shares_memory(int_values, np.frombuffer(fb_df, dtype=np.uint8))
+
+    with pytest.raises(ValueError):
+        fb_dataframe_column(fb_df, "string_col")
+    with pytest.raises(ValueError):
+        fb_dataframe_column(fb_df, "missing_col")
+
+
+def test_fb_shared_memory_column():
+    df = generate_random_df(100, 3)
+
+    fb_shm = FbSharedMemory()
+    fb_shm.add_dataframe("column_df", df)
+
+    values = fb_shm.column("column_df", "additional_col_2")
+    assert np.array_equal(values, df["additional_col_2"].to_numpy())
+
+    # The view aliases the shared memory segment instead of a copy of it.
+    assert np.shares_memory(values, np.frombuffer(fb_shm.df_shared_memory.buf, dtype=np.uint8))
+
+    del values
+    fb_shm.close()
+
+
+def test_fb_dataframe_column_directory():
+    df = generate_random_df(10, 50)
+    df = df[list(reversed(df.columns))]
+
+    fb_df = to_flatbuffer(df)
+
+    # The directory lists every column sorted by name and points back at its position.
+    root = DataFrame.DataFrame.GetRootAs(fb_df, 0)
+    names = [root.ColumnDirectory(i).Name().decode() for i in range(root.ColumnDirectoryLength())]
+    assert names == sorted(df.columns)
+    for i in range(root.ColumnDirectoryLength()):
+        metadata = root.ColumnDirectory(i)
+        assert df.columns[metadata.Index()] == metadata.Name().decode()
+
+    # Repeated lookups go through the cached name -> index map.
+    for _ in range(2):
+        for col_name in df.columns:
+            if col_name != "string_col":
+                assert np.array_equal(fb_dataframe_column(fb_df, col_name), df[col_name].to_numpy())
@@ -0,0 +1,49 @@
+import numpy as np
+import pytest
+
+from fb_dataframe import to_flatbuffer, fb_dataframe_head, fb_dataframe_map_numeric_column
+from test_fb_dataframe import generate_random_df
+
+
+def test_fb_dataframe_map_any_numeric_column():
+    df = generate_random_df(100, 5)
+
+    fb_df = to_flatbuffer(df)
+
+    # Vectorizable functions and ufuncs are applied to the whole column at once.
+    fb_dataframe_map_numeric_column(fb_df, "additional_col_3", lambda x: x * 3 - 1)
+    fb_dataframe_map_numeric_column(fb_df, "float_col", np.sqrt)
+    # Functions that branch on the value fall back to one call per element.
+    fb_dataframe_map_numeric_column(fb_df, "int_col", lambda x: x if x > 5 else 0)
+
+    df["additional_col_3"] = df["additional_col_3"] * 3 - 1
+    df["float_col"] = np.sqrt(df["float_col"])
+    df["int_col"] = df["int_col"].apply(lambda x: x if x > 5 else 0)
+
+    assert fb_dataframe_head(fb_df, len(df)).equals(df)
+
+
+def test_fb_dataframe_map_numeric_column_errors():
+    df = generate_random_df(10, 1)
+
+    fb_df = to_flatbuffer(df)
+
+    # An int column can't hold the float results in place.
+    with pytest.raises(TypeError):
+        fb_dataframe_map_numeric_column(fb_df, "int_col", lambda x: x / 2)
+
+    with pytest.raises(ValueError):
+        fb_dataframe_map_numeric_column(bytes(fb_df), "int_col", lambda x: x * 2)
+
+    with pytest.raises(ValueError):
+        fb_dataframe_map_numeric_column(fb_df, "missing_col", lambda x: x * 2)
+
+    # Errors raised by the function itself propagate instead of retrying it on every element.
+    calls = []
+    def lookup_rate(x):
+        calls.append(x)
+        return {"EUR": 1.1}["USD"] * x
+    with pytest.raises(KeyError):
+        fb_dataframe_map_numeric_column(fb_df, "float_col", lookup_rate)
+    assert len(calls) == 1
+    assert fb_dataframe_head(fb_df, len(df)).equals(df)
@@ -0,0 +1,39 @@
+import random
+
+import pandas as pd
+
+from CS598 import DataFrame, DataType
+from fb_dataframe import to_flatbuffer, fb_dataframe_head, fb_dataframe_group_by, fb_dataframe_group_by_sum
+from test_fb_dataframe import generate_random_df
+
+
+def generate_country_df(num_rows: int = 1000):
+    df = generate_random_df(num_rows, 2)
+    df["country"] = [random.choice(["US", "DE", "IN", "BR", "JP"]) for _ in range(num_rows)]
+    return df
+
+
+def test_dictionary_encoded_round_trip():
+    df = generate_country_df()
+
+    fb_df = to_flatbuffer(df)
+
+    # Repeated values are dictionary encoded, unique ones are not.
+    root = DataFrame.DataFrame.GetRootAs(fb_df, 0)
+    dtypes = {root.Columns(i).Metadata().Name().decode(): root.Columns(i).Metadata().Dtype() for i in range(root.ColumnsLength())}
+    assert dtypes["country"] == DataType.DataType.DictString
+    assert dtypes["string_col"] == DataType.DataType.String
+
+    assert len(fb_df) < len(to_flatbuffer(df, dictionary_threshold = 0))
+    assert fb_dataframe_head(fb_df, len(df)).equals(df)
+
+
+def test_dictionary_encoded_group_by():
+    df = generate_country_df()
+
+    fb_df = to_flatbuffer(df)
+
+    assert fb_dataframe_group_by_sum(fb_df, "country", "int_col").equals(df.groupby("country").agg({"int_col": "sum"}))
+
+    aggs = {"float_col": ["mean", "max"], "country": "count"}
+    pd.testing.assert_frame_equal(fb_dataframe_group_by(fb_df, "int_col", aggs), df.groupby("int_col").agg(aggs))
@@ -0,0 +1,73 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from CS598 import DataFrame
+from CS598 import Encoding
+from fb_dataframe import (to_flatbuffer, fb_dataframe_filter, fb_dataframe_group_by, fb_dataframe_head,
+                          fb_dataframe_map_numeric_column, fb_dataframe_to_pandas)
+from fb_encoding import ENCODINGS
+
+
+def generate_int_df(n: int) -> pd.DataFrame:
+    rng = np.random.default_rng(7)
+    return pd.DataFrame({
+        "small_col": rng.integers(0, 1000, n),
+        "signed_col": rng.integers(-50, 50, n),
+        "run_col": np.repeat(rng.integers(-10 ** 12, 10 ** 12, n // 100 + 1), 100)[:n],
+        "id_col": np.arange(n) * 3 + 10 ** 15,
+        "wide_col": rng.integers(-2 ** 63, 2 ** 63 - 1, n, dtype=np.int64),
+        "nullable_col": pd.array(np.where(np.arange(n) % 9 == 0, None, np.arange(n) % 5), dtype="Int64"),
+    })
+
+
+def column_encodings(fb_df: bytes) -> dict:
+    df = DataFrame.DataFrame.GetRootAs(fb_df, 0)
+    names = {value: name for name, value in vars(Encoding.Encoding).items() if not name.startswith("_")}
+    return {df.Columns(i).Metadata().Name().decode(): names[df.Columns(i).Encoding()] for i in range(df.ColumnsLength())}
+
+
+def test_encoded_columns_match_pandas():
+    df = generate_int_df(3000)
+
+    for encoding in ["auto", *ENCODINGS]:
+        for row_group_size in [None, 700]:
+            fb_df = to_flatbuffer(df, row_group_size=row_group_size, zone_size=256, encoding=encoding)
+            pd.testing.assert_frame_equal(fb_dataframe_to_pandas(fb_df), df)
+            pd.testing.assert_frame_equal(fb_dataframe_head(fb_df, 20), df.head(20))
+            pd.testing.assert_frame_equal(fb_dataframe_to_pandas(fb_df, ["run_col", "id_col"], slice(1234, 2900, 3)),
+                                          df.iloc[1234:2900:3][["run_col", "id_col"]])
+            for col_name in df.columns:
+                value = df[col_name].dropna().iloc[77]
+                for op in ["==", ">"]:
+                    mask = df[col_name] == value if op == "==" else df[col_name] > value
+                    assert np.array_equal(fb_dataframe_filter(fb_df, [(col_name, op, value)]),
+                                          np.flatnonzero(mask.fillna(False)))
+            aggs = {"small_col": "sum", "id_col": "max", "run_col": "mean"}
+            pd.testing.assert_frame_equal(fb_dataframe_group_by(fb_df, "signed_col", aggs),
+                                          df.groupby("signed_col").agg(aggs))
+
+
+def test_auto_encoding_picks_smallest():
+    df = generate_int_df(3000)
+    fb_df = to_flatbuffer(df, encoding="auto")
+
+    assert column_encodings(fb_df) == {
+        "small_col": "BitPacked",
+        "signed_col": "FrameOfReference",
+        "run_col": "RunLength",
+        "id_col": "Delta",
+        "wide_col": "Plain",
+        "nullable_col": "BitPacked",
+    }
+    assert len(fb_df) < len(to_flatbuffer(df)) / 2
+
+
+def test_encoded_columns_are_not_mapped_in_place():
+    fb_df = bytearray(to_flatbuffer(generate_int_df(100), encoding="auto"))
+    with pytest.raises(ValueError):
+        fb_dataframe_map_numeric_column(fb_df, "small_col", lambda x: x + 1)
+    fb_dataframe_map_numeric_column(fb_df, "wide_col", lambda x: x // 2)
+
+    with pytest.raises(ValueError):
+        to_flatbuffer(generate_int_df(10), encoding="zstd")
@@ -0,0 +1,94 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from fb_dataframe import to_flatbuffer, fb_dataframe_filter, fb_dataframe_head, fb_dataframe_group_by
+from fb_shared_memory import FbSharedMemory
+from test_fb_column import generate_typed_df
+from test_fb_dictionary import generate_country_df
+
+
+def selection_of(mask) -> np.ndarray:
+    return np.flatnonzero(np.asarray(mask))
+
+
+def test_numeric_and_string_filters():
+    df = generate_country_df(1000)
+    fb_df = to_flatbuffer(df)
+
+    cases = [
+        ([("int_col", ">", 5)], df["int_col"] > 5),
+        ([("float_col", "between", (100.0, 2000.0))], df["float_col"].between(100.0, 2000.0)),
+        ([("int_col", "in", [1, 3]), ("country", "!=", "US")], df["int_col"].isin([1, 3]) & (df["country"] != "US")),
+        ([[("country", "==", "DE")], [("int_col", "<=", 1)]], (df["country"] == "DE") | (df["int_col"] <= 1)),
+        ([("country", "not in", ["US", "BR"])], ~df["country"].isin(["US", "BR"])),
+        ([("string_col", ">=", "M")], df["string_col"] >= "M"),
+    ]
+    for filters, mask in cases:
+        assert np.array_equal(fb_dataframe_filter(fb_df, filters), selection_of(mask))
+
+
+def test_typed_filters_skip_missing_values():
+    df = generate_typed_df(200)
+    fb_df = to_flatbuffer(df)
+
+    cases = [
+        ([("nullable_int_col", "!=", 2)], (df["nullable_int_col"] != 2).fillna(False)),
+        ([("datetime_col", ">=", pd.Timestamp("2024-01-03"))], df["datetime_col"] >= pd.Timestamp("2024-01-03")),
+        ([("datetime_tz_col", "<", pd.Timestamp("2024-01-01 02:00", tz="UTC"))],
+         df["datetime_tz_col"] < pd.Timestamp("2024-01-01 02:00", tz="UTC")),
+        ([("category_col", ">", "low")], df["category_col"] > "low"),
+        ([("category_col", "==", "mid")], df["category_col"] == "mid"),
+        ([("string_col", "!=", "s1")], df["string_col"].notna() & (df["string_col"] != "s1")),
+        ([("bool_col", "==", True), ("uint8_col", "<", 100)], df["bool_col"] & (df["uint8_col"] < 100)),
+    ]
+    for filters, mask in cases:
+        assert np.array_equal(fb_dataframe_filter(fb_df, filters), selection_of(mask))
+
+
+def test_selection_head_and_group_by():
+    df = generate_country_df(1000)
+    aggs = {"int_col": ["sum", "count"], "float_col": "max"}
+    mask = (df["int_col"] >= 4) & (df["country"].isin(["US", "JP"]))
+    filters = [("int_col", ">=", 4), ("country", "in", {"US", "JP"})]
+
+    for row_group_size in [None, 128]:
+        fb_df = to_flatbuffer(df, row_group_size=row_group_size)
+        selection = fb_dataframe_filter(fb_df, filters)
+        assert np.array_equal(selection, selection_of(mask))
+
+        pd.testing.assert_frame_equal(fb_dataframe_head(fb_df, 20, selection), df[mask].head(20))
+        for grouping_col_name in ["country", "int_col"]:
+            pd.testing.assert_frame_equal(fb_dataframe_group_by(fb_df, grouping_col_name, aggs, selection),
+                                          df[mask].groupby(grouping_col_name).agg(aggs))
+
+
+def test_shared_memory_filter():
+    df = generate_country_df(3000)
+    mask = df["float_col"] < 5000
+
+    fb_shm = FbSharedMemory()
+    fb_shm.add_dataframe("filter_df", df)
+
+    selection = fb_shm.dataframe_filter("filter_df", [("float_col", "<", 5000)])
+    head = fb_shm.dataframe_head("filter_df", 7, selection)
+    aggs = {"int_col": "sum"}
+    result = fb_shm.dataframe_group_by("filter_df", "country", aggs, 1, selection)
+    result_parallel = fb_shm.dataframe_group_by("filter_df", "country", aggs, 2, selection)
+    fb_shm.close()
+
+    assert np.array_equal(selection, selection_of(mask))
+    pd.testing.assert_frame_equal(head, df[mask].head(7))
+    expected = df[mask].groupby("country").agg(aggs)
+    pd.testing.assert_frame_equal(result, expected)
+    pd.testing.assert_frame_equal(result_parallel, expected)
+
+
+def test_invalid_filters():
+    fb_df = to_flatbuffer(generate_typed_df(10))
+    with pytest.raises(ValueError):
+        fb_dataframe_filter(fb_df, [("int8_col", "~", 1)])
+    with pytest.raises(ValueError):
+        fb_dataframe_filter(fb_df, [("int8_col", "between", 1)])
+    with pytest.raises(ValueError):
+        fb_dataframe_filter(fb_df, [("missing_col", "==", 1)])
@@ -0,0 +1,103 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from fb_dataframe import to_flatbuffer, fb_dataframe_group_by, fb_dataframe_group_by_sum
+from fb_groupby import group_by, merge_partials, normalize_aggs, partial_group_by, finalize_group_by
+from fb_shared_memory import FbSharedMemory
+from test_fb_column import generate_typed_df
+from test_fb_dataframe import generate_random_df
+
+
+def test_fb_dataframe_group_by_multiple_aggregates():
+    df = generate_random_df(1000, 3)
+
+    fb_df = to_flatbuffer(df)
+
+    aggs = {"additional_col_0": ["sum", "count", "min", "max", "mean"], "float_col": ["sum", "max"]}
+    result = fb_dataframe_group_by(fb_df, "int_col", aggs)
+    expected = df.groupby("int_col").agg(aggs)
+
+    pd.testing.assert_frame_equal(result, expected)
+
+
+def test_fb_dataframe_group_by_sparse_and_string_keys():
+    df = pd.DataFrame({
+        "key": np.array([10 ** 12, -5, 10 ** 12, 7, -5], dtype=np.int64),
+        "name": ["b", "a", "b", "c", "a"],
+        "value": np.array([1, 2, 3, 4, 5], dtype=np.int64),
+    })
+
+    fb_df = to_flatbuffer(df)
+
+    assert fb_dataframe_group_by_sum(fb_df, "key", "value").equals(df.groupby("key").agg({"value": "sum"}))
+    assert fb_dataframe_group_by(fb_df, "name", {"value": "min"}).equals(df.groupby("name").agg({"value": "min"}))
+
+    with pytest.raises(ValueError):
+        fb_dataframe_group_by(fb_df, "key", {"name": "sum"})
+
+
+def test_group_by_narrow_keys_spanning_their_range():
+    for keys in [np.array([-128, 127, 0, 127], dtype=np.int8), np.array([-30000, 30000, -30000], dtype=np.int16),
+                 np.array([0, 2 ** 64 - 1, 2 ** 64 - 1], dtype=np.uint64)]:
+        df = pd.DataFrame({"key": keys, "value": np.arange(len(keys), dtype=np.int64)})
+        result = fb_dataframe_group_by(to_flatbuffer(df), "key", {"value": "sum"})
+        assert result["value"].to_dict() == df.groupby("key").agg({"value": "sum"})["value"].to_dict()
+
+
+def test_mean_of_values_whose_sum_wraps():
+    df = pd.DataFrame({"key": [1, 1, 2], "value": np.array([2 ** 63 + 5, 2 ** 63 + 7, 3], dtype=np.uint64)})
+    result = fb_dataframe_group_by(to_flatbuffer(df), "key", {"value": ["mean", "sum"]})
+    expected = df.groupby("key").agg({"value": ["mean", "sum"]})
+    assert result[("value", "mean")].tolist() == pytest.approx(expected[("value", "mean")].tolist())
+    assert result[("value", "sum")].tolist() == [12, 3]
+
+
+def test_unsigned_sums_past_the_int64_range():
+    df = pd.DataFrame({"key": [1, 1, 2, 3, 3, 3] * 50,
+                       "value": np.array([2 ** 63 + 5, 1, 2 ** 64 - 1, 2 ** 63, 2 ** 62, 2 ** 62] * 50, dtype=np.uint64)})
+    expected = df.groupby("key").agg({"value": "sum"})
+    pd.testing.assert_frame_equal(fb_dataframe_group_by(to_flatbuffer(df, row_group_size=64), "key", {"value": "sum"}), expected)
+
+    fb_shm = FbSharedMemory("CS598_unsigned_sum_test", segment_size=1 << 20)
+    fb_shm.add_dataframe("unsigned", df)
+    for processes in [1, 2]:
+        pd.testing.assert_frame_equal(fb_shm.dataframe_group_by("unsigned", "key", {"value": "sum"}, processes), expected)
+    fb_shm.unlink()
+    fb_shm.close()
+
+
+def test_results_keep_pandas_dtypes():
+    df = generate_typed_df(400)
+    # The rows of group 99 are missing every nullable value, so they have no min, max or mean.
+    df.loc[:4, "int32_col"] = 99
+    df.loc[:4, ["nullable_int_col", "nullable_bool_col", "datetime_col"]] = None
+    df["nullable_float_col"] = pd.array(df["float32_col"], dtype="Float32")
+    df.loc[:4, "nullable_float_col"] = None
+    all_aggs = ["sum", "count", "min", "max", "mean"]
+    aggs = {"int8_col": all_aggs, "uint8_col": all_aggs, "int16_col": ["sum", "min"], "uint64_col": all_aggs,
+            "float32_col": all_aggs, "bool_col": all_aggs, "nullable_int_col": all_aggs,
+            "nullable_bool_col": all_aggs, "nullable_float_col": all_aggs, "datetime_col": ["count", "min", "max"],
+            "datetime_tz_col": ["min", "max"], "string_col": "count"}
+    expected = df.groupby("int32_col").agg(aggs)
+    for fb_df in [to_flatbuffer(df), to_flatbuffer(df, row_group_size=64)]:
+        pd.testing.assert_frame_equal(fb_dataframe_group_by(fb_df, "int32_col", aggs), expected, check_dtype=True)
+
+    # Narrow integer sums keep their dtype when every sum fits it.
+    small = df[df["int32_col"] == 99]
+    aggs = {"int8_col": "sum", "nullable_int_col": "sum", "uint16_col": "sum"}
+    pd.testing.assert_frame_equal(fb_dataframe_group_by(to_flatbuffer(small), "int32_col", aggs),
+                                  small.groupby("int32_col").agg(aggs), check_dtype=True)
+
+
+def test_merge_partials():
+    keys = np.array([3, 1, 3, 2, 1, 1], dtype=np.int64)
+    values = {"v": np.array([1.0, np.nan, 2.0, 4.0, 8.0, 16.0])}
+    aggs = normalize_aggs({"v": ["sum", "count", "min", "mean"]})
+
+    partials = [partial_group_by(keys[:3], {"v": values["v"][:3]}, aggs),
+                partial_group_by(keys[3:], {"v": values["v"][3:]}, aggs)]
+    merged = finalize_group_by(merge_partials(partials, aggs), "k", aggs)
+
+    expected = group_by(keys, values, "k", {"v": ["sum", "count", "min", "mean"]})
+    pd.testing.assert_frame_equal(merged, expected)
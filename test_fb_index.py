@@ -0,0 +1,90 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from fb_dataframe import to_flatbuffer
+from fb_index import build_index, index_lookup, index_range
+from fb_shared_memory import FbSharedMemory
+from test_fb_column import generate_typed_df
+from test_fb_dictionary import generate_country_df
+
+
+def test_index_lookups_match_pandas():
+    df = generate_typed_df(600)
+    df["user_id"] = np.random.default_rng(1).integers(0, 50, len(df))
+
+    for row_group_size in [None, 250]:
+        fb_df = to_flatbuffer(df, row_group_size=row_group_size)
+        for col_name in ["user_id", "int8_col", "uint64_col", "string_col", "datetime_col"]:
+            index = build_index(fb_df, col_name)
+            for value in df[col_name].dropna().iloc[[0, 5, 77]]:
+                assert np.array_equal(index_lookup(fb_df, index, value), np.flatnonzero(df[col_name] == value))
+            sorted_values = df[col_name].dropna().sort_values()
+            low, high = sorted_values.iloc[100], sorted_values.iloc[300]
+            for inclusive in ["both", "neither", "left", "right"]:
+                expected = np.flatnonzero(df[col_name].between(low, high, inclusive=inclusive))
+                assert np.array_equal(index_range(fb_df, index, low, high, inclusive), expected)
+            assert np.array_equal(index_range(fb_df, index, low=high), np.flatnonzero(df[col_name] >= high))
+
+        hash_index = build_index(fb_df, "category_col", "hash")
+        assert np.array_equal(index_lookup(fb_df, hash_index, "mid"), np.flatnonzero(df["category_col"] == "mid"))
+        sorted_index = build_index(fb_df, "float32_col", "sorted")
+        assert np.array_equal(index_range(fb_df, sorted_index, high=0.5), np.flatnonzero(df["float32_col"] <= 0.5))
+
+    fb_df = to_flatbuffer(df)
+    index = build_index(fb_df, "user_id", "hash")
+    for value in [-1, 2.5, 300, "x"]:
+        assert len(index_lookup(fb_df, index, value)) == 0
+    with pytest.raises(ValueError):
+        index_range(fb_df, index, 1, 2)
+    with pytest.raises(ValueError):
+        build_index(fb_df, "float32_col", "hash")
+    with pytest.raises(ValueError):
+        build_index(fb_df, "user_id", "btree")
+
+
+def test_shared_memory_indexes():
+    df = generate_country_df(3000)
+    df["user_id"] = np.arange(len(df)) % 700
+
+    fb_shm = FbSharedMemory()
+    fb_shm.add_dataframe("index_df", df, indexes={"user_id": ["sorted", "hash"], "country": "hash"})
+    assert fb_shm._indexes("index_df") == {"user_id": ["sorted", "hash"], "country": ["hash"]}
+
+    user_rows = fb_shm.dataframe_index_lookup("index_df", "user_id", 42)
+    country_rows = fb_shm.dataframe_index_lookup("index_df", "country", "DE")
+    range_rows = fb_shm.dataframe_index_range("index_df", "user_id", 10, 20, "left")
+    # Without a sorted index the column is scanned.
+    scanned_rows = fb_shm.dataframe_index_range("index_df", "country", "DE", "JP")
+    unindexed_rows = fb_shm.dataframe_index_lookup("index_df", "int_col", 3)
+
+    # Mapping the column rebuilds its indexes.
+    fb_shm.dataframe_map_numeric_column("index_df", "user_id", lambda x: x + 1000)
+    mapped_rows = fb_shm.dataframe_index_lookup("index_df", "user_id", 1042)
+    stale_rows = fb_shm.dataframe_index_lookup("index_df", "user_id", 42)
+
+    # Compaction moves the dataframe under a new version; the indexes follow it.
+    fb_shm.add_dataframe("index_filler_df", df.head(10))
+    fb_shm.remove_dataframe("index_filler_df")
+    fb_shm.reclaim()
+    fb_shm.compact()
+    compacted_valid = all(index_buf is not None for _, index_buf, _ in fb_shm._index_parts("index_df", "user_id"))
+
+    fb_shm.replace_dataframe("index_df", df.drop(columns=["country"]))
+    replaced_indexes = fb_shm._indexes("index_df")
+    replaced_rows = fb_shm.dataframe_index_lookup("index_df", "user_id", 42)
+    fb_shm.remove_dataframe("index_df")
+    removed_indexes = fb_shm._indexes("index_df")
+    fb_shm.close()
+
+    assert np.array_equal(user_rows, np.flatnonzero(df["user_id"] == 42))
+    assert np.array_equal(country_rows, np.flatnonzero(df["country"] == "DE"))
+    assert np.array_equal(range_rows, np.flatnonzero(df["user_id"].between(10, 20, inclusive="left")))
+    assert np.array_equal(scanned_rows, np.flatnonzero(df["country"].between("DE", "JP")))
+    assert np.array_equal(unindexed_rows, np.flatnonzero(df["int_col"] == 3))
+    assert np.array_equal(mapped_rows, user_rows)
+    assert len(stale_rows) == 0
+    assert compacted_valid
+    assert replaced_indexes == {"user_id": ["sorted", "hash"]}
+    assert np.array_equal(replaced_rows, user_rows)
+    assert removed_indexes == {}
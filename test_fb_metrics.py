@@ -0,0 +1,79 @@
+import numpy as np
+import pytest
+
+import fb_metrics
+from fb_dataframe import to_flatbuffer, fb_dataframe_filter, fb_dataframe_group_by, fb_dataframe_head
+from fb_shared_memory import FbSharedMemory
+from test_fb_dictionary import generate_country_df
+
+
+@pytest.fixture
+def metrics():
+    fb_metrics.reset()
+    fb_metrics.enable()
+    yield fb_metrics
+    fb_metrics.disable()
+    fb_metrics.reset()
+
+
+def test_operation_metrics(metrics):
+    df = generate_country_df(2000)
+    records = []
+    metrics.add_hook(records.append)
+    try:
+        fb_df = to_flatbuffer(df)
+        selection = fb_dataframe_filter(fb_df, [("int_col", ">", 5)])
+        fb_dataframe_group_by(fb_df, "country", {"float_col": "sum"}, selection)
+        fb_dataframe_head(fb_df, 10)
+    finally:
+        metrics.remove_hook(records.append)
+
+    totals = metrics.snapshot()
+    assert totals["to_flatbuffer"]["calls"] == 1
+    assert totals["to_flatbuffer"]["bytes_copied"] == len(fb_df)
+    assert set(totals["to_flatbuffer"]["phases"]) == {"encode", "stats", "write"}
+    assert totals["filter"]["rows_scanned"] == len(df)
+    assert totals["filter"]["bytes_zero_copy"] == df["int_col"].nbytes
+    # Reading selected rows copies them.
+    assert totals["group_by"]["rows_scanned"] == len(selection)
+    assert totals["group_by"]["bytes_copied"] > 0
+    assert totals["group_by"]["phases"].keys() == {"partial_group_by", "merge_group_by"}
+    assert totals["head"]["rows_scanned"] == 10
+
+    assert [record.name for record in records if record.depth == 0] == ["to_flatbuffer", "filter", "group_by", "head"]
+    nested = [record for record in records if record.depth == 1]
+    assert {record.name for record in nested} == {"partial_group_by", "merge_group_by"}
+
+
+def test_disabled_metrics_record_nothing():
+    fb_metrics.reset()
+    fb_dataframe_head(to_flatbuffer(generate_country_df(100)))
+    assert fb_metrics.snapshot() == {}
+
+
+def test_shared_memory_stats(metrics):
+    df = generate_country_df(3000)
+
+    fb_shm = FbSharedMemory()
+    fb_shm.add_dataframe("metrics_df", df)
+    fb_shm.add_dataframe("metrics_filler_df", df.head(100))
+    fb_shm.remove_dataframe("metrics_filler_df")
+    fb_shm.dataframe_group_by_sum("metrics_df", "country", "int_col")
+    stats = fb_shm.stats()
+    fb_shm.remove_dataframe("metrics_df")
+    fb_shm.close()
+
+    operations = stats["operations"]
+    add = operations["shm.add_dataframe"]
+    # Encoded once, then copied into the segment.
+    assert add["calls"] == 2
+    assert add["bytes_copied"] == 2 * operations["to_flatbuffer"]["bytes_copied"]
+    assert {"to_flatbuffer", "allocate", "copy", "publish"} <= set(add["phases"])
+    assert operations["shm.dataframe_group_by_sum"]["rows_scanned"] == len(df)
+    assert operations["shm.dataframe_group_by_sum"]["bytes_zero_copy"] > 0
+
+    segment = stats["segments"][0]
+    assert segment["used"] + segment["free"] + segment["retired"] == segment["size"]
+    assert segment["retired"] > 0
+    assert 0 < stats["utilization"] < 1
+    assert 0 <= stats["fragmentation"] < 1
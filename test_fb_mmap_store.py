@@ -0,0 +1,23 @@
+import pandas as pd
+
+from fb_mmap_store import FbMmapStore
+from test_fb_dataframe import generate_random_df
+
+
+def test_mmap_store_survives_reopen(tmp_path):
+    df = generate_random_df(100, 2)
+
+    store = FbMmapStore(str(tmp_path), segment_size=1 << 16)
+    store.add_dataframe("persistent_df", df)
+    store.dataframe_map_numeric_column("persistent_df", "int_col", lambda x: x + 1)
+    store.flush()
+    store.close()
+
+    # A new process reopens the files without re-encoding anything.
+    reopened = FbMmapStore(str(tmp_path))
+    df["int_col"] = df["int_col"] + 1
+    assert reopened.dataframe_head("persistent_df", 100).equals(df)
+    pd.testing.assert_frame_equal(reopened.dataframe_group_by_sum("persistent_df", "int_col", "additional_col_0"), df.groupby("int_col").agg({"additional_col_0": "sum"}))
+    result = reopened.dataframe_group_by("persistent_df", "int_col", {"float_col": "max"}, processes=2)
+    pd.testing.assert_frame_equal(result, df.groupby("int_col").agg({"float_col": "max"}))
+    reopened.close()
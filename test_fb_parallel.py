@@ -0,0 +1,33 @@
+import pandas as pd
+
+from fb_dataframe import to_flatbuffer, fb_dataframe_partial_group_by, fb_dataframe_merge_group_by
+from fb_shared_memory import FbSharedMemory
+from test_fb_dictionary import generate_country_df
+
+
+def test_merge_row_range_partials():
+    df = generate_country_df(1000)
+    fb_df = to_flatbuffer(df, row_group_size=300)
+    aggs = {"int_col": ["sum", "max"], "float_col": "mean"}
+
+    # Ranges cutting through row groups, including an empty one.
+    bounds = [0, 100, 100, 450, 999, 1000]
+    for grouping_col_name in ["country", "int_col"]:
+        partials = [fb_dataframe_partial_group_by(fb_df, grouping_col_name, aggs, start, stop) for start, stop in zip(bounds, bounds[1:])]
+        result = fb_dataframe_merge_group_by(fb_df, partials, grouping_col_name, aggs)
+        pd.testing.assert_frame_equal(result, df.groupby(grouping_col_name).agg(aggs))
+
+
+def test_shared_memory_parallel_group_by():
+    df = generate_country_df(5000)
+
+    fb_shm = FbSharedMemory()
+    fb_shm.add_dataframe("parallel_df", df)
+
+    aggs = {"int_col": "sum", "float_col": ["min", "count"]}
+    result = fb_shm.dataframe_group_by("parallel_df", "country", aggs, processes=3)
+    result_sum = fb_shm.dataframe_group_by_sum("parallel_df", "int_col", "float_col", processes=2)
+    fb_shm.close()
+
+    pd.testing.assert_frame_equal(result, df.groupby("country").agg(aggs))
+    pd.testing.assert_frame_equal(result_sum, df.groupby("int_col").agg({"float_col": "sum"}))
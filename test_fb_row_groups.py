@@ -0,0 +1,46 @@
+import io
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from CS598 import DataFrame
+from fb_dataframe import FbDataFrameWriter, to_flatbuffer, to_flatbuffer_stream, fb_dataframe_column, fb_dataframe_head, fb_dataframe_group_by, fb_dataframe_map_numeric_column
+from test_fb_dictionary import generate_country_df
+
+
+def test_stream_from_csv_chunks():
+    df = generate_country_df(1000)
+    csv = io.StringIO(df.to_csv(index=False))
+
+    fb_df = to_flatbuffer_stream(pd.read_csv(csv, chunksize=90), row_group_size=256)
+
+    root = DataFrame.DataFrame.GetRootAs(fb_df, 0)
+    assert root.RowGroupsLength() == 4
+    assert [root.RowGroups(i).NumRows() for i in range(4)] == [256, 256, 256, 232]
+    assert root.NumRows() == len(df)
+
+    expected = pd.read_csv(io.StringIO(df.to_csv(index=False)))
+    pd.testing.assert_frame_equal(fb_dataframe_head(fb_df, len(df)), expected)
+    pd.testing.assert_frame_equal(fb_dataframe_head(fb_df, 300), expected.head(300))
+    assert np.array_equal(fb_dataframe_column(fb_df, "int_col"), expected["int_col"].to_numpy())
+
+
+def test_row_groups_group_by_and_map():
+    df = generate_country_df(1000)
+
+    fb_df = to_flatbuffer(df, row_group_size=128)
+
+    aggs = {"int_col": ["sum", "min"], "float_col": "mean"}
+    for grouping_col_name in ["country", "int_col", "string_col"]:
+        pd.testing.assert_frame_equal(fb_dataframe_group_by(fb_df, grouping_col_name, aggs), df.groupby(grouping_col_name).agg(aggs))
+
+    fb_dataframe_map_numeric_column(fb_df, "int_col", lambda x: x * 2)
+    assert np.array_equal(fb_dataframe_column(fb_df, "int_col"), df["int_col"].to_numpy() * 2)
+
+
+def test_writer_rejects_mismatched_chunks():
+    writer = FbDataFrameWriter(row_group_size=10)
+    writer.write(pd.DataFrame({"a": [1, 2]}))
+    with pytest.raises(ValueError):
+        writer.write(pd.DataFrame({"b": [3]}))
@@ -0,0 +1,54 @@
+import pandas as pd
+
+from fb_shared_memory import FbSharedMemory, _allocate, _release
+from test_fb_dataframe import generate_random_df
+
+
+def test_free_list_coalescing():
+    free = [[0, 0, 64]]
+    extents = [_allocate(free, 16) for _ in range(4)]
+    assert extents == [[0, 0, 16], [0, 16, 32], [0, 32, 48], [0, 48, 64]]
+    assert free == [] and _allocate(free, 8) is None
+
+    _release(free, extents[0])
+    _release(free, extents[2])
+    assert free == [[0, 0, 16], [0, 32, 48]]
+    _release(free, extents[1])
+    assert free == [[0, 0, 48]]
+    _release(free, extents[3])
+    assert free == [[0, 0, 64]]
+
+
+def test_remove_replace_compact_and_grow():
+    fb_shm = FbSharedMemory("CS598_allocator_test", segment_size=1 << 14)
+    dfs = {f"df{i}": generate_random_df(100, 2) for i in range(6)}
+    for name, df in dfs.items():
+        fb_shm.add_dataframe(name, df)
+
+    # The frames outgrow the first segment, so the pool adds segments instead of failing.
+    assert len(fb_shm.catalog.segment_sizes()) > 1
+
+    fb_shm.remove_dataframe("df0")
+    fb_shm.remove_dataframe("df2")
+    new_df1 = generate_random_df(50, 3)
+    fb_shm.replace_dataframe("df1", new_df1)
+    dfs["df1"] = new_df1
+    del dfs["df0"], dfs["df2"]
+
+    # Retired extents are only reused after reclaim(); compaction then fills the holes.
+    used = sum(end - start for _, start, end in fb_shm.catalog.extents())
+    fb_shm.reclaim()
+    assert sum(end - start for _, start, end in fb_shm.catalog.extents()) > used
+    before = fb_shm.catalog.entries()
+    fb_shm.compact()
+    assert fb_shm.catalog.entries() != before
+
+    # Another attached process sees the published layout.
+    fb_shm2 = FbSharedMemory("CS598_allocator_test")
+    for name, df in dfs.items():
+        assert fb_shm2.dataframe_head(name, 100).equals(df)
+    assert fb_shm2.catalog.lookup("df0") is None
+
+    fb_shm2.close()
+    fb_shm.unlink()
+    fb_shm.close()
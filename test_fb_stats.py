@@ -0,0 +1,122 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import fb_dataframe
+from fb_dataframe import to_flatbuffer, fb_dataframe_column_stats, fb_dataframe_filter, fb_dataframe_map_numeric_column
+from fb_shared_memory import FbSharedMemory
+from test_fb_column import generate_typed_df
+from test_fb_dictionary import generate_country_df
+
+
+def assert_stats_match(stats, series):
+    assert stats["count"] == series.count()
+    assert stats["null_count"] == series.isna().sum()
+    if series.dtype == object or isinstance(series.dtype, pd.CategoricalDtype):
+        assert stats["min"] == series.dropna().min()
+        assert stats["max"] == series.dropna().max()
+    else:
+        assert stats["min"] == series.min()
+        assert stats["max"] == series.max()
+    if stats["sum"] is not None:
+        if isinstance(stats["sum"], float):
+            assert stats["sum"] == pytest.approx(series.sum())
+        else:
+            expected = series.sum()
+            if series.dtype.kind == "u":
+                # Pandas before 2.1 returns the sums of uint64 columns as int64.
+                expected = np.asarray(expected).astype(np.uint64)
+            assert stats["sum"] == int(expected)
+        assert stats["mean"] == pytest.approx(series.mean())
+    # KMV estimates are exact below fb_stats.KMV_SIZE distinct values.
+    assert stats["nunique"] == pytest.approx(series.nunique(), rel=0.2)
+
+
+def test_column_stats_match_pandas():
+    df = generate_country_df(1000)
+    df.loc[::7, "float_col"] = np.nan
+    typed_df = generate_typed_df(500)
+
+    for frame in [df, typed_df]:
+        for fb_df in [to_flatbuffer(frame), to_flatbuffer(frame, row_group_size=150, zone_size=64)]:
+            for col_name in frame.columns:
+                assert_stats_match(fb_dataframe_column_stats(fb_df, col_name), frame[col_name])
+
+
+def test_zone_maps_skip_blocks(monkeypatch):
+    df = generate_country_df(1000)
+    df["sorted_col"] = np.arange(1000)
+    fb_df = to_flatbuffer(df, zone_size=100)
+
+    evaluated = []
+    column_mask = fb_dataframe._column_mask
+    def recording_column_mask(column, col_name, op, value, rows=slice(None), scan=None):
+        mask = column_mask(column, col_name, op, value, rows, scan)
+        evaluated.append(len(mask))
+        return mask
+    monkeypatch.setattr(fb_dataframe, "_column_mask", recording_column_mask)
+
+    selection = fb_dataframe_filter(fb_df, [("sorted_col", ">=", 950), ("int_col", "<", 8)])
+    assert np.array_equal(selection, np.flatnonzero((df["sorted_col"] >= 950) & (df["int_col"] < 8)))
+    assert evaluated == [100, 100]
+
+    evaluated.clear()
+    assert len(fb_dataframe_filter(fb_df, [("sorted_col", "<", 0)])) == 0
+    assert len(fb_dataframe_filter(fb_df, [("country", "in", ["AR", "ZA"])])) == 0
+    assert evaluated == []
+
+
+def test_zone_map_filters_match_pandas():
+    df = generate_typed_df(1000)
+    df["float_col"] = np.where(np.arange(1000) % 5 == 0, np.nan, np.arange(1000) / 10)
+
+    cases = [
+        ([("float_col", "!=", 1.0)], df["float_col"].notna() & (df["float_col"] != 1.0)),
+        ([("float32_col", "==", float(df["float32_col"][3]))], df["float32_col"] == df["float32_col"][3]),
+        ([("uint64_col", ">", 2 ** 62)], df["uint64_col"] > 2 ** 62),
+        ([("datetime_col", "between", ("2024-01-10", "2024-01-12"))], df["datetime_col"].between("2024-01-10", "2024-01-12")),
+        ([("category_col", "in", ["high", "none"])], df["category_col"].isin(["high"])),
+        ([("category_col", "<=", "mid")], df["category_col"] <= "mid"),
+        ([[("string_col", "==", "s5")], [("int8_col", "not in", [1, 2, 3])]],
+         (df["string_col"] == "s5") | ~df["int8_col"].isin([1, 2, 3])),
+    ]
+    for row_group_size in [None, 300]:
+        fb_df = to_flatbuffer(df, row_group_size=row_group_size, zone_size=32)
+        for filters, mask in cases:
+            assert np.array_equal(fb_dataframe_filter(fb_df, filters), np.flatnonzero(mask))
+
+
+def test_map_updates_stats():
+    df = generate_typed_df(300)
+    fb_df = bytearray(to_flatbuffer(df, row_group_size=100, zone_size=40))
+
+    fb_dataframe_map_numeric_column(fb_df, "int16_col", lambda x: x // 3)
+    fb_dataframe_map_numeric_column(fb_df, "float32_col", lambda x: x + 10)
+    df["int16_col"] = df["int16_col"] // 3
+    df["float32_col"] = df["float32_col"] + 10
+
+    for col_name in ["int16_col", "float32_col"]:
+        assert_stats_match(fb_dataframe_column_stats(fb_df, col_name), df[col_name])
+    assert np.array_equal(fb_dataframe_filter(fb_df, [("float32_col", ">", 10.5)]), np.flatnonzero(df["float32_col"] > 10.5))
+
+
+def test_unsigned_sums_past_the_int64_range():
+    df = pd.DataFrame({"u": np.array([2 ** 62, 2 ** 62, 2 ** 61, 5], dtype=np.uint64)})
+    fb_df = bytearray(to_flatbuffer(df, row_group_size=2))
+    assert fb_dataframe_column_stats(fb_df, "u")["sum"] == 2 ** 63 + 2 ** 61 + 5
+
+    fb_dataframe_map_numeric_column(fb_df, "u", lambda x: x + np.uint64(1))
+    assert fb_dataframe_column_stats(fb_df, "u")["sum"] == 2 ** 63 + 2 ** 61 + 9
+
+
+def test_shared_memory_column_stats():
+    df = generate_country_df(2000)
+
+    fb_shm = FbSharedMemory()
+    fb_shm.add_dataframe("stats_df", df)
+    stats = fb_shm.dataframe_column_stats("stats_df", "int_col")
+    fb_shm.close()
+
+    assert_stats_match(stats, df["int_col"])
+    with pytest.raises(ValueError):
+        fb_dataframe_column_stats(to_flatbuffer(df, zone_size=None), "int_col")
@@ -0,0 +1,89 @@
+import numpy as np
+import pandas as pd
+
+import fb_dataframe
+from CS598 import DataFrame
+from fb_column import column_values, encode_column
+from fb_dataframe import to_flatbuffer, fb_dataframe_filter, fb_dataframe_group_by, fb_dataframe_head, fb_dataframe_to_pandas
+from fb_index import build_index, index_lookup
+from fb_strings import decode_strings, has_blob, hash_strings, string_hashes, strings_isin
+
+
+def generate_text_df(num_rows: int) -> pd.DataFrame:
+    rng = np.random.default_rng(5)
+    words = np.array(["flat", "buffers", "zero", "copy", "naïve", "café", "日本語", "emoji 🙂", ""], dtype=object)
+    text = [" ".join(rng.choice(words, rng.integers(0, 5))) for _ in range(num_rows)]
+    text = pd.Series(text, dtype=object)
+    text[rng.random(num_rows) < 0.1] = None
+    return pd.DataFrame({"text": text, "user_id": rng.integers(0, 20, num_rows)})
+
+
+def test_blob_layout_roundtrip():
+    df = generate_text_df(2000)
+    df["ascii"] = [f"user{i % 300}" for i in range(len(df))]
+
+    for row_group_size in [None, 700]:
+        fb_df = to_flatbuffer(df, dictionary_threshold=0, row_group_size=row_group_size)
+        pd.testing.assert_frame_equal(fb_dataframe_to_pandas(fb_df), df)
+        pd.testing.assert_frame_equal(fb_dataframe_to_pandas(fb_df, rows=slice(650, 1500, 3)), df.iloc[650:1500:3])
+        selection = np.array([3, 5, 690, 701, 1999])
+        pd.testing.assert_frame_equal(fb_dataframe_head(fb_df, 10, selection), df.iloc[selection])
+
+    # Sparse and dense row selections decode the same values.
+    column = DataFrame.DataFrame.GetRootAs(to_flatbuffer(df, dictionary_threshold=0), 0).Columns(0)
+    assert has_blob(column)
+    values = df["text"].fillna("").to_numpy()
+    for rows in [np.array([1, 1500]), np.arange(100, 200), slice(5, 50, 7)]:
+        assert list(decode_strings(column, rows)) == list(values[rows])
+    assert list(decode_strings(column, 12)) == list(values[:12])
+
+
+def test_raw_byte_filters_and_hashes():
+    df = generate_text_df(3000)
+    fb_df = to_flatbuffer(df, dictionary_threshold=0)
+    column = DataFrame.DataFrame.GetRootAs(fb_df, 0).Columns(0)
+
+    cases = [
+        ([("text", "==", "café")], df["text"] == "café"),
+        ([("text", "==", "")], df["text"] == ""),
+        ([("text", "!=", "flat zero")], (df["text"] != "flat zero") & df["text"].notna()),
+        ([("text", "in", ["日本語", "emoji 🙂", 3])], df["text"].isin(["日本語", "emoji 🙂"])),
+        ([("text", "not in", ["copy"])], ~df["text"].isin(["copy"]) & df["text"].notna()),
+        ([("text", ">=", "naïve")], df["text"] >= "naïve"),
+    ]
+    for filters, mask in cases:
+        assert np.array_equal(fb_dataframe_filter(fb_df, filters), np.flatnonzero(mask.fillna(False)))
+    assert np.array_equal(strings_isin(column, ["café"], slice(10, 20)), (df["text"][10:20] == "café").to_numpy())
+
+    # Hashes depend on the bytes only, wherever they lie in the blob.
+    strings = df["text"].fillna("").tolist()
+    hashes = string_hashes(column)
+    assert np.array_equal(hashes, hash_strings(strings))
+    assert len(set(hashes.tolist())) == len(set(strings))
+
+    index = build_index(fb_df, "text", "hash")
+    for value in ["café", "日本語 flat", "missing", ""]:
+        assert np.array_equal(index_lookup(fb_df, index, value), np.flatnonzero(df["text"] == value))
+
+    result = fb_dataframe_group_by(fb_df, "text", {"user_id": "sum"})
+    assert result["user_id"].to_dict() == df.groupby("text").agg({"user_id": "sum"})["user_id"].to_dict()
+
+
+def test_string_values_layout_still_read(monkeypatch):
+    def encode_legacy(values, dictionary_threshold):
+        encoded = encode_column(values, dictionary_threshold)
+        if "StringBlob" in encoded["vectors"]:
+            del encoded["vectors"]["StringOffsets"], encoded["vectors"]["StringBlob"]
+            encoded["strings"]["StringValues"] = encoded["values"]
+        return encoded
+    monkeypatch.setattr(fb_dataframe, "encode_column", encode_legacy)
+
+    df = generate_text_df(500)
+    fb_df = to_flatbuffer(df, dictionary_threshold=0)
+    column = DataFrame.DataFrame.GetRootAs(fb_df, 0).Columns(0)
+    assert not has_blob(column)
+    assert list(column_values(column, slice(0, 50))) == df["text"][:50].tolist()
+    pd.testing.assert_frame_equal(fb_dataframe_to_pandas(fb_df), df)
+    assert np.array_equal(fb_dataframe_filter(fb_df, [("text", "==", "café")]), np.flatnonzero(df["text"] == "café"))
+    index = build_index(fb_df, "text", "hash")
+    assert np.array_equal(index_lookup(fb_df, index, "café"), np.flatnonzero(df["text"] == "café"))
@@ -0,0 +1,60 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from CS598 import Column
+from fb_dataframe import to_flatbuffer, fb_dataframe_to_pandas
+from fb_shared_memory import FbSharedMemory
+from test_fb_column import generate_typed_df
+from test_fb_dictionary import generate_country_df
+
+
+def test_projection_and_slices_match_pandas():
+    df = generate_typed_df(500)
+
+    for row_group_size in [None, 120]:
+        fb_df = to_flatbuffer(df, row_group_size=row_group_size)
+        for columns in [None, ["string_col", "int8_col", "category_col", "datetime_tz_col"], []]:
+            for rows in [None, slice(10, 300), slice(130, 200), slice(5, None, 7), slice(-50, None), slice(490, 600), slice(0, 0)]:
+                expected = df.iloc[rows or slice(None)]
+                if columns is not None:
+                    expected = expected[columns]
+                pd.testing.assert_frame_equal(fb_dataframe_to_pandas(fb_df, columns, rows), expected)
+
+    with pytest.raises(ValueError):
+        fb_dataframe_to_pandas(fb_df, ["missing_col"])
+    with pytest.raises(ValueError):
+        fb_dataframe_to_pandas(fb_df, rows=slice(None, None, -1))
+
+
+def test_numeric_columns_are_views():
+    df = generate_country_df(1000)
+    fb_df = to_flatbuffer(df)
+
+    result = fb_dataframe_to_pandas(fb_df, ["float_col", "int_col"], slice(100, 200))
+    values = result["int_col"].to_numpy()
+    assert np.shares_memory(values, np.frombuffer(fb_df, dtype=np.uint8))
+    assert not values.flags.writeable
+
+
+def test_slices_decode_only_the_dictionary_entries_they_use(monkeypatch):
+    df = pd.DataFrame({"s": [f"v{i % 5000}" for i in range(20000)]})
+    fb_df = to_flatbuffer(df)
+
+    decoded = []
+    dictionary = Column.Column.Dictionary
+    monkeypatch.setattr(Column.Column, "Dictionary", lambda self, j: decoded.append(j) or dictionary(self, j))
+    pd.testing.assert_frame_equal(fb_dataframe_to_pandas(fb_df, rows=slice(0, 5)), df.iloc[:5])
+    pd.testing.assert_frame_equal(fb_dataframe_to_pandas(fb_df, rows=slice(7, 40000, 5000)), df.iloc[7::5000])
+    assert len(decoded) == 5 + 1
+
+
+def test_shared_memory_to_pandas():
+    df = generate_country_df(2000)
+
+    fb_shm = FbSharedMemory()
+    fb_shm.add_dataframe("to_pandas_df", df)
+    result = fb_shm.dataframe_to_pandas("to_pandas_df", ["country", "float_col"], slice(1500, 1600))
+    fb_shm.close()
+
+    pd.testing.assert_frame_equal(result, df.iloc[1500:1600][["country", "float_col"]])
@@ -0,0 +1,69 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from fb_dataframe import to_flatbuffer
+from fb_shared_memory import FbSharedMemory
+from fb_view import FbDataFrame
+from test_fb_column import generate_typed_df
+
+
+def test_view_matches_pandas():
+    df = generate_typed_df(500)
+
+    for row_group_size in [None, 128]:
+        view = FbDataFrame(to_flatbuffer(df, row_group_size=row_group_size))
+        assert len(view) == len(df)
+        assert view.shape == df.shape
+        assert list(view.columns) == list(df.columns)
+        assert list(view) == list(df.columns)
+        assert "int8_col" in view and "missing" not in view
+        assert view.dtypes.to_dict() == df.dtypes.to_dict()
+
+        pd.testing.assert_frame_equal(view.head(), df.head())
+        pd.testing.assert_frame_equal(view.head(-490), df.head(-490))
+        pd.testing.assert_frame_equal(view.iloc[100:300:7], df.iloc[100:300:7])
+        pd.testing.assert_frame_equal(view[120:140], df[120:140])
+        pd.testing.assert_frame_equal(view[["string_col", "float32_col"]], df[["string_col", "float32_col"]])
+        pd.testing.assert_series_equal(view["uint64_col"], df["uint64_col"])
+        pd.testing.assert_series_equal(view["category_col"], df["category_col"])
+        assert np.array_equal(view.column("int8_col"), df["int8_col"].to_numpy())
+
+    with pytest.raises(KeyError):
+        view["missing"]
+    with pytest.raises(KeyError):
+        view.column("missing")
+    with pytest.raises(TypeError):
+        view.iloc[3]
+
+
+def test_view_caches_column_views():
+    df = generate_typed_df(200)
+    view = FbDataFrame(to_flatbuffer(df))
+
+    first = view.column("float32_col")
+    assert not first.flags.writeable
+    assert view.column("float32_col") is first
+    # Row slices of plain fixed-width columns are slices of the cached view.
+    assert np.shares_memory(view.head(10)["float32_col"].to_numpy(), first)
+
+
+def test_shared_memory_views():
+    df = generate_typed_df(300)
+    fb_shm = FbSharedMemory()
+    fb_shm.add_dataframe("view_df", df)
+
+    view = fb_shm.dataframe("view_df")
+    assert fb_shm.dataframe("view_df") is view
+    pd.testing.assert_frame_equal(view.iloc[10:20], df.iloc[10:20])
+
+    fb_shm.dataframe_map_numeric_column("view_df", "int8_col", lambda x: x + 1)
+    mapped = fb_shm.dataframe("view_df")
+    assert mapped is not view
+    assert np.array_equal(mapped.column("int8_col"), df["int8_col"].to_numpy() + 1)
+
+    fb_shm.remove_dataframe("view_df")
+    with pytest.raises(ValueError):
+        fb_shm.dataframe("view_df")
+    del view, mapped
+    fb_shm.close()